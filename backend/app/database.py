@@ -3,6 +3,7 @@ from typing import Optional
 import os
 from dotenv import load_dotenv
 from fastapi import HTTPException, status
+from app.utils.reservations import RESERVATION_RETENTION_SECONDS
 
 load_dotenv()
 
@@ -40,8 +41,34 @@ async def setup_indexes():
     try:
         # Inventory collection indexes
         await database.inventory.create_index("owner_email")
+        # Keyset pages of GET /api/inventory: owner match plus _id order in one index
+        await database.inventory.create_index([("owner_email", 1), ("_id", 1)])
         await database.inventory.create_index([("owner_email", 1), ("category", 1)])
         await database.inventory.create_index([("owner_email", 1), ("name", 1)])
+        # Stock deduction looks items up by normalized name
+        await database.inventory.create_index([("owner_email", 1), ("name_key", 1)])
+        # Bulk upload upserts by SKU; items added one by one have none
+        await database.inventory.create_index(
+            [("owner_email", 1), ("sku", 1)], unique=True, partialFilterExpression={"sku": {"$type": "string"}}
+        )
+        # Range scans for /api/inventory/expiring, already in expiry order
+        await database.inventory.create_index([("owner_email", 1), ("expiry_date", 1)])
+        
+        # Expired checkout holds, found by the reservation sweeper
+        await database.inventory.create_index("holds.expires_at", sparse=True)
+        
+        # Reservations are held until expires_at and dropped a day later
+        await database.reservations.create_index("expires_at", expireAfterSeconds=RESERVATION_RETENTION_SECONDS)
+        await database.reservations.create_index([("status", 1), ("expires_at", 1)])
+        
+        # Upload progress, listed per seller
+        await database.import_jobs.create_index([("owner_email", 1), ("created_at", -1)])
+        
+        # Seller lookup by shop id and by distance ($geoNear needs the 2dsphere index)
+        await database.users.create_index("shop_id", sparse=True)
+        await database.users.create_index([("location", "2dsphere")])
+        # Seller version scan of the match snapshot, answered from the index alone
+        await database.users.create_index([("role", 1), ("email", 1), ("inventory_version", 1), ("items_version", 1)])
         
         # Review collection indexes
         await database.reviews.create_index("shop_id")
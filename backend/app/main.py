@@ -1,7 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import auth, user, shops, inventory, analytics, chatbot, reviews
-from app.database import connect_db, close_db
+from app.database import connect_db, close_db, get_database
+from app.utils.catalog_registry import get_catalog, watch_catalog
+from app.utils.match_pool import shutdown_match_pool
+from app.utils.reservations import sweep_reservations
+import asyncio
 import logging
 
 # Configure logging
@@ -31,11 +35,20 @@ app.add_middleware(
 async def startup():
     logger.info("Starting CORELIA API...")
     await connect_db()
+    
+    # Load the store catalog and watch its sources for hot reloads
+    get_catalog()
+    app.state.catalog_watcher = asyncio.create_task(watch_catalog())
+    # Return the stock of checkout holds nobody confirmed
+    app.state.reservation_sweeper = asyncio.create_task(sweep_reservations(get_database()))
     logger.info("CORELIA API started successfully")
 
 @app.on_event("shutdown")
 async def shutdown():
     logger.info("Shutting down CORELIA API...")
+    app.state.catalog_watcher.cancel()
+    app.state.reservation_sweeper.cancel()
+    shutdown_match_pool()
     await close_db()
     logger.info("CORELIA API shutdown complete")
 
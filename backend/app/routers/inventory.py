@@ -1,73 +1,122 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
 from app.database import get_database
 from app.utils.auth import get_current_user
 from app.utils.ocr_service import OCRService
 from app.utils.llm_service import LLMService
-from app.utils.expiry_logic import calculate_expiry_date, get_expiry_info, get_all_categories_info
-from datetime import datetime
+from app.utils.expiry_logic import (
+    EXPIRY_WARNING_DAYS, calculate_expiry_date, expiry_stages, get_expiry_info, get_all_categories_info, parse_expiry_date
+)
+from app.utils.seller_inventory import seller_inventory
+from app.utils.inventory_keys import name_key
+from app.utils.reservations import RESERVATION_HOLD_SECONDS, release_holds
+from app.utils.inventory_import import IMPORT_FORMATS, start_import
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+import asyncio
+import json
 import random
 import os
+import shutil
+import tempfile
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Documents per round trip when streaming an inventory page
+INVENTORY_BATCH_SIZE = 200
+
+
+def normalize_expiry_date(value):
+    """Parse a submitted expiry date into a datetime, or reject the request"""
+    try:
+        return parse_expiry_date(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid expiry_date: {value!r}, expected an ISO 8601 date")
+
 # Initialize LLM service with API key from environment
 llm_service = LLMService(api_key=os.getenv('OPENROUTER_API_KEY'))
 
 @router.get("")
-async def get_inventory(current_user: str = Depends(get_current_user), db = Depends(get_database)):
+async def get_inventory(
+    limit: int = Query(500, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    current_user: str = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    """
+    Get one page of the seller's inventory with expiry status
+    
+    Expiry classification runs inside the aggregation, which projects only
+    the fields the inventory UI shows. Items are written to the response as
+    the cursor yields them; pass next_cursor back to read the next page.
+    """
     try:
-        # Query MongoDB for user's inventory items
-        items_cursor = db.inventory.find({"owner_email": current_user})
-        items = await items_cursor.to_list(length=None)
-        
-        # Convert ObjectId to string and format for frontend
-        formatted_items = []
-        current_time = datetime.utcnow()
+        from bson import ObjectId
         
-        for item in items:
-            expiry_date = item.get("expiry_date")
-            days_until_expiry = None
-            expiry_status = None
-            
-            if expiry_date:
-                if isinstance(expiry_date, str):
-                    expiry_date = datetime.fromisoformat(expiry_date.replace('Z', '+00:00'))
-                days_until_expiry = (expiry_date - current_time).days
-                
-                if days_until_expiry < 0:
-                    expiry_status = "expired"
-                elif days_until_expiry <= 3:
-                    expiry_status = "critical"
-                elif days_until_expiry <= 7:
-                    expiry_status = "warning"
-                else:
-                    expiry_status = "normal"
-            
-            formatted_item = {
-                "id": str(item["_id"]),
-                "name": item.get("name", ""),
-                "category": item.get("category", ""),
-                "price": item.get("price", 0),
-                "stock": item.get("stock", 0),
-                "unit": item.get("unit", ""),
-                "expiry_date": expiry_date.isoformat() if expiry_date else None,
-                "days_until_expiry": days_until_expiry,
-                "expiry_status": expiry_status,
-                "created_at": item.get("created_at"),
-                "updated_at": item.get("updated_at")
-            }
-            formatted_items.append(formatted_item)
+        match = {"owner_email": current_user}
+        if cursor:
+            if not ObjectId.is_valid(cursor):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            match["_id"] = {"$gt": ObjectId(cursor)}
+        
+        # One extra item tells whether another page follows
+        pipeline = [
+            {"$match": match},
+            {"$sort": {"_id": 1}},
+            {"$limit": limit + 1},
+            *expiry_stages(datetime.utcnow()),
+            {"$project": {
+                "id": {"$toString": "$_id"},
+                "name": {"$ifNull": ["$name", ""]},
+                "category": {"$ifNull": ["$category", ""]},
+                "price": {"$ifNull": ["$price", 0]},
+                "stock": {"$ifNull": ["$stock", 0]},
+                "unit": {"$ifNull": ["$unit", ""]},
+                "expiry_date": 1,
+                "days_until_expiry": 1,
+                "expiry_status": 1
+            }}
+        ]
+        items_cursor = db.inventory.aggregate(pipeline, batchSize=INVENTORY_BATCH_SIZE)
         
-        logger.info(f"Retrieved {len(formatted_items)} inventory items for user {current_user}")
+        async def next_item():
+            try:
+                return await items_cursor.next()
+            except StopAsyncIteration:
+                return None
         
-        return {"items": formatted_items}
+        # Fetch the first batch here so query errors still become a 500
+        first_item = await next_item()
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Get Inventory Error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch inventory: {str(e)}")
+    
+    def encode_item(item: dict) -> bytes:
+        item.pop("_id", None)
+        if item.get("expiry_date") is not None:
+            item["expiry_date"] = item["expiry_date"].isoformat()
+        return json.dumps(item).encode("utf-8")
+    
+    async def stream():
+        yield b'{"items":['
+        count, last_id, item = 0, None, first_item
+        while item is not None and count < limit:
+            yield (b"," if count else b"") + encode_item(item)
+            count, last_id = count + 1, item["id"]
+            item = await next_item()
+        
+        next_cursor = last_id if item is not None else None
+        await items_cursor.close()
+        logger.info(f"Retrieved {count} inventory items for user {current_user}")
+        yield b'],"count":' + json.dumps(count).encode("utf-8") + b',"next_cursor":' + json.dumps(next_cursor).encode("utf-8") + b"}"
+    
+    return StreamingResponse(stream(), media_type="application/json")
 
 @router.post("")
 async def create_inventory_item(item: dict, current_user: str = Depends(get_current_user), db = Depends(get_database)):
@@ -86,77 +135,215 @@ async def create_inventory_item(item: dict, current_user: str = Depends(get_curr
             if "category" in item and item["category"]:
                 item["expiry_date"] = calculate_expiry_date(item["category"], current_time)
                 logger.info(f"Auto-calculated expiry date for '{item.get('name')}' ({item['category']}): {item['expiry_date']}")
+        else:
+            # Always a BSON date, so /expiring can range-scan the index
+            item["expiry_date"] = normalize_expiry_date(item["expiry_date"])
+        # Exact, indexed lookups when customers buy the item
+        item["name_key"] = name_key(item.get("name", ""))
         
         logger.info(f"Creating inventory item '{item.get('name')}' at {current_time}")
         
         result = await db.inventory.insert_one(item)
+        await seller_inventory.invalidate(db, current_user)
         
         logger.info(f"Successfully created item with ID: {result.inserted_id}")
         
         return {"success": True, "id": str(result.inserted_id), "created_at": current_time.isoformat()}
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to create inventory item: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to create inventory item: {str(e)}")
 
+def purchase_quantity(value) -> Optional[int]:
+    """Units asked for on a purchase line, None unless a whole number of at least one"""
+    if isinstance(value, bool):
+        return None
+    try:
+        quantity = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not quantity.is_integer() or quantity < 1:
+        return None
+    return int(quantity)
+
+
+async def resolve_purchase_lines(items: List[dict], db) -> tuple:
+    """
+    Resolve purchase lines to seller inventory items in two queries
+    
+    Sellers are looked up by shop_id with one $in query and their items by
+    the indexed name_key with another. Lines asking for the same item are
+    merged into one target.
+    
+    Args:
+        items: [{"shop_id": "SHP#####", "name": "...", "quantity": ...}]
+        db: Database
+    
+    Returns:
+        (lines, sellers by shop_id, targets), where each line carries a status
+        (invalid, not_found or skipped until a target settles it) and each
+        target is {"item_id", "owner_email", "quantity", "lines"}
+    """
+    lines = []
+    for position, purchase_item in enumerate(items):
+        quantity = purchase_quantity(purchase_item.get("quantity", 1))
+        lines.append({
+            "index": position,
+            "shop_id": purchase_item.get("shop_id"),
+            "name": purchase_item.get("name") or "",
+            "quantity": quantity if quantity is not None else purchase_item.get("quantity"),
+            "status": "skipped" if quantity is not None else "invalid"
+        })
+    
+    # Skip lines without shop_id (CSV shop, not a real seller)
+    shop_ids = sorted({line["shop_id"] for line in lines if line["shop_id"] and line["status"] != "invalid"})
+    sellers = {}
+    if shop_ids:
+        sellers_cursor = db.users.find(
+            {"shop_id": {"$in": shop_ids}, "role": "seller"},
+            {"shop_id": 1, "email": 1, "shop_name": 1}
+        )
+        sellers = {seller["shop_id"]: seller for seller in await sellers_cursor.to_list(length=None)}
+    
+    wanted = {}
+    for line in lines:
+        if line["status"] == "invalid":
+            continue
+        seller = sellers.get(line["shop_id"])
+        if seller is None:
+            if line["shop_id"]:
+                line["status"] = "not_found"
+            continue
+        key = (seller["email"], name_key(line["name"]))
+        wanted.setdefault(key, []).append(line)
+    
+    inventory_items = {}
+    if wanted:
+        items_cursor = db.inventory.find(
+            {"owner_email": {"$in": sorted({email for email, _ in wanted})},
+             "name_key": {"$in": sorted({key for _, key in wanted})}},
+            {"owner_email": 1, "name_key": 1}
+        )
+        for inventory_item in await items_cursor.to_list(length=None):
+            inventory_items.setdefault((inventory_item["owner_email"], inventory_item["name_key"]), inventory_item["_id"])
+    
+    targets = []
+    for key, key_lines in wanted.items():
+        item_id = inventory_items.get(key)
+        if item_id is None:
+            for line in key_lines:
+                line["status"] = "not_found"
+            continue
+        targets.append({
+            "item_id": item_id,
+            "owner_email": key[0],
+            "quantity": sum(line["quantity"] for line in key_lines),
+            "lines": key_lines
+        })
+    return lines, sellers, targets
+
+
+async def take_stock(db, targets: List[dict], hold: Optional[dict] = None) -> List[str]:
+    """
+    Decrement stock of every target with one bulk write
+    
+    Each item gets a conditional update that only matches while stock
+    covers the target quantity, so concurrent checkouts never oversell.
+    Every update also pushes a marker for this checkout (the hold itself
+    when reserving), so one read of the targets afterwards tells which
+    items were taken, which were short and which were deleted meanwhile.
+    
+    Args:
+        db: Database
+        targets: Targets from resolve_purchase_lines
+        hold: {"id", "expires_at"} to record the taken units as a reservation hold
+    
+    Returns:
+        Status per target: taken, insufficient_stock or not_found
+    """
+    if not targets:
+        return []
+    from bson import ObjectId
+    now = datetime.utcnow()
+    
+    if hold is not None:
+        field, marker = "holds", hold["id"]
+    else:
+        field, marker = "checkouts", ObjectId()
+    operations = []
+    for target in targets:
+        pushed = {**hold, "quantity": target["quantity"]} if hold is not None else marker
+        operations.append(UpdateOne(
+            {"_id": target["item_id"], "stock": {"$gte": target["quantity"]}},
+            {"$inc": {"stock": -target["quantity"]}, "$set": {"updated_at": now}, "$push": {field: pushed}}
+        ))
+    await db.inventory.bulk_write(operations, ordered=False)
+    
+    items_cursor = db.inventory.find({"_id": {"$in": [target["item_id"] for target in targets]}}, {field: 1})
+    items = {item["_id"]: item.get(field, []) for item in await items_cursor.to_list(length=None)}
+    statuses = []
+    for target in targets:
+        markers = items.get(target["item_id"])
+        if markers is None:
+            statuses.append("not_found")
+        elif any((entry.get("id") if hold is not None else entry) == marker for entry in markers):
+            statuses.append("taken")
+        else:
+            statuses.append("insufficient_stock")
+    
+    taken = [target for target, status in zip(targets, statuses) if status == "taken"]
+    if taken:
+        pending = [seller_inventory.invalidate(db, *{target["owner_email"] for target in taken}, items_changed=False)]
+        if hold is None:
+            # The checkout marker has been read, drop it
+            pending.append(db.inventory.update_many(
+                {"_id": {"$in": [target["item_id"] for target in taken]}}, {"$pull": {"checkouts": marker}}
+            ))
+        await asyncio.gather(*pending)
+    
+    return statuses
+
+
+def purchased_items(targets: List[dict], sellers: dict) -> List[dict]:
+    """Deducted line summaries for the targets whose stock was taken"""
+    return [{
+        "item_name": line["name"],
+        "shop_id": line["shop_id"],
+        "shop_name": sellers[line["shop_id"]].get("shop_name", "Unknown"),
+        "deducted": line["quantity"]
+    } for target in targets for line in target["lines"]]
+
+
 @router.post("/deduct-stock")
 async def deduct_stock(items: List[dict], db = Depends(get_database)):
     """
     Deduct stock from seller inventory when customer makes a purchase
     Items format: [{"shop_id": "SHP#####", "name": "...", "quantity": ...}]
+    
+    Every line reports its own status: deducted, insufficient_stock,
+    not_found, invalid (quantity is not a whole number of at least one) or
+    skipped.
     """
     try:
-        deducted_items = []
+        lines, sellers, targets = await resolve_purchase_lines(items, db)
+        statuses = await take_stock(db, targets)
         
-        for purchase_item in items:
-            shop_id = purchase_item.get("shop_id")
-            item_name = purchase_item.get("name")
-            quantity = purchase_item.get("quantity", 1)
-            
-            # Skip if no shop_id (CSV shop, not a real seller)
-            if not shop_id:
-                logger.info(f"Skipping stock deduction for CSV shop item: {item_name}")
-                continue
-            
-            # Find seller by shop_id
-            seller = await db.users.find_one({"shop_id": shop_id, "role": "seller"})
-            
-            if not seller:
-                logger.warning(f"No seller found for shop_id: {shop_id}")
-                continue
-            
-            seller_email = seller["email"]
-            
-            # Find the item in seller's inventory
-            inventory_item = await db.inventory.find_one({
-                "owner_email": seller_email,
-                "name": {"$regex": item_name, "$options": "i"}  # Case-insensitive match
-            })
-            
-            if inventory_item:
-                new_stock = max(0, inventory_item.get("stock", 0) - quantity)
-                
-                # Update stock in inventory
-                await db.inventory.update_one(
-                    {"_id": inventory_item["_id"]},
-                    {"$set": {"stock": new_stock, "updated_at": datetime.utcnow()}}
-                )
-                
-                deducted_items.append({
-                    "item_name": item_name,
-                    "shop_id": shop_id,
-                    "shop_name": seller.get("shop_name", "Unknown"),
-                    "old_stock": inventory_item.get("stock", 0),
-                    "new_stock": new_stock,
-                    "deducted": quantity
-                })
-                
-                logger.info(f"Deducted {quantity} of '{item_name}' from shop {shop_id}. Stock: {inventory_item.get('stock', 0)} → {new_stock}")
-            else:
-                logger.warning(f"Item '{item_name}' not found in shop {shop_id}'s inventory")
+        deducted = []
+        for target, status in zip(targets, statuses):
+            if status == "taken":
+                deducted.append(target)
+                status = "deducted"
+            for line in target["lines"]:
+                line["status"] = status
+        deducted_items = purchased_items(deducted, sellers)
+        
+        logger.info(f"Deducted {len(deducted_items)} of {len(lines)} lines in {len(targets)} conditional updates")
         
         return {
             "success": True,
+            "lines": lines,
             "deducted_items": deducted_items,
             "total_updated": len(deducted_items)
         }
@@ -165,6 +352,147 @@ async def deduct_stock(items: List[dict], db = Depends(get_database)):
         logger.error(f"Deduct Stock Error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to deduct stock: {str(e)}")
 
+@router.post("/reservations")
+async def create_reservation(items: List[dict], current_user: str = Depends(get_current_user), db = Depends(get_database)):
+    """
+    Hold seller stock for the duration of checkout
+    Items format: [{"shop_id": "SHP#####", "name": "...", "quantity": ...}]
+    
+    Held units leave the available stock right away, with the same
+    conditional decrement as deduct-stock, and come back unless the
+    reservation is confirmed within RESERVATION_HOLD_SECONDS. Every line
+    reports held, insufficient_stock, not_found, invalid or skipped.
+    """
+    try:
+        from bson import ObjectId
+        
+        lines, sellers, targets = await resolve_purchase_lines(items, db)
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=RESERVATION_HOLD_SECONDS)
+        reservation_id = ObjectId()
+        
+        # Written before any stock is taken; should the holds below outlive a
+        # crash, the sweeper still finds them through the items themselves
+        await db.reservations.insert_one({
+            "_id": reservation_id,
+            "user_email": current_user,
+            "status": "held",
+            "holds": [],
+            "created_at": now,
+            "expires_at": expires_at
+        })
+        
+        statuses = await take_stock(db, targets, {"id": reservation_id, "expires_at": expires_at})
+        
+        held = [target for target, status in zip(targets, statuses) if status == "taken"]
+        for target, status in zip(targets, statuses):
+            for line in target["lines"]:
+                line["status"] = "held" if status == "taken" else status
+        
+        await db.reservations.update_one({"_id": reservation_id}, {"$set": {
+            "holds": [{
+                "item_id": target["item_id"],
+                "owner_email": target["owner_email"],
+                "quantity": target["quantity"],
+                "lines": [{
+                    "name": line["name"],
+                    "shop_id": line["shop_id"],
+                    "shop_name": sellers[line["shop_id"]].get("shop_name", "Unknown"),
+                    "quantity": line["quantity"]
+                } for line in target["lines"]]
+            } for target in held],
+            # Nothing to confirm when no stock could be held
+            "status": "held" if held else "released"
+        }})
+        
+        logger.info(f"Reservation {reservation_id}: held {len(held)} of {len(targets)} items until {expires_at.isoformat()}")
+        
+        return {
+            "success": True,
+            "reservation_id": str(reservation_id),
+            "status": "held" if held else "released",
+            "expires_at": expires_at.isoformat(),
+            "lines": lines,
+            "total_held": sum(len(target["lines"]) for target in held)
+        }
+        
+    except Exception as e:
+        logger.error(f"Create Reservation Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to reserve stock: {str(e)}")
+
+async def finish_reservation(reservation_id: str, current_user: str, db, status: str, condition: dict) -> dict:
+    """
+    Move a held reservation to its final status, once
+    
+    Returns:
+        The reservation as it was while held
+    """
+    from bson import ObjectId
+    
+    if not ObjectId.is_valid(reservation_id):
+        raise HTTPException(status_code=404, detail="Reservation not found")
+    
+    query = {"_id": ObjectId(reservation_id), "user_email": current_user}
+    reservation = await db.reservations.find_one_and_update(
+        {**query, "status": "held", **condition},
+        {"$set": {"status": status, f"{status}_at": datetime.utcnow()}}
+    )
+    if reservation is None:
+        existing = await db.reservations.find_one(query, {"status": 1})
+        if existing is None:
+            raise HTTPException(status_code=404, detail="Reservation not found")
+        current = existing["status"] if existing["status"] != "held" else "expired"
+        raise HTTPException(status_code=409, detail=f"Reservation is {current}")
+    return reservation
+
+@router.post("/reservations/{reservation_id}/confirm")
+async def confirm_reservation(reservation_id: str, current_user: str = Depends(get_current_user), db = Depends(get_database)):
+    """
+    Turn a reservation's holds into the purchase deduction
+    
+    The held units are already out of stock, so confirming only drops the
+    holds. Fails with 409 once the reservation expired or was released.
+    """
+    try:
+        reservation = await finish_reservation(
+            reservation_id, current_user, db, "confirmed", {"expires_at": {"$gt": datetime.utcnow()}}
+        )
+        await release_holds(db, reservation["_id"], reservation["holds"], restock=False)
+        
+        deducted_items = [{
+            "item_name": line["name"],
+            "shop_id": line["shop_id"],
+            "shop_name": line["shop_name"],
+            "deducted": line["quantity"]
+        } for hold in reservation["holds"] for line in hold["lines"]]
+        
+        return {
+            "success": True,
+            "reservation_id": reservation_id,
+            "deducted_items": deducted_items,
+            "total_updated": len(deducted_items)
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Confirm Reservation Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to confirm reservation: {str(e)}")
+
+@router.delete("/reservations/{reservation_id}")
+async def release_reservation(reservation_id: str, current_user: str = Depends(get_current_user), db = Depends(get_database)):
+    """Give a reservation's held stock back before it expires"""
+    try:
+        reservation = await finish_reservation(reservation_id, current_user, db, "released", {})
+        released = await release_holds(db, reservation["_id"], reservation["holds"])
+        return {"success": True, "reservation_id": reservation_id, "total_released": released}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Release Reservation Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to release reservation: {str(e)}")
+
 @router.put("/{item_id}")
 async def update_inventory_item(item_id: str, item: dict, current_user: str = Depends(get_current_user), db = Depends(get_database)):
     try:
@@ -175,6 +503,11 @@ async def update_inventory_item(item_id: str, item: dict, current_user: str = De
         # Remove id from update data if present
         item.pop("id", None)
         item.pop("_id", None)
+        if "expiry_date" in item:
+            item["expiry_date"] = normalize_expiry_date(item["expiry_date"])
+        item.pop("name_key", None)
+        if "name" in item:
+            item["name_key"] = name_key(item["name"])
         
         result = await db.inventory.update_one(
             {"_id": ObjectId(item_id), "owner_email": current_user},
@@ -183,10 +516,13 @@ async def update_inventory_item(item_id: str, item: dict, current_user: str = De
         
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Item not found")
+        await seller_inventory.invalidate(db, current_user, items_changed="name" in item)
         
         logger.info(f"Updated inventory item {item_id} for user {current_user}")
         return {"success": True}
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Update Inventory Error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to update item: {str(e)}")
@@ -200,6 +536,7 @@ async def delete_inventory_item(item_id: str, current_user: str = Depends(get_cu
         
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Item not found")
+        await seller_inventory.invalidate(db, current_user)
         
         logger.info(f"Deleted inventory item {item_id} for user {current_user}")
         return {"success": True}
@@ -209,49 +546,106 @@ async def delete_inventory_item(item_id: str, current_user: str = Depends(get_cu
         raise HTTPException(status_code=500, detail=f"Failed to delete item: {str(e)}")
 
 @router.post("/upload")
-async def upload_inventory(file: UploadFile = File(...), current_user: str = Depends(get_current_user)):
-    # Handle bulk upload (CSV, Excel, etc.)
-    return {"success": True, "message": "File uploaded successfully"}
+async def upload_inventory(file: UploadFile = File(...), current_user: str = Depends(get_current_user), db = Depends(get_database)):
+    """
+    Bulk import inventory from a CSV or XLSX sheet
+    
+    The header row names the columns: name is required, sku, category,
+    price, stock, unit and expiry_date are optional. Rows are upserted by
+    SKU (or by name when there is none). Existing items only change in the
+    columns the sheet has; new items get defaults for the others and an
+    expiry date calculated from the category. The import runs in the background; poll
+    GET /upload/{job_id} for its progress and row errors.
+    """
+    filename = file.filename or ""
+    if not filename.lower().endswith(IMPORT_FORMATS):
+        raise HTTPException(status_code=400, detail=f"Unsupported file type, upload one of: {', '.join(IMPORT_FORMATS)}")
+    
+    try:
+        from bson import ObjectId
+        
+        # The request closes its spooled copy when it ends, hand the bytes to the job
+        loop = asyncio.get_running_loop()
+        suffix = os.path.splitext(filename)[1].lower()
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as upload_copy:
+            await loop.run_in_executor(None, shutil.copyfileobj, file.file, upload_copy)
+        
+        job_id = ObjectId()
+        now = datetime.utcnow()
+        await db.import_jobs.insert_one({
+            "_id": job_id,
+            "owner_email": current_user,
+            "filename": filename,
+            "status": "queued",
+            "rows_read": 0,
+            "inserted": 0,
+            "updated": 0,
+            "error_count": 0,
+            "errors": [],
+            "created_at": now,
+            "updated_at": now
+        })
+        start_import(db, job_id, current_user, upload_copy.name, filename)
+        
+        logger.info(f"Inventory import {job_id} queued for {current_user}: {filename}")
+        
+        return {"success": True, "job_id": str(job_id), "status": "queued"}
+        
+    except Exception as e:
+        logger.error(f"Upload Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to start inventory import: {str(e)}")
+
+@router.get("/upload/{job_id}")
+async def get_upload_job(job_id: str, current_user: str = Depends(get_current_user), db = Depends(get_database)):
+    """Progress and row errors of an inventory import"""
+    from bson import ObjectId
+    
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=404, detail="Import job not found")
+    
+    job = await db.import_jobs.find_one({"_id": ObjectId(job_id), "owner_email": current_user})
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    
+    job["job_id"] = str(job.pop("_id"))
+    for field in ("created_at", "updated_at", "started_at", "finished_at"):
+        if job.get(field) is not None:
+            job[field] = job[field].isoformat()
+    return job
 
 @router.get("/expiring")
 async def get_expiring_items(current_user: str = Depends(get_current_user), db = Depends(get_database)):
     """
     Get items that are expiring soon (within 7 days) or already expired
+    
+    One range scan of the (owner_email, expiry_date) index, already in
+    expiry order, so only the matching items are read.
     """
     try:
-        items_cursor = db.inventory.find({"owner_email": current_user})
-        items = await items_cursor.to_list(length=None)
-        
         current_time = datetime.utcnow()
-        expiring_items = []
-        
-        for item in items:
-            expiry_date = item.get("expiry_date")
-            if not expiry_date:
-                continue
-                
-            if isinstance(expiry_date, str):
-                expiry_date = datetime.fromisoformat(expiry_date.replace('Z', '+00:00'))
-            
-            days_until_expiry = (expiry_date - current_time).days
-            
-            # Include items expiring within 7 days or already expired
-            if days_until_expiry <= 7:
-                expiry_status = "expired" if days_until_expiry < 0 else ("critical" if days_until_expiry <= 3 else "warning")
-                
-                expiring_items.append({
-                    "id": str(item["_id"]),
-                    "name": item.get("name", ""),
-                    "category": item.get("category", ""),
-                    "stock": item.get("stock", 0),
-                    "unit": item.get("unit", ""),
-                    "expiry_date": expiry_date.isoformat(),
-                    "days_until_expiry": days_until_expiry,
-                    "expiry_status": expiry_status
-                })
-        
-        # Sort by days until expiry (most urgent first)
-        expiring_items.sort(key=lambda x: x["days_until_expiry"])
+        # days_until_expiry <= 7 counts whole days, i.e. less than 8 days away
+        horizon = current_time + timedelta(days=EXPIRY_WARNING_DAYS + 1)
+        
+        items_cursor = db.inventory.aggregate([
+            {"$match": {"owner_email": current_user, "expiry_date": {"$type": "date", "$lt": horizon}}},
+            # Most urgent first
+            {"$sort": {"expiry_date": 1}},
+            *expiry_stages(current_time),
+            {"$project": {
+                "_id": 0,
+                "id": {"$toString": "$_id"},
+                "name": {"$ifNull": ["$name", ""]},
+                "category": {"$ifNull": ["$category", ""]},
+                "stock": {"$ifNull": ["$stock", 0]},
+                "unit": {"$ifNull": ["$unit", ""]},
+                "expiry_date": 1,
+                "days_until_expiry": 1,
+                "expiry_status": 1
+            }}
+        ])
+        expiring_items = await items_cursor.to_list(length=None)
+        for item in expiring_items:
+            item["expiry_date"] = item["expiry_date"].isoformat()
         
         logger.info(f"Found {len(expiring_items)} expiring items for user {current_user}")
         
@@ -1,201 +1,500 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from app.database import get_database
 from app.utils.auth import get_current_user
-from app.schemas import ShopMatchRequest
+from app.schemas import ShopMatchRequest, ShopMatchBatchRequest
+from app.utils.catalog_registry import get_catalog
+from app.utils.geo_index import EARTH_RADIUS_KM, format_distance, geo_point, parse_location
+from app.utils.shop_matching import match_basket, normalize_basket
+from app.utils.match_cache import match_cache
+from app.utils.match_pool import publish_catalog, publish_sellers, release, submit_match
+from app.utils.seller_inventory import seller_inventory
+from app.utils.shop_details import INVENTORY_SORTS
 from typing import List, Optional
 import math
-import csv
-import os
+import numpy as np
+import asyncio
+import base64
+import json
+import logging
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-# Load Delhi NCR stores data
-def load_delhi_stores():
-    """Load stores from Delhi NCR CSV file"""
-    stores = []
-    csv_path = os.path.join(os.path.dirname(__file__), "../../../../delhi_ncr_stores_data.csv")
+# Location values naming the whole catalog region rather than one locality
+CATALOG_REGIONS = {"delhi", "delhi ncr", "new delhi"}
+
+def set_catalog_etag(response: Response, bundle) -> None:
+    """Tag a catalog-derived response with the catalog version"""
+    response.headers["ETag"] = bundle.etag
+    response.headers["X-Catalog-Version"] = bundle.version
+
+def locate_stores(bundle, lat: Optional[float], lon: Optional[float], radius_km: Optional[float]):
+    """
+    Resolve the stores a location query covers
     
+    Returns:
+        (store indices nearest first, distances in km), or None without a location
+    """
+    if lat is None or lon is None:
+        if radius_km is not None:
+            raise HTTPException(status_code=400, detail="radius_km requires lat and lon")
+        return None
+    if radius_km is not None:
+        return bundle.geo_index.within(lat, lon, radius_km)
+    distances = bundle.geo_index.distances(lat, lon)
+    order = np.argsort(distances, kind="stable")
+    return order, distances[order]
+
+def encode_cursor(store_id: str) -> str:
+    """Opaque page cursor naming the last store returned"""
+    return base64.urlsafe_b64encode(store_id.encode("utf-8")).decode("ascii").rstrip("=")
+
+def cursor_position(catalog, shops: np.ndarray, cursor: str) -> int:
+    """Position in shops right after the store a cursor names"""
     try:
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            stores_dict = {}
-            
-            for row in reader:
-                store_id = row['Store_ID']
-                if store_id not in stores_dict:
-                    stores_dict[store_id] = {
-                        "id": store_id,
-                        "name": row['Store_Name'],
-                        "category": row['Store_Type'],
-                        "location": row['Location'],
-                        "owner": row['Owner_Name'],
-                        "contact": row['Contact_Number'],
-                        "address": row['Address'],
-                        "distance": 0.0,
-                        "rating": 4.0 + (hash(store_id) % 10) / 10,
-                        "isOpen": True,
-                        "inventory": {}
-                    }
-                
-                # Add item to inventory
-                item_name = row['Item_Name']
-                price = float(row['Price'])
-                stores_dict[store_id]["inventory"][item_name] = {
-                    "name": item_name,
-                    "price": price,
-                    "stock": 10 + (hash(item_name) % 50)
-                }
-            
-            stores = list(stores_dict.values())
-            print(f"✅ Loaded {len(stores)} stores from Delhi NCR CSV")
-    except FileNotFoundError:
-        print(f"⚠️ Warning: Delhi NCR stores CSV not found at {csv_path}")
-    except Exception as e:
-        print(f"❌ Error loading Delhi NCR stores: {e}")
-    
-    return stores
+        store_id = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    store_idx = catalog.store_index(store_id)
+    positions = np.flatnonzero(shops == store_idx) if store_idx is not None else []
+    if len(positions) == 0:
+        raise HTTPException(status_code=400, detail="Cursor no longer matches the shop list, start from the first page")
+    return int(positions[0]) + 1
 
-# Cache stores data
-DELHI_STORES = load_delhi_stores()
+@router.get("/catalog/version")
+async def get_catalog_version(response: Response):
+    """Report the catalog version currently served by this worker"""
+    bundle = get_catalog()
+    set_catalog_etag(response, bundle)
+    return {
+        "version": bundle.version,
+        "stores": len(bundle.catalog),
+        "items": bundle.catalog.row_count,
+        "loaded_at": bundle.loaded_at.isoformat(),
+        "partitions": bundle.partitions.stats()
+    }
 
 @router.get("")
-async def get_all_shops(category: str = None, location: str = None, db = Depends(get_database)):
-    """Get all shops from Delhi NCR stores data"""
-    shops = DELHI_STORES.copy()
+async def get_all_shops(
+    response: Response,
+    category: str = None,
+    location: str = None,
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0, le=100),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db = Depends(get_database)
+):
+    """
+    Get one page of shops from Delhi NCR stores data
+    
+    Shops come in catalog order, or nearest first when lat/lon are given.
+    Pass next_cursor from the previous page to continue.
+    """
+    bundle = get_catalog()
+    set_catalog_etag(response, bundle)
+    catalog, filters = bundle.catalog, bundle.filters
     
-    # Filter by category
-    if category:
-        shops = [s for s in shops if s["category"].lower() == category.lower()]
+    # Filter by location (city-level values cover all Delhi NCR stores)
+    if location and location.lower() in CATALOG_REGIONS:
+        location = None
+    shops = filters.select(category, location)
     
-    # Filter by location (Delhi shows all Delhi NCR stores)
-    # For other cities, would filter differently, but for now all data is Delhi NCR
+    distances = None
+    nearby = locate_stores(bundle, lat, lon, radius_km)
+    if nearby is not None:
+        keep = np.isin(nearby[0], shops)
+        shops, distances = nearby[0][keep], nearby[1][keep]
+    
+    # Resume after the last shop of the previous page
+    start = 0
+    if cursor:
+        start = cursor_position(catalog, shops, cursor)
+    page = range(start, min(start + limit, len(shops)))
     
     # Return simplified data for listing
-    simplified_shops = [{
-        "id": s["id"],
-        "name": s["name"],
-        "category": s["category"],
-        "location": s["location"],
-        "distance": s["distance"],
-        "rating": s["rating"],
-        "isOpen": s["isOpen"],
-        "itemCount": len(s["inventory"])
-    } for s in shops]
-    
-    return {"shops": simplified_shops, "total": len(simplified_shops)}
-
-@router.get("/{shop_id}")
-async def get_shop_by_id(shop_id: str, db = Depends(get_database)):
-    """Get shop details by ID from Delhi NCR stores data"""
-    # Find shop
-    shop_data = next((s for s in DELHI_STORES if s["id"] == shop_id), None)
+    simplified_shops = []
+    for position in page:
+        idx = int(shops[position])
+        s = catalog.store(idx)
+        simplified_shops.append({
+            "id": s["id"],
+            "name": s["name"],
+            "category": s["category"],
+            "location": s["location"],
+            "distance": format_distance(distances[position]) if distances is not None else s["distance"],
+            "rating": s["rating"],
+            "isOpen": s["isOpen"],
+            "itemCount": catalog.item_count(idx)
+        })
     
-    if not shop_data:
-        raise HTTPException(status_code=404, detail="Shop not found")
+    next_cursor = None
+    if page.stop < len(shops):
+        next_cursor = encode_cursor(simplified_shops[-1]["id"])
     
-    # Format shop details
-    shop = {
-        "name": shop_data["name"],
-        "category": shop_data["category"],
-        "rating": shop_data["rating"],
-        "reviews": 50 + (hash(shop_id) % 200),
-        "distance": shop_data["distance"],
-        "location": shop_data["location"],
-        "address": shop_data["address"],
-        "phone": shop_data["contact"],
-        "owner": shop_data["owner"],
-        "hours": "Mon-Sun: 8:00 AM - 10:00 PM",
-        "isOpen": shop_data["isOpen"],
+    return {
+        "shops": simplified_shops,
+        "total": len(shops),
+        "facets": filters.facets(category, location),
+        "limit": limit,
+        "next_cursor": next_cursor
     }
+
+@router.get("/nearby")
+async def get_nearby_shops(
+    response: Response,
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(5.0, gt=0, le=100),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+    db = Depends(get_database)
+):
+    """Get catalog stores and registered seller shops near a point, nearest first"""
+    bundle = get_catalog()
+    set_catalog_etag(response, bundle)
+    catalog = bundle.catalog
+    
+    # Enough of each source to fill the requested page of the merged list
+    window = offset + limit
+    
+    stores, distances = bundle.geo_index.within(lat, lon, radius_km)
+    shops = []
+    for idx, km in zip(stores[:window].tolist(), distances[:window].tolist()):
+        s = catalog.store(idx)
+        shops.append({
+            "id": s["id"],
+            "name": s["name"],
+            "category": s["category"],
+            "location": s["location"],
+            "distance": format_distance(km),
+            "rating": s["rating"],
+            "isOpen": s["isOpen"],
+            "source": "catalog"
+        })
+    total = len(stores)
+    
+    if db is not None:
+        try:
+            # $geoNear walks the 2dsphere index outward, so only the page is read
+            sellers = await db.users.aggregate([
+                {"$geoNear": {
+                    "near": geo_point(lat, lon),
+                    "distanceField": "distance",
+                    "maxDistance": radius_km * 1000,
+                    "spherical": True,
+                    "query": {"role": "seller"}
+                }},
+                {"$limit": window},
+                {"$project": {"shop_id": 1, "shop_name": 1, "business_category": 1,
+                              "business_address": 1, "distance": 1}}
+            ]).to_list(length=window)
+            total += await db.users.count_documents({
+                "role": "seller",
+                "location": {"$geoWithin": {"$centerSphere": [[lon, lat], radius_km / EARTH_RADIUS_KM]}}
+            })
+        except Exception as e:
+            logger.error(f"Nearby seller lookup failed: {str(e)}")
+            sellers = []
+        
+        for seller in sellers:
+            shops.append({
+                "id": seller.get("shop_id"),
+                "name": seller.get("shop_name", "Unnamed Shop"),
+                "category": seller.get("business_category", "General Store"),
+                "location": seller.get("business_address", ""),
+                "distance": format_distance(seller["distance"] / 1000),
+                "rating": 4.5,
+                "isOpen": True,
+                "source": "seller"
+            })
     
-    # Get inventory from CSV data
-    inventory = [{
-        "id": idx,
-        "name": item_data["name"],
-        "price": item_data["price"],
-        "stock": item_data["stock"],
-        "category": "Grocery"
-    } for idx, item_data in enumerate(shop_data["inventory"].values())]
+    shops.sort(key=lambda shop: shop["distance"])
     
-    return {"shop": shop, "inventory": inventory}
+    return {"shops": shops[offset:window], "total": total, "offset": offset, "limit": limit}
 
 @router.get("/search")
-async def search_shops(q: str, db = Depends(get_database)):
-    """Search shops from Delhi NCR stores data"""
-    # Filter by query
-    filtered = [
-        {
+async def search_shops(
+    q: str,
+    response: Response,
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0, le=100),
+    limit: int = Query(20, ge=1, le=100),
+    db = Depends(get_database)
+):
+    """Search shops from Delhi NCR stores data, best match first"""
+    bundle = get_catalog()
+    set_catalog_etag(response, bundle)
+    catalog = bundle.catalog
+    
+    if radius_km is not None and (lat is None or lon is None):
+        raise HTTPException(status_code=400, detail="radius_km requires lat and lon")
+    
+    # Ranked by match quality; only the stores holding the query's trigrams are looked at
+    hits = bundle.search_index.search(q)
+    
+    distances = None
+    if lat is not None and lon is not None and hits:
+        stores = np.array([idx for idx, _ in hits], dtype=np.int32)
+        distances = bundle.geo_index.distances(lat, lon, stores)
+        if radius_km is not None:
+            keep = np.flatnonzero(distances <= radius_km)
+            hits = [hits[position] for position in keep]
+            distances = distances[keep]
+        # Nearer stores first among equally good matches
+        order = sorted(range(len(hits)), key=lambda position: (
+            -hits[position][1], distances[position] if np.isfinite(distances[position]) else math.inf
+        ))
+        hits, distances = [hits[position] for position in order], distances[order]
+    
+    filtered = []
+    for position, (idx, score) in enumerate(hits[:limit]):
+        s = catalog.store(idx)
+        filtered.append({
             "id": s["id"],
             "name": s["name"],
             "category": s["category"],
             "location": s["location"],
-            "distance": s["distance"],
-            "rating": s["rating"]
-        }
-        for s in DELHI_STORES
-        if q.lower() in s["name"].lower() or 
-           q.lower() in s["category"].lower() or 
-           q.lower() in s["location"].lower()
-    ]
-    
-    return {"shops": filtered}
+            "distance": format_distance(distances[position]) if distances is not None else s["distance"],
+            "rating": s["rating"],
+            "isOpen": s["isOpen"],
+            "score": round(score, 2)
+        })
+    
+    return {"shops": filtered, "total": len(hits)}
 
-@router.post("/match")
-async def match_grocery_list(request: ShopMatchRequest, db = Depends(get_database)):
-    """Match grocery list with Delhi NCR stores and find best options"""
-    requested_items = [item.lower().strip() for item in request.items]
-    matches = []
-    
-    for store in DELHI_STORES:
-        matched_items = []
-        missing_items = []
-        total_price = 0.0
-        
-        # Check each requested item
-        for req_item in requested_items:
-            found = False
-            # Check if item exists in store inventory (fuzzy match)
-            for inv_item_name, inv_item_data in store["inventory"].items():
-                if req_item in inv_item_name.lower() or inv_item_name.lower() in req_item:
-                    matched_items.append(inv_item_name)
-                    total_price += inv_item_data["price"]
-                    found = True
-                    break
-            
-            if not found:
-                missing_items.append(req_item)
-        
-        # Calculate availability percentage
-        availability = (len(matched_items) / len(requested_items) * 100) if requested_items else 0
-        
-        # Only include stores that have at least some items
-        if matched_items:
-            matches.append({
-                "id": store["id"],
-                "name": store["name"],
-                "location": store["location"],
-                "totalPrice": round(total_price, 2),
-                "distance": store["distance"],
-                "availability": round(availability, 1),
-                "rating": store["rating"],
-                "matchedItems": matched_items,
-                "missingItems": missing_items
+@router.get("/items/autocomplete")
+async def autocomplete_items(
+    response: Response,
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """Suggest catalog product names for a grocery-list entry, most widely stocked first"""
+    bundle = get_catalog()
+    set_catalog_etag(response, bundle)
+    index = bundle.shop_index
+    
+    suggestions = [{
+        "name": index.item_names[item_id],
+        "stores": int(index.item_store_counts[item_id])
+    } for item_id in index.suggest(prefix, limit)]
+    
+    return {"suggestions": suggestions}
+
+@router.get("/items/prices")
+async def compare_item_prices(
+    response: Response,
+    item: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(5, ge=1, le=50),
+    max_price: Optional[float] = Query(None, ge=0)
+):
+    """Compare a product's price across stores: cheapest offers plus min/median/p90"""
+    bundle = get_catalog()
+    set_catalog_etag(response, bundle)
+    catalog, prices = bundle.catalog, bundle.price_index
+    
+    products = []
+    for item_id in prices.find_items(item):
+        stores, offer_prices = prices.cheapest(item_id, limit, max_price)
+        offers = []
+        for idx, price in zip(stores.tolist(), offer_prices.tolist()):
+            s = catalog.store(idx)
+            offers.append({
+                "id": s["id"],
+                "name": s["name"],
+                "location": s["location"],
+                "rating": s["rating"],
+                "price": round(price, 2)
             })
+        products.append({
+            "name": bundle.shop_index.item_names[item_id],
+            "stats": prices.stats[item_id],
+            "offers": offers
+        })
+    
+    if not products:
+        raise HTTPException(status_code=404, detail="Product not found")
+    
+    return {"products": products}
+
+@router.get("/{shop_id}")
+async def get_shop_by_id(
+    shop_id: str,
+    sort: Optional[str] = None,
+    order: str = "asc",
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    db = Depends(get_database)
+):
+    """
+    Get shop details by ID from Delhi NCR stores data
     
-    # Sort by weighted score: availability (40%), price (30%), rating (20%), distance (10%)
-    def calculate_score(match):
-        availability_score = match["availability"] * 0.4
-        price_score = (100 / (match["totalPrice"] + 1)) * 30
-        rating_score = (match["rating"] / 5.0) * 20
-        distance_score = (100 / (match["distance"] + 1)) * 10
-        return availability_score + price_score + rating_score + distance_score
+    The inventory can be paged with offset/limit and sorted by price or
+    name. Payloads are serialized once per catalog version, so a request
+    is a dict lookup and a write of ready-made bytes.
+    """
+    if sort is not None and sort not in INVENTORY_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(INVENTORY_SORTS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be asc or desc")
     
-    matches.sort(key=calculate_score, reverse=True)
+    bundle = get_catalog()
+    store_idx = bundle.catalog.store_index(shop_id)
     
-    # Limit to top 10 matches
-    matches = matches[:10]
+    if store_idx is None:
+        raise HTTPException(status_code=404, detail="Shop not found")
+    
+    body = bundle.shop_details.payload(store_idx, sort, order == "desc", offset, limit)
+    response = Response(content=body, media_type="application/json")
+    set_catalog_etag(response, bundle)
+    return response
+
+def match_arguments(request: ShopMatchRequest) -> dict:
+    """Normalize a match request into match_basket keyword arguments"""
+    user_location = parse_location(request.user_location)
+    if request.radius_km is not None and user_location is None:
+        raise HTTPException(status_code=400, detail="radius_km requires user_location with lat and lng")
     
-    return {"matches": matches, "totalShops": len(matches)}
+    return {
+        "requested_items": normalize_basket(request.items),
+        "user_location": user_location,
+        "radius_km": request.radius_km,
+        "weights": request.weights.model_dump() if request.weights else None,
+        "limit": request.limit,
+        "max_stores": request.max_stores,
+        "store_penalty": request.store_penalty
+    }
+
+def match_version(bundle, sellers) -> str:
+    """Version match results are cached under: the catalog's plus the seller listing's"""
+    return bundle.version if sellers is None else f"{bundle.version}+sellers.{sellers.listing}"
+
+def cached_match(version: str, key: tuple, sellers) -> Optional[dict]:
+    """Cached match result, unless stock or prices of a seller it matched moved since"""
+    cached = match_cache.get(version, key)
+    if cached is None:
+        return None
+    result, stamp = cached
+    if sellers is not None and not sellers.is_current(stamp):
+        return None
+    return result
+
+def match_cache_key(arguments: dict) -> tuple:
+    return tuple(
+        tuple(sorted(value.items())) if isinstance(value, dict) else value
+        for value in arguments.values()
+    )
+
+@router.post("/match")
+async def match_grocery_list(request: ShopMatchRequest, response: Response, db = Depends(get_database)):
+    """
+    Match grocery list with Delhi NCR stores and find best options
+    
+    Items are matched in canonical (sorted, lowercase) order, so the same
+    basket in any order is answered from the match cache.
+    """
+    # Pin one catalog version for the whole request
+    bundle = get_catalog()
+    set_catalog_etag(response, bundle)
+    
+    arguments = match_arguments(request)
+    if not arguments["requested_items"]:
+        return {"matches": [], "totalShops": 0}
+    
+    # Registered sellers come from the cached inventory snapshot, not per-request queries
+    sellers = await seller_inventory.get(db, bundle)
+    version = match_version(bundle, sellers)
+    
+    key = match_cache_key(arguments)
+    result = cached_match(version, key, sellers)
+    if result is None:
+        result, stamp = match_basket(bundle, sellers=sellers, **arguments)
+        match_cache.put(version, key, (result, stamp))
+    
+    return result
+
+@router.post("/match/batch")
+async def match_grocery_lists(request: ShopMatchBatchRequest, db = Depends(get_database)):
+    """
+    Match many grocery lists at once, streamed back as NDJSON
+    
+    Baskets are spread over the match process pool and each line is sent
+    as soon as its basket completes, so lines arrive out of order: every
+    line carries the basket's index in the request and either its result
+    or an error.
+    """
+    bundle = get_catalog()
+    version = bundle.version
+    sellers = await seller_inventory.get(db, bundle)
+    cache_version = match_version(bundle, sellers)
+    
+    def line(payload: dict) -> bytes:
+        return (json.dumps(payload) + "\n").encode("utf-8")
+    
+    async def stream():
+        loop = asyncio.get_running_loop()
+        pending = {}
+        catalog_file = None
+        published = None
+        try:
+            for position, basket in enumerate(request.baskets):
+                try:
+                    arguments = match_arguments(basket)
+                except HTTPException as e:
+                    yield line({"index": position, "error": e.detail})
+                    continue
+                if not arguments["requested_items"]:
+                    yield line({"index": position, "version": version, "result": {"matches": [], "totalShops": 0}})
+                    continue
+                
+                key = match_cache_key(arguments)
+                cached = cached_match(cache_version, key, sellers)
+                if cached is not None:
+                    yield line({"index": position, "version": version, "result": cached})
+                    continue
+                
+                if catalog_file is None:
+                    # Workers map this version's snapshot instead of loading the catalog themselves
+                    catalog_file = await loop.run_in_executor(None, publish_catalog, bundle)
+                if sellers is not None and published is None:
+                    # Workers load each seller generation once, not once per basket
+                    published = await loop.run_in_executor(None, publish_sellers, sellers)
+                future = asyncio.wrap_future(submit_match(catalog_file, arguments, published))
+                pending[future] = (position, key)
+            
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    position, key = pending.pop(future)
+                    try:
+                        used_version, result, stamp = future.result()
+                    except Exception as e:
+                        logger.error(f"Batch match failed for basket {position}: {str(e)}")
+                        yield line({"index": position, "error": f"Match failed: {str(e)}"})
+                        continue
+                    if used_version == version:
+                        match_cache.put(cache_version, key, (result, stamp))
+                    yield line({"index": position, "version": used_version, "result": result})
+        finally:
+            # Client went away: drop the baskets no worker has started
+            for future in pending:
+                future.cancel()
+            # Baskets still running hold their own references to the files
+            release(catalog_file, published)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        headers={"ETag": bundle.etag, "X-Catalog-Version": version}
+    )
+
+@router.get("/match/cache")
+async def get_match_cache_stats():
+    """Report hit, miss and eviction counters of this worker's match cache"""
+    return match_cache.stats()
 
 @router.get("/search/by-id/{shop_id}")
 async def search_shop_by_id(shop_id: str, db = Depends(get_database)):
@@ -239,28 +538,22 @@ async def search_shop_by_id(shop_id: str, db = Depends(get_database)):
     return {"shop": shop_info}
 
 @router.get("/filters/locations")
-async def get_locations(db = Depends(get_database)):
+async def get_locations(response: Response):
     """Get all unique locations for filtering"""
-    locations = await db.shops.distinct("location")
-    return {"locations": sorted(locations)}
+    bundle = get_catalog()
+    set_catalog_etag(response, bundle)
+    return {"locations": bundle.filters.locations}
 
 @router.get("/filters/categories")
-async def get_categories(db = Depends(get_database)):
+async def get_categories(response: Response):
     """Get all unique store types/categories for filtering"""
-    categories = await db.shops.distinct("store_type")
-    return {"categories": sorted(categories)}
+    bundle = get_catalog()
+    set_catalog_etag(response, bundle)
+    return {"categories": bundle.filters.categories}
 
 @router.get("/stats/overview")
-async def get_stats(db = Depends(get_database)):
-    """Get overall statistics"""
-    total_shops = await db.shops.count_documents({})
-    total_items = await db.inventory_items.count_documents({})
-    locations = await db.shops.distinct("location")
-    categories = await db.shops.distinct("store_type")
-    
-    return {
-        "total_shops": total_shops,
-        "total_items": total_items,
-        "total_locations": len(locations),
-        "total_categories": len(categories)
-    }
+async def get_stats(response: Response):
+    """Get overall statistics, computed once per catalog version"""
+    bundle = get_catalog()
+    set_catalog_etag(response, bundle)
+    return bundle.stats
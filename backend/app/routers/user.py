@@ -2,8 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException
 from app.database import get_database
 from app.utils.auth import get_current_user
 from datetime import datetime, timedelta
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
+from app.utils.geo_index import geo_point
+from app.utils.seller_inventory import seller_inventory
 
 router = APIRouter()
 
@@ -14,6 +16,8 @@ class ProfileUpdate(BaseModel):
     shop_name: Optional[str] = None
     business_category: Optional[str] = None
     business_address: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
 
 @router.get("/profile")
 async def get_profile(current_user: str = Depends(get_current_user), db = Depends(get_database)):
@@ -44,6 +48,11 @@ async def update_profile(profile_data: ProfileUpdate, current_user: str = Depend
         update_data["business_category"] = profile_data.business_category
     if profile_data.business_address is not None:
         update_data["business_address"] = profile_data.business_address
+    if (profile_data.latitude is None) != (profile_data.longitude is None):
+        raise HTTPException(status_code=400, detail="latitude and longitude must be set together")
+    if profile_data.latitude is not None:
+        # Stored as GeoJSON so nearby-seller queries can use the 2dsphere index
+        update_data["location"] = geo_point(profile_data.latitude, profile_data.longitude)
     
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
@@ -57,6 +66,8 @@ async def update_profile(profile_data: ProfileUpdate, current_user: str = Depend
     
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="User not found or no changes made")
+    # Shop name, address and location show up in grocery-list matches
+    await seller_inventory.invalidate(db, current_user)
     
     # Return updated user
     user = await db.users.find_one({"email": current_user})
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Optional, List, Union
 from datetime import datetime
 from bson import ObjectId
 
@@ -86,11 +86,25 @@ class InventoryItemResponse(InventoryItemBase):
 
 class GroceryListItem(BaseModel):
     name: str
-    quantity: Optional[int] = 1
+    quantity: Optional[int] = Field(1, ge=1, le=1000)
+
+class ScoringWeights(BaseModel):
+    availability: float = Field(40.0, ge=0)
+    price: float = Field(30.0, ge=0)
+    rating: float = Field(20.0, ge=0)
+    distance: float = Field(10.0, ge=0)
 
 class ShopMatchRequest(BaseModel):
-    items: List[str]
-    user_location: Optional[dict] = None
+    items: List[Union[str, GroceryListItem]]  # plain names mean a quantity of one
+    user_location: Optional[dict] = None  # {"lat": ..., "lng": ...}
+    radius_km: Optional[float] = Field(None, gt=0, le=100)  # only match stores this close to user_location
+    weights: Optional[ScoringWeights] = None
+    limit: int = Field(10, ge=1, le=100)
+    max_stores: Optional[int] = Field(None, ge=1, le=3)  # split the basket across up to N stores
+    store_penalty: float = Field(0.0, ge=0)  # cost added per extra store in a split
+
+class ShopMatchBatchRequest(BaseModel):
+    baskets: List[ShopMatchRequest] = Field(..., min_length=1, max_length=1000)
 
 class ShopMatchResponse(BaseModel):
     shop_id: str
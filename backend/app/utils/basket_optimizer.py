@@ -0,0 +1,206 @@
+"""
+Basket Optimizer Utility
+Finds the cheapest way to buy a whole grocery list across a few stores
+"""
+from typing import List, Optional
+import numpy as np
+
+# Pool size per block when checking stores for dominance
+DOMINANCE_BLOCK = 256
+
+# Largest store pools searched exhaustively for pairs and for triples
+PAIR_POOL_LIMIT = 256
+TRIPLE_POOL_LIMIT = 64
+
+# Cheapest stores per item always kept in the pool when it is capped
+PER_ITEM_KEEP = 2
+
+
+class BasketPlan:
+    """
+    Cheapest split of a basket across at most N stores
+
+    stores holds the chosen candidate rows, assignment the row each item is
+    bought from (-1 when no store carries it), item_total the sum of prices
+    and penalty the extra-store penalty charged on top. exact is False when
+    the search had to be capped, so a cheaper split may exist.
+    """
+
+    def __init__(self, stores: List[int], assignment: np.ndarray, item_total: float, penalty: float,
+                 exact: bool = True):
+        self.stores = stores
+        self.assignment = assignment
+        self.item_total = item_total
+        self.penalty = penalty
+        self.exact = exact
+
+    @property
+    def total(self) -> float:
+        return self.item_total + self.penalty
+
+
+def _undominated(costs: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """
+    Drop stores another store beats or matches on every item
+
+    Swapping a dominated store for its dominator never makes a plan more
+    expensive, so only the skyline needs to be searched. Stores are swept
+    in order of total cost, since a dominator is never more expensive
+    overall, and each block is only compared with the skyline kept so far.
+    """
+    rows = rows[np.argsort(costs[rows].sum(axis=1), kind="stable")]
+    kept = np.empty(0, dtype=rows.dtype)
+    for start in range(0, len(rows), DOMINANCE_BLOCK):
+        block_rows = rows[start:start + DOMINANCE_BLOCK]
+        block = costs[block_rows]
+        skyline = costs[kept]
+
+        dominated = (skyline[None, :, :] <= block[:, None, :]).all(axis=2).any(axis=1)
+        # Within the block an equal-or-better store listed earlier dominates
+        inner = (block[None, :, :] <= block[:, None, :]).all(axis=2)
+        inner &= np.tri(len(block), k=-1, dtype=bool)
+        dominated |= inner.any(axis=1)
+
+        kept = np.concatenate([kept, block_rows[~dominated]])
+    return kept
+
+
+def _cap_pool(costs: np.ndarray, pool: np.ndarray, bound: np.ndarray, limit: int) -> np.ndarray:
+    """Keep the most promising stores: cheapest partners, best standalone and cheapest per item"""
+    half = limit // 2
+    by_bound = pool[np.argsort(bound[pool], kind="stable")[:half]]
+    by_single = pool[np.argsort(costs[pool].sum(axis=1), kind="stable")[:half]]
+    keep = min(PER_ITEM_KEEP, len(pool))
+    per_item = pool[np.argpartition(costs[pool], keep - 1, axis=0)[:keep]].ravel()
+    return np.unique(np.concatenate([by_bound, by_single, per_item]))
+
+
+def _greedy(costs: np.ndarray, max_stores: int) -> List[int]:
+    """Pick stores one at a time by largest cost reduction to seed the bound"""
+    chosen = [int(np.argmin(costs.sum(axis=1)))]
+    current = costs[chosen[0]].copy()
+    while len(chosen) < max_stores:
+        totals = np.minimum(current, costs).sum(axis=1)
+        candidate = int(np.argmin(totals))
+        if totals[candidate] >= current.sum():
+            break
+        chosen.append(candidate)
+        current = np.minimum(current, costs[candidate])
+    return chosen
+
+
+def _search_pairs(costs: np.ndarray, pool: np.ndarray, bound: np.ndarray, penalty: float,
+                  best_rows: List[int], best: float):
+    """Branch and bound over store pairs, pool sorted by bound"""
+    for i, a in enumerate(pool):
+        if bound[a] + penalty >= best:
+            break
+        rest = pool[i + 1:]
+        if len(rest) == 0:
+            break
+        totals = np.minimum(costs[a], costs[rest]).sum(axis=1) + penalty
+        j = int(np.argmin(totals))
+        if totals[j] < best:
+            best_rows, best = [int(a), int(rest[j])], float(totals[j])
+    return best_rows, best
+
+
+def _search_triples(costs: np.ndarray, pool: np.ndarray, bound: np.ndarray, floor: np.ndarray,
+                    penalty: float, best_rows: List[int], best: float):
+    """Branch and bound over store triples, pool sorted by bound"""
+    for i, a in enumerate(pool):
+        if bound[a] + 2 * penalty >= best:
+            break
+        rest = pool[i + 1:]
+        if len(rest) < 2:
+            break
+        with_a = np.minimum(costs[a], costs[rest])
+        # Only partners whose bound can still beat the best plan get a third store
+        pairs = np.flatnonzero(np.minimum(with_a, floor).sum(axis=1) + 2 * penalty < best)
+        if len(pairs) == 0:
+            continue
+        totals = np.minimum(with_a[pairs][:, None, :], costs[rest][None, :, :]).sum(axis=2) + 2 * penalty
+        j, k = np.unravel_index(int(np.argmin(totals)), totals.shape)
+        if totals[j, k] < best:
+            best_rows, best = [int(a), int(rest[pairs[j]]), int(rest[k])], float(totals[j, k])
+    return best_rows, best
+
+
+def optimize_basket(prices: np.ndarray, found: np.ndarray, max_stores: int,
+                    store_penalty: float = 0.0) -> Optional[BasketPlan]:
+    """
+    Find the cheapest set of at most max_stores stores covering the basket
+
+    Plans are compared on missing items first and price second, each store
+    beyond the first adds store_penalty. The search is a branch and bound
+    over the undominated stores, visited in order of a lower bound on any
+    plan they take part in, so most of the candidate pool is never paired.
+    Dominated stores are pruned first; only when more stores than the pool
+    limit for N survive that are the most promising ones searched, and the
+    plan is then marked as not exact.
+
+    Args:
+        prices: Price matrix, one row per candidate store, one column per item
+        found: Mask of which store carries which item
+        max_stores: Maximum number of stores to split the basket across
+        store_penalty: Cost added for every extra store visited
+
+    Returns:
+        BasketPlan, or None when no candidate carries any item
+    """
+    if prices.size == 0 or not found.any():
+        return None
+
+    # Items nobody sells are reported missing and left out of the search
+    sold = found.any(axis=0)
+    costs = np.where(found[:, sold], prices[:, sold], np.inf)
+
+    # A missing item must cost more than any complete basket can
+    missing_cost = float(prices[found].sum()) + store_penalty * max_stores + 1.0
+    costs = np.where(np.isfinite(costs), costs, missing_cost)
+    floor = costs.min(axis=0)
+
+    def plan_cost(rows: List[int]) -> float:
+        return float(costs[rows].min(axis=0).sum()) + store_penalty * (len(rows) - 1)
+
+    best_rows = _greedy(costs, max_stores)
+    best = plan_cost(best_rows)
+
+    single = costs.sum(axis=1)
+    single_best = int(np.argmin(single))
+    if single[single_best] < best:
+        best_rows, best = [single_best], float(single[single_best])
+
+    exact = True
+    if max_stores > 1:
+        # Any plan with store a and another store costs at least bound[a] + penalty
+        bound = np.minimum(costs, floor).sum(axis=1)
+        pool = np.flatnonzero(bound + store_penalty < best)
+        # Pruning dominated stores loses nothing, so it comes before any cap
+        pool = _undominated(costs, pool)
+        if len(pool) > PAIR_POOL_LIMIT:
+            pool = _cap_pool(costs, pool, bound, PAIR_POOL_LIMIT)
+            exact = False
+        pool = pool[np.argsort(bound[pool], kind="stable")]
+        best_rows, best = _search_pairs(costs, pool, bound, store_penalty, best_rows, best)
+
+        if max_stores > 2:
+            if len(pool) > TRIPLE_POOL_LIMIT:
+                pool = _cap_pool(costs, pool, bound, TRIPLE_POOL_LIMIT)
+                exact = False
+                pool = np.union1d(pool, best_rows)
+                pool = pool[np.argsort(bound[pool], kind="stable")]
+            best_rows, best = _search_triples(costs, pool, bound, floor, store_penalty, best_rows, best)
+
+    # Drop stores that ended up supplying nothing
+    chosen = costs[best_rows]
+    picks = np.asarray(best_rows)[chosen.argmin(axis=0)]
+    best_rows = [row for row in best_rows if row in picks]
+
+    assignment = np.full(prices.shape[1], -1, dtype=np.int64)
+    sold_columns = np.flatnonzero(sold)
+    covered = found[picks, sold_columns]
+    assignment[sold_columns[covered]] = picks[covered]
+
+    item_total = float(prices[assignment[assignment >= 0], np.flatnonzero(assignment >= 0)].sum())
+    return BasketPlan(best_rows, assignment, item_total, store_penalty * (len(best_rows) - 1), exact)
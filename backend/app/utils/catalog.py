@@ -0,0 +1,501 @@
+"""
+Catalog Utility
+Columnar store catalog compiled from the Delhi NCR CSV into a binary snapshot
+
+The snapshot holds an interned string table plus fixed-width NumPy columns.
+Workers map it read-only, so every uvicorn process shares the same pages
+instead of parsing the CSV into its own dict-of-dicts copy.
+"""
+import csv
+import hashlib
+import json
+import mmap
+import os
+import zlib
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.utils.geo_index import store_coordinates
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+
+CATALOG_CSV_PATH = os.getenv(
+    "CATALOG_CSV_PATH", os.path.join(BACKEND_DIR, "..", "delhi_ncr_stores_data.csv")
+)
+CATALOG_SNAPSHOT_PATH = os.getenv(
+    "CATALOG_SNAPSHOT_PATH", os.path.join(BACKEND_DIR, "data", "catalog.snapshot")
+)
+
+SNAPSHOT_MAGIC = b"CORELIA\x01"
+SNAPSHOT_ALIGN = 64
+
+# Column name -> dtype, in the order they are laid out in the snapshot
+CATALOG_COLUMNS = {
+    # Interned string table: UTF-8 blob plus start offsets (one extra at the end)
+    "string_blob": np.uint8,
+    "string_offsets": np.int64,
+    # One entry per store, strings are ids into the string table
+    "store_id": np.int32,
+    "store_name": np.int32,
+    "store_category": np.int32,
+    "store_location": np.int32,
+    "store_owner": np.int32,
+    "store_contact": np.int32,
+    "store_address": np.int32,
+    "store_rating": np.float32,
+    # Degrees, NaN when the store cannot be placed
+    "store_lat": np.float64,
+    "store_lon": np.float64,
+    # Rows of store i are store_offsets[i]:store_offsets[i + 1]
+    "store_offsets": np.int32,
+    # One entry per inventory row, grouped by store in CSV order
+    "row_item": np.int32,
+    "row_item_code": np.int32,
+    "row_category": np.int32,
+    "row_price": np.float32,
+    "row_stock": np.int32,
+}
+
+# CSV column feeding each store string column
+STORE_FIELDS = {
+    "store_id": "Store_ID",
+    "store_name": "Store_Name",
+    "store_category": "Store_Type",
+    "store_location": "Location",
+    "store_owner": "Owner_Name",
+    "store_contact": "Contact_Number",
+    "store_address": "Address",
+}
+
+# CSV column feeding each inventory string column
+ROW_FIELDS = {
+    "row_item": "Item_Name",
+    "row_item_code": "Item_ID",
+    "row_category": "Category",
+}
+
+# Fields of the imported shop and inventory item documents feeding the same
+# columns, in STORE_FIELDS and ROW_FIELDS order
+SHOP_DOCUMENT_FIELDS = ("store_id", "name", "store_type", "location", "owner_name", "contact_number", "address")
+ITEM_DOCUMENT_FIELDS = ("item_name", "item_id", "category")
+
+# Optional CSV columns with per-store coordinates; without them stores are
+# placed around their locality centre
+COORDINATE_FIELDS = ("Latitude", "Longitude")
+
+
+def store_rating(store_id: str) -> float:
+    """
+    Deterministic 4.0-4.9 rating for a catalog store
+
+    Uses CRC32 rather than hash() so every worker and every run agrees.
+    """
+    return 4.0 + (zlib.crc32(store_id.encode("utf-8")) % 10) / 10
+
+
+class Catalog:
+    """
+    Columnar store catalog
+
+    Columns are NumPy arrays, either built in memory from the CSV or mapped
+    read-only from a snapshot file. The string table is decoded once, on
+    first access.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], source: Optional[dict] = None, buffer=None):
+        for name in CATALOG_COLUMNS:
+            setattr(self, name, columns[name])
+        self.source = source or {}
+        # Keeps the mapped snapshot alive for as long as the columns are used
+        self._buffer = buffer
+        self._strings: Optional[List[str]] = None
+        self._store_lookup: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.store_id)
+
+    @property
+    def version(self) -> str:
+        """Import id of a database catalog, else SHA-1 prefix of the source CSV; identical across workers"""
+        return self.source.get("version") or self.source.get("sha1", "")[:16] or "empty"
+
+    @property
+    def row_count(self) -> int:
+        return len(self.row_item)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in CATALOG_COLUMNS}
+
+    def string(self, string_id: int) -> str:
+        """Look up one entry of the interned string table"""
+        if self._strings is None:
+            blob = self.string_blob.tobytes()
+            offsets = self.string_offsets.tolist()
+            self._strings = [blob[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+        return self._strings[string_id]
+
+    def store_index(self, store_id: str) -> Optional[int]:
+        """Find the position of a store by its Store_ID"""
+        if self._store_lookup is None:
+            self._store_lookup = {self.string(sid): idx for idx, sid in enumerate(self.store_id)}
+        return self._store_lookup.get(store_id)
+
+    def store_rows(self, idx: int) -> slice:
+        return slice(int(self.store_offsets[idx]), int(self.store_offsets[idx + 1]))
+
+    def item_count(self, idx: int) -> int:
+        return int(self.store_offsets[idx + 1] - self.store_offsets[idx])
+
+    def store(self, idx: int) -> dict:
+        """Store fields as a plain dict"""
+        return {
+            "id": self.string(self.store_id[idx]),
+            "name": self.string(self.store_name[idx]),
+            "category": self.string(self.store_category[idx]),
+            "location": self.string(self.store_location[idx]),
+            "owner": self.string(self.store_owner[idx]),
+            "contact": self.string(self.store_contact[idx]),
+            "address": self.string(self.store_address[idx]),
+            "latitude": self.coordinate(self.store_lat[idx]),
+            "longitude": self.coordinate(self.store_lon[idx]),
+            "distance": 0.0,
+            "rating": round(float(self.store_rating[idx]), 1),
+            "isOpen": True,
+        }
+
+    @staticmethod
+    def coordinate(value: float) -> Optional[float]:
+        return round(float(value), 6) if np.isfinite(value) else None
+
+    def inventory(self, idx: int) -> List[dict]:
+        """Inventory rows of a store in catalog order"""
+        rows = self.store_rows(idx)
+        return [{
+            "name": self.string(item),
+            "price": round(float(price), 2),
+            "stock": int(stock),
+        } for item, price, stock in zip(self.row_item[rows], self.row_price[rows], self.row_stock[rows])]
+
+
+class CatalogCompiler:
+    """
+    Compiles the store CSV into a Catalog
+
+    Parsed and interned records are cached by their raw CSV bytes, so
+    recompiling an edited file only parses the records that changed;
+    unchanged ones are reused as-is. Each compile drops the strings no
+    record refers to any more and renumbers the rest, cached records
+    included, so the table and the snapshot track the current data rather
+    than everything the compiler has ever seen.
+    """
+
+    def __init__(self):
+        self._strings: Dict[str, int] = {}
+        self._parsed: Dict[bytes, tuple] = {}
+
+    def _intern(self, value: str) -> int:
+        string_id = self._strings.get(value)
+        if string_id is None:
+            string_id = self._strings[value] = len(self._strings)
+        return string_id
+
+    def _records(self, content: bytes):
+        """Split CSV bytes into raw records, keeping quoted newlines inside a record"""
+        pending = b""
+        for line in content.splitlines():
+            pending = pending + b"\n" + line if pending else line
+            if pending.count(b'"') % 2 == 0:
+                if pending.strip():
+                    yield pending
+                pending = b""
+
+    @staticmethod
+    def _coordinates(row: List[str], id_position: int, location_position: int,
+                     coordinate_positions: Optional[List[int]]) -> tuple:
+        """Take the store's coordinates from the CSV, or estimate them from its locality"""
+        if coordinate_positions is not None:
+            try:
+                return tuple(float(row[position]) for position in coordinate_positions)
+            except ValueError:
+                pass
+        return store_coordinates(row[id_position], row[location_position])
+
+    def compile(self, csv_path: str = CATALOG_CSV_PATH) -> Catalog:
+        """
+        Parse the store CSV into columnar arrays
+
+        Args:
+            csv_path: Path to delhi_ncr_stores_data.csv
+
+        Returns:
+            In-memory Catalog
+        """
+        # Stat before reading, so an edit racing the read is seen again later
+        source = source_signature(csv_path)
+        with open(csv_path, "rb") as f:
+            content = f.read()
+        source["sha1"] = hashlib.sha1(content).hexdigest()
+
+        records = self._records(content)
+        header = next(csv.reader([next(records).decode("utf-8")]))
+        store_positions = [header.index(field) for field in STORE_FIELDS.values()]
+        row_positions = [header.index(field) for field in ROW_FIELDS.values()]
+        price_position = header.index("Price")
+        stock_position = header.index("Stock_Quantity")
+        location_position = header.index(STORE_FIELDS["store_location"])
+        coordinate_positions = (
+            [header.index(field) for field in COORDINATE_FIELDS]
+            if all(field in header for field in COORDINATE_FIELDS) else None
+        )
+
+        previous, parsed = self._parsed, {}
+
+        def entries():
+            for record in records:
+                entry = previous.get(record)
+                if entry is None:
+                    row = next(csv.reader([record.decode("utf-8")]))
+                    entry = (
+                        row[store_positions[0]],
+                        tuple(self._intern(row[position]) for position in store_positions),
+                        self._coordinates(row, store_positions[0], location_position, coordinate_positions),
+                        (
+                            *(self._intern(row[position]) for position in row_positions),
+                            float(row[price_position]),
+                            int(row[stock_position]),
+                        ),
+                    )
+                parsed[record] = entry
+                yield entry
+
+        catalog, remap = self._assemble(entries(), source)
+        row_fields = len(ROW_FIELDS)
+        self._parsed = {
+            record: (
+                store_id,
+                tuple(remap[string_id] for string_id in store_fields),
+                coordinates,
+                (*(remap[string_id] for string_id in row[:row_fields]), *row[row_fields:]),
+            )
+            for record, (store_id, store_fields, coordinates, row) in parsed.items()
+        }
+        return catalog
+
+    def compile_documents(self, shops: Dict[str, dict], items, source: dict) -> Catalog:
+        """
+        Build a Catalog from imported shop and inventory documents
+
+        Args:
+            shops: Shop documents (as written by import_shops_data.py) by store_id
+            items: Inventory item documents in import order
+            source: Description of the data, with the catalog version
+
+        Returns:
+            In-memory Catalog; stores without a shop document are skipped
+        """
+        def entries():
+            for item in items:
+                shop = shops.get(item["store_id"])
+                if shop is None:
+                    continue
+                yield (
+                    item["store_id"],
+                    tuple(self._intern(shop.get(field, "")) for field in SHOP_DOCUMENT_FIELDS),
+                    store_coordinates(item["store_id"], shop.get("location", "")),
+                    (
+                        *(self._intern(item.get(field, "")) for field in ITEM_DOCUMENT_FIELDS),
+                        float(item.get("price", 0)),
+                        int(item.get("stock_quantity", 0)),
+                    ),
+                )
+
+        catalog, _ = self._assemble(entries(), source)
+        return catalog
+
+    def _assemble(self, entries, source: dict) -> Tuple[Catalog, List[int]]:
+        """
+        Group (store id, store fields, coordinates, row fields) entries into columns
+
+        Returns:
+            (Catalog, new string id of every old one), after the string table
+            was compacted to the strings the entries refer to
+        """
+        stores: Dict[str, tuple] = {}
+        store_points: Dict[str, tuple] = {}
+        store_rows: Dict[str, List[tuple]] = {}
+        referenced = set()
+
+        for store_id, store_fields, coordinates, row_fields in entries:
+            referenced.update(store_fields)
+            rows = store_rows.get(store_id)
+            if rows is None:
+                stores[store_id] = store_fields
+                store_points[store_id] = coordinates
+                rows = store_rows[store_id] = []
+            rows.append(row_fields)
+
+        store_table = np.array(list(stores.values()), dtype=np.int32).reshape(-1, len(STORE_FIELDS))
+        columns = {column: store_table[:, position].copy() for position, column in enumerate(STORE_FIELDS)}
+        columns["store_rating"] = np.array([store_rating(sid) for sid in stores], dtype=np.float32)
+        points = np.array(list(store_points.values()), dtype=np.float64).reshape(-1, 2)
+        columns["store_lat"] = points[:, 0].copy()
+        columns["store_lon"] = points[:, 1].copy()
+        columns["store_offsets"] = np.concatenate(
+            [[0], np.cumsum([len(rows) for rows in store_rows.values()])]
+        ).astype(np.int32)
+
+        all_rows = [row for rows in store_rows.values() for row in rows]
+        for position, column in enumerate((*ROW_FIELDS, "row_price", "row_stock")):
+            columns[column] = np.array([row[position] for row in all_rows], dtype=CATALOG_COLUMNS[column])
+
+        # Keep only the strings still referred to, in their current order
+        for column in ROW_FIELDS:
+            referenced.update(np.unique(columns[column]).tolist())
+        strings = list(self._strings)
+        kept = sorted(referenced)
+        remap = np.full(len(strings), -1, dtype=np.int64)
+        remap[kept] = np.arange(len(kept))
+        for column in (*STORE_FIELDS, *ROW_FIELDS):
+            columns[column] = remap[columns[column]].astype(CATALOG_COLUMNS[column])
+        self._strings = {strings[string_id]: position for position, string_id in enumerate(kept)}
+
+        encoded = [value.encode("utf-8") for value in self._strings]
+        columns["string_blob"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        columns["string_offsets"] = np.concatenate(
+            [[0], np.cumsum([len(value) for value in encoded])]
+        ).astype(np.int64)
+
+        return Catalog(columns, source=source), remap.tolist()
+
+
+def compile_catalog(csv_path: str = CATALOG_CSV_PATH) -> Catalog:
+    """Parse the store CSV into an in-memory Catalog in one go"""
+    return CatalogCompiler().compile(csv_path)
+
+
+def source_signature(path: str) -> dict:
+    """Size and mtime of a catalog source, recorded to detect changes cheaply"""
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def write_snapshot(catalog: Catalog, snapshot_path: str = CATALOG_SNAPSHOT_PATH) -> int:
+    """
+    Write a catalog to a snapshot file
+
+    Layout: magic, 4-byte header length, JSON header describing every
+    column, then each column's raw little-endian bytes aligned to 64 bytes.
+    The file is written next to the target and renamed into place, so
+    workers mapping the old snapshot keep a consistent view.
+
+    Returns:
+        Size of the snapshot in bytes
+    """
+    columns = catalog.columns()
+    layout = {}
+    offset = 0
+    for name, array in columns.items():
+        offset = -(-offset // SNAPSHOT_ALIGN) * SNAPSHOT_ALIGN
+        layout[name] = {"dtype": np.dtype(CATALOG_COLUMNS[name]).newbyteorder("<").str,
+                        "length": int(len(array)), "offset": offset}
+        offset += array.nbytes
+
+    header = json.dumps({"columns": layout, "source": catalog.source}).encode("utf-8")
+    data_start = -(-(len(SNAPSHOT_MAGIC) + 4 + len(header)) // SNAPSHOT_ALIGN) * SNAPSHOT_ALIGN
+
+    os.makedirs(os.path.dirname(os.path.abspath(snapshot_path)), exist_ok=True)
+    tmp_path = f"{snapshot_path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(len(header).to_bytes(4, "little"))
+        f.write(header)
+        for name, array in columns.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(np.ascontiguousarray(array, dtype=layout[name]["dtype"]).tobytes())
+        size = f.tell()
+    os.replace(tmp_path, snapshot_path)
+    return size
+
+
+def open_snapshot(snapshot_path: str = CATALOG_SNAPSHOT_PATH) -> Catalog:
+    """
+    Map a snapshot file read-only
+
+    The returned columns are read-only views over the mapping, so the
+    kernel shares the pages between every process that opens the file.
+    """
+    with open(snapshot_path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if buffer[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        buffer.close()
+        raise ValueError(f"Not a catalog snapshot: {snapshot_path}")
+
+    header_start = len(SNAPSHOT_MAGIC) + 4
+    header_length = int.from_bytes(buffer[len(SNAPSHOT_MAGIC):header_start], "little")
+    header = json.loads(buffer[header_start:header_start + header_length])
+    data_start = -(-(header_start + header_length) // SNAPSHOT_ALIGN) * SNAPSHOT_ALIGN
+
+    missing = [name for name in CATALOG_COLUMNS if name not in header["columns"]]
+    if missing:
+        buffer.close()
+        raise ValueError(f"Catalog snapshot is missing columns {', '.join(missing)}, rebuild it")
+
+    columns = {
+        name: np.frombuffer(buffer, dtype=spec["dtype"], count=spec["length"],
+                            offset=data_start + spec["offset"])
+        for name, spec in header["columns"].items()
+    }
+    return Catalog(columns, source=header.get("source"), buffer=buffer)
+
+
+def is_current(catalog: Catalog, csv_path: str = CATALOG_CSV_PATH) -> bool:
+    """Check that a catalog was compiled from the CSV as it is now"""
+    if not os.path.exists(csv_path):
+        return True
+    signature = source_signature(csv_path)
+    return all(catalog.source.get(key) == signature[key] for key in ("size", "mtime_ns"))
+
+
+def read_catalog(csv_path: str = CATALOG_CSV_PATH, snapshot_path: str = CATALOG_SNAPSHOT_PATH,
+                 compiler: Optional[CatalogCompiler] = None) -> Catalog:
+    """
+    Read the store catalog, preferring the mapped snapshot
+
+    Falls back to parsing the CSV when the snapshot is missing or older
+    than the CSV (run build_catalog_snapshot.py to compile it). Pass the
+    same compiler on every reload to only re-parse changed CSV records.
+    Raises when neither source can be read.
+    """
+    if os.path.exists(snapshot_path):
+        try:
+            catalog = open_snapshot(snapshot_path)
+            if is_current(catalog, csv_path):
+                print(f"✅ Mapped {len(catalog)} stores from catalog snapshot")
+                return catalog
+            print(f"⚠️ Catalog snapshot is older than {csv_path}, parsing CSV instead")
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not map catalog snapshot: {e}")
+
+    catalog = (compiler or CatalogCompiler()).compile(csv_path)
+    print(f"✅ Loaded {len(catalog)} stores from Delhi NCR CSV")
+    return catalog
+
+
+def load_catalog(csv_path: str = CATALOG_CSV_PATH, snapshot_path: str = CATALOG_SNAPSHOT_PATH,
+                 compiler: Optional[CatalogCompiler] = None) -> Catalog:
+    """Read the store catalog, falling back to an empty one when it cannot be read"""
+    try:
+        return read_catalog(csv_path, snapshot_path, compiler)
+    except FileNotFoundError:
+        print(f"⚠️ Warning: Delhi NCR stores CSV not found at {csv_path}")
+    except Exception as e:
+        print(f"❌ Error loading Delhi NCR stores: {e}")
+
+    return empty_catalog()
+
+
+def empty_catalog() -> Catalog:
+    columns = {name: np.empty(0, dtype=dtype) for name, dtype in CATALOG_COLUMNS.items()}
+    columns["string_offsets"] = np.zeros(1, dtype=np.int64)
+    columns["store_offsets"] = np.zeros(1, dtype=np.int32)
+    return Catalog(columns)
@@ -0,0 +1,98 @@
+"""
+Catalog Mongo Utility
+Loads the store catalog imported into MongoDB by import_shops_data.py
+
+Uses a synchronous client because catalogs are built off the event loop, in
+executor threads and in match pool workers.
+
+Each imported version is written to a snapshot file once and served mapped
+from it, like a compiled CSV, so every process on the host shares the same
+pages and only the first one to see a new version reads the collections.
+"""
+import os
+from typing import Optional
+from pymongo import MongoClient
+from app.utils.catalog import (
+    BACKEND_DIR, Catalog, CatalogCompiler, ITEM_DOCUMENT_FIELDS, SHOP_DOCUMENT_FIELDS, open_snapshot, write_snapshot
+)
+
+MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "corelia")
+
+# Document in catalog_meta the importer publishes a finished import to
+CATALOG_META_ID = "catalog"
+
+# Snapshot of the last imported version loaded from MongoDB
+CATALOG_MONGO_SNAPSHOT_PATH = os.getenv(
+    "CATALOG_MONGO_SNAPSHOT_PATH", os.path.join(BACKEND_DIR, "data", "catalog-mongo.snapshot")
+)
+
+_client: Optional[MongoClient] = None
+
+
+def catalog_database():
+    """Database holding the imported catalog, connecting on first use"""
+    global _client
+    if _client is None:
+        _client = MongoClient(MONGODB_URL, serverSelectionTimeoutMS=2000)
+    return _client[DATABASE_NAME]
+
+
+def mongo_catalog_version() -> Optional[str]:
+    """
+    Import id of the last completed catalog import
+
+    One indexed read of a single document, cheap enough to poll.
+
+    Returns:
+        Version string, or None when no import has completed
+    """
+    meta = catalog_database().catalog_meta.find_one({"_id": CATALOG_META_ID}, {"version": 1})
+    return meta.get("version") if meta else None
+
+
+def mapped_mongo_catalog(version: Optional[str], snapshot_path: str = CATALOG_MONGO_SNAPSHOT_PATH) -> Optional[Catalog]:
+    """The snapshot of an imported version, None when missing, unreadable or of another version"""
+    if version is None or not os.path.exists(snapshot_path):
+        return None
+    try:
+        catalog = open_snapshot(snapshot_path)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not map MongoDB catalog snapshot: {e}")
+        return None
+    return catalog if catalog.version == version else None
+
+
+def load_mongo_catalog(compiler: Optional[CatalogCompiler] = None,
+                       snapshot_path: str = CATALOG_MONGO_SNAPSHOT_PATH) -> Catalog:
+    """
+    Map the imported catalog, reading the shops and inventory on a new version
+
+    Inventory is streamed in import order, so stores and their rows keep
+    the order of the source CSV, as when the CSV itself is compiled. The
+    result is written to snapshot_path and mapped back from it; a process
+    that finds the snapshot already at the current version skips the
+    collections altogether.
+    """
+    version = mongo_catalog_version()
+    catalog = mapped_mongo_catalog(version, snapshot_path)
+    if catalog is not None:
+        print(f"✅ Mapped {len(catalog)} stores from MongoDB catalog snapshot {version}")
+        return catalog
+
+    db = catalog_database()
+    shop_projection = {field: 1 for field in SHOP_DOCUMENT_FIELDS}
+    item_projection = {field: 1 for field in ("store_id", *ITEM_DOCUMENT_FIELDS, "price", "stock_quantity")}
+    shops = {shop["store_id"]: shop for shop in db.shops.find({}, {**shop_projection, "_id": 0})}
+    items = db.inventory_items.find({}, {**item_projection, "_id": 0}).sort("position", 1)
+
+    source = {"database": DATABASE_NAME, "version": version}
+    catalog = (compiler or CatalogCompiler()).compile_documents(shops, items, source)
+    print(f"✅ Loaded {len(catalog)} stores from MongoDB catalog {version}")
+    try:
+        # Renamed into place, so processes mapping the previous version keep it intact
+        write_snapshot(catalog, snapshot_path)
+        return open_snapshot(snapshot_path)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not write MongoDB catalog snapshot, serving it from memory: {e}")
+        return catalog
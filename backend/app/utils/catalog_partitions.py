@@ -0,0 +1,104 @@
+"""
+Catalog Partitions Utility
+Per-location caches of payloads derived from the store catalog, evicted under a byte budget
+"""
+import os
+from collections import OrderedDict
+from typing import Dict
+import numpy as np
+from app.utils.catalog import Catalog
+
+# Derived payload bytes (shop detail responses) cached per worker, in MiB
+CATALOG_PARTITION_BUDGET_MB = float(os.getenv("CATALOG_PARTITION_BUDGET_MB", "64"))
+
+
+class CatalogPartition:
+    """
+    Payloads derived for the stores in one location
+
+    The partition holds no catalog rows: payloads are built straight from
+    the catalog columns and kept in its derived dict. Only those payloads
+    count towards its size.
+    """
+
+    def __init__(self, catalog: Catalog, key: int, stores: np.ndarray):
+        self.catalog = catalog
+        self.key = key
+        self.name = catalog.string(key)
+        self.stores = stores
+        self.derived: Dict[int, tuple] = {}
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self.stores)
+
+
+class CatalogPartitions:
+    """
+    LRU of per-location payload caches under a byte budget
+
+    Only the store membership of each location is computed up front, from
+    the per-store location column. A partition starts empty the first time
+    one of its stores is asked for and grows by the payloads derived for
+    its stores; the least recently used partitions are dropped once the
+    payload total exceeds the budget. The partition in use is never evicted.
+
+    This only bounds the payload cache. The catalog itself and the indexes
+    built over all of it (matching, search, prices, geo) stay whole in
+    every worker, so their memory still grows with the catalog.
+    """
+
+    def __init__(self, catalog: Catalog, budget_bytes: int = int(CATALOG_PARTITION_BUDGET_MB * 1024 * 1024)):
+        self.catalog = catalog
+        self.budget_bytes = budget_bytes
+        keys, inverse = np.unique(catalog.store_location, return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.searchsorted(inverse[order], np.arange(len(keys) + 1))
+        self.members: Dict[int, np.ndarray] = {
+            int(key): order[bounds[position]:bounds[position + 1]].astype(np.int32)
+            for position, key in enumerate(keys)
+        }
+        self._resident: "OrderedDict[int, CatalogPartition]" = OrderedDict()
+        self.resident_bytes = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, key: int) -> CatalogPartition:
+        """Partition of a location string id, loading it if not resident"""
+        partition = self._resident.get(key)
+        if partition is not None:
+            self._resident.move_to_end(key)
+            return partition
+
+        partition = CatalogPartition(self.catalog, key, self.members[key])
+        self._resident[key] = partition
+        self.loads += 1
+        return partition
+
+    def for_store(self, store: int) -> CatalogPartition:
+        """Partition holding a store"""
+        return self.get(int(self.catalog.store_location[store]))
+
+    def grow(self, partition: CatalogPartition, nbytes: int):
+        """Count payload bytes derived into a partition, evicting others if over budget"""
+        partition.nbytes += nbytes
+        if partition.key in self._resident:
+            self.resident_bytes += nbytes
+            self._evict()
+
+    def _evict(self):
+        while self.resident_bytes > self.budget_bytes and len(self._resident) > 1:
+            _, partition = self._resident.popitem(last=False)
+            self.resident_bytes -= partition.nbytes
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "partitions": len(self.members),
+            "resident": len(self._resident),
+            "payloads": sum(len(partition.derived) for partition in self._resident.values()),
+            "resident_bytes": self.resident_bytes,
+            "budget_bytes": self.budget_bytes,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
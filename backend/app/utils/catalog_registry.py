@@ -0,0 +1,182 @@
+"""
+Catalog Registry
+Holds the live store catalog with its indexes and hot-swaps new versions
+
+Requests take one CatalogBundle at the start and use it throughout, so a
+reload never changes the data under an in-flight request: the new bundle
+is built off the event loop and published with a single reference swap.
+
+Every shops route reads the catalog from here, whether it was imported
+into MongoDB or compiled from the CSV, and everything derived from it,
+including filter facets and overview stats, is computed once per version.
+"""
+import asyncio
+import os
+from datetime import datetime
+from typing import Optional
+from app.utils.catalog import (
+    CATALOG_CSV_PATH, CATALOG_SNAPSHOT_PATH, Catalog, CatalogCompiler, empty_catalog, read_catalog
+)
+from app.utils.catalog_mongo import load_mongo_catalog, mongo_catalog_version
+from app.utils.shop_index import ShopIndex
+from app.utils.geo_index import GeoIndex
+from app.utils.store_filters import StoreFilterIndex
+from app.utils.store_search import StoreSearchIndex
+from app.utils.price_index import PriceIndex
+from app.utils.catalog_partitions import CatalogPartitions
+from app.utils.shop_details import ShopDetailIndex
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the catalog sources (0 disables the watcher)
+CATALOG_WATCH_INTERVAL = float(os.getenv("CATALOG_WATCH_INTERVAL", "5"))
+
+# Where the catalog comes from: "mongo" (loaded by import_shops_data.py), "file"
+# (snapshot or CSV) or "auto", which picks MongoDB when it holds a completed import
+CATALOG_SOURCE = os.getenv("CATALOG_SOURCE", "auto")
+
+
+class CatalogBundle:
+    """One immutable catalog version together with everything derived from it"""
+
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        self.version = catalog.version
+        self.loaded_at = datetime.utcnow()
+        self.shop_index = ShopIndex(catalog)
+        self.geo_index = GeoIndex(catalog.store_lat, catalog.store_lon)
+        self.filters = StoreFilterIndex(catalog)
+        self.search_index = StoreSearchIndex(catalog)
+        self.price_index = PriceIndex(self.shop_index)
+        self.partitions = CatalogPartitions(catalog)
+        self.shop_details = ShopDetailIndex(self.partitions)
+        self.stats = {
+            "total_shops": len(catalog),
+            "total_items": catalog.row_count,
+            "total_locations": len(self.filters.locations),
+            "total_categories": len(self.filters.categories)
+        }
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
+
+_compiler = CatalogCompiler()
+_current: Optional[CatalogBundle] = None
+_watched: Optional[tuple] = None
+_source: Optional[str] = None
+
+
+def catalog_source() -> str:
+    """Source this process serves the catalog from, resolved once"""
+    global _source
+    if _source is None:
+        _source = CATALOG_SOURCE
+        if _source == "auto":
+            try:
+                _source = "mongo" if mongo_catalog_version() else "file"
+            except Exception as e:
+                logger.warning(f"MongoDB catalog unavailable, serving the catalog file: {str(e)}")
+                _source = "file"
+    return _source
+
+
+def _source_state() -> tuple:
+    """Cheap fingerprint of the catalog source, used to spot changes"""
+    if catalog_source() == "mongo":
+        try:
+            return ("mongo", mongo_catalog_version())
+        except Exception as e:
+            logger.error(f"Catalog version check failed: {str(e)}")
+            return _watched
+
+    state = []
+    for path in (CATALOG_CSV_PATH, CATALOG_SNAPSHOT_PATH):
+        try:
+            stat = os.stat(path)
+            state.append((stat.st_size, stat.st_mtime_ns))
+        except FileNotFoundError:
+            state.append(None)
+    return tuple(state)
+
+
+def _build_bundle() -> CatalogBundle:
+    if catalog_source() == "mongo":
+        return CatalogBundle(load_mongo_catalog(compiler=_compiler))
+    return CatalogBundle(read_catalog(compiler=_compiler))
+
+
+def get_catalog() -> CatalogBundle:
+    """Return the live catalog bundle, loading it on first use"""
+    global _current, _watched
+    if _current is None:
+        _watched = _source_state()
+        try:
+            _current = _build_bundle()
+        except Exception as e:
+            logger.error(f"Failed to load store catalog: {str(e)}")
+            _current = CatalogBundle(empty_catalog())
+    return _current
+
+
+def refresh_catalog() -> CatalogBundle:
+    """
+    Reload the catalog in the calling thread if its sources changed
+
+    For processes without an event loop, such as match pool workers.
+    Keeps the current version when the rebuild fails.
+    """
+    global _current, _watched
+    state = _source_state()
+    if _current is not None and state == _watched:
+        return _current
+    try:
+        bundle = _build_bundle()
+    except Exception as e:
+        logger.error(f"Catalog refresh failed: {str(e)}")
+        return get_catalog()
+    _watched = state
+    _current = bundle
+    return bundle
+
+
+async def reload_catalog(force: bool = False) -> CatalogBundle:
+    """
+    Rebuild the catalog if its sources changed and swap it in
+
+    The build runs in a worker thread. If it fails, the current version
+    keeps serving and the reload is retried on the next check. A rebuild
+    that yields the same content version keeps the current bundle.
+    """
+    global _current, _watched
+    loop = asyncio.get_running_loop()
+    # A database version check is a network round trip, keep it off the loop
+    state = await loop.run_in_executor(None, _source_state)
+    if not force and state == _watched and _current is not None:
+        return _current
+
+    try:
+        bundle = await loop.run_in_executor(None, _build_bundle)
+    except Exception as e:
+        logger.error(f"Catalog reload failed, keeping version {get_catalog().version}: {str(e)}")
+        return get_catalog()
+
+    _watched = state
+    if _current is not None and bundle.version == _current.version and not force:
+        return _current
+
+    logger.info(f"Catalog reloaded: version {bundle.version}, {len(bundle.catalog)} stores")
+    _current = bundle
+    return bundle
+
+
+async def watch_catalog(interval: float = CATALOG_WATCH_INTERVAL):
+    """Poll the catalog sources and hot-reload when they change"""
+    if interval <= 0:
+        return
+    get_catalog()
+    while True:
+        await asyncio.sleep(interval)
+        await reload_catalog()
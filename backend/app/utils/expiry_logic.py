@@ -2,8 +2,8 @@
 Expiry Logic Utility
 Automatically calculates expiry dates based on product categories
 """
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Union
 
 # Expiry duration mapping (in days)
 EXPIRY_RULES = {
@@ -96,6 +96,30 @@ def calculate_expiry_date(category: str, purchase_date: Optional[datetime] = Non
     return purchase_date + timedelta(days=days_until_expiry)
 
 
+def parse_expiry_date(value: Union[str, datetime, None]) -> Optional[datetime]:
+    """
+    Normalize an expiry date to a naive UTC datetime, stored as a BSON date
+    
+    Args:
+        value: ISO 8601 string (a trailing Z is accepted), datetime, or empty
+    
+    Returns:
+        Naive UTC datetime, or None when no date was given
+    
+    Raises:
+        ValueError: If a string is not an ISO 8601 date
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    if not isinstance(value, datetime):
+        raise ValueError(f"Unsupported expiry date: {value!r}")
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
 def get_expiry_info(category: str) -> dict:
     """
     Get expiry information for a category
@@ -153,3 +177,55 @@ def get_all_categories_info() -> dict:
         for category, days in EXPIRY_RULES.items()
         if category != "default"
     }
+
+
+# Expiry status buckets, by whole days left
+EXPIRY_CRITICAL_DAYS = 3
+EXPIRY_WARNING_DAYS = 7
+
+MILLISECONDS_PER_DAY = 24 * 60 * 60 * 1000
+
+
+def expiry_stages(now: datetime) -> list:
+    """
+    Aggregation stages that classify inventory items by expiry on the server
+    
+    expiry_date becomes a date (ISO strings are converted, anything else is
+    null), days_until_expiry counts whole days from now like
+    timedelta.days, and expiry_status is expired, critical, warning or
+    normal, or null without an expiry date.
+    
+    Args:
+        now: Reference time (naive UTC)
+    
+    Returns:
+        List of pipeline stages
+    """
+    days = "$days_until_expiry"
+    return [
+        {"$addFields": {
+            "expiry_date": {"$convert": {"input": "$expiry_date", "to": "date", "onError": None, "onNull": None}}
+        }},
+        {"$addFields": {
+            "days_until_expiry": {"$cond": [
+                {"$eq": [{"$type": "$expiry_date"}, "date"]},
+                {"$floor": {"$divide": [
+                    {"$dateDiff": {"startDate": now, "endDate": "$expiry_date", "unit": "millisecond"}},
+                    MILLISECONDS_PER_DAY
+                ]}},
+                None
+            ]}
+        }},
+        {"$addFields": {
+            "expiry_status": {"$switch": {
+                "branches": [
+                    # null sorts below every number, so it has to be ruled out first
+                    {"case": {"$eq": [days, None]}, "then": None},
+                    {"case": {"$lt": [days, 0]}, "then": "expired"},
+                    {"case": {"$lte": [days, EXPIRY_CRITICAL_DAYS]}, "then": "critical"},
+                    {"case": {"$lte": [days, EXPIRY_WARNING_DAYS]}, "then": "warning"},
+                ],
+                "default": "normal"
+            }}
+        }},
+    ]
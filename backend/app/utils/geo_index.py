@@ -0,0 +1,205 @@
+"""
+Geo Index Utility
+Store coordinates and a haversine BallTree for radius queries over the catalog
+"""
+import zlib
+from typing import Optional, Tuple
+import numpy as np
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Approximate centre of each Delhi NCR locality in the catalog (lat, lon).
+# Used while the CSV carries no per-store coordinates.
+LOCALITY_COORDINATES = {
+    "Anand Vihar": (28.6469, 77.3152),
+    "Badarpur": (28.4929, 77.3036),
+    "Ballabhgarh": (28.3410, 77.3210),
+    "CR Park": (28.5386, 77.2489),
+    "Chanakyapuri": (28.5961, 77.1884),
+    "Chandni Chowk": (28.6506, 77.2303),
+    "Chattarpur": (28.4950, 77.1780),
+    "Civil Lines": (28.6814, 77.2226),
+    "Connaught Place": (28.6315, 77.2167),
+    "Crossing Republik": (28.6310, 77.4380),
+    "Cyber City": (28.4950, 77.0890),
+    "DLF Phase 1": (28.4730, 77.0960),
+    "DLF Phase 2": (28.4880, 77.0890),
+    "DLF Phase 3": (28.4920, 77.0950),
+    "Daryaganj": (28.6460, 77.2400),
+    "Defence Colony": (28.5733, 77.2300),
+    "Dilshad Garden": (28.6826, 77.3180),
+    "Dwarka": (28.5921, 77.0460),
+    "Faridabad NIT": (28.3900, 77.3000),
+    "Faridabad Sector 16": (28.4090, 77.3140),
+    "Faridabad Sector 21": (28.4260, 77.3020),
+    "Faridabad Sector 37": (28.4680, 77.3070),
+    "Geeta Colony": (28.6530, 77.2770),
+    "Ghaziabad Indirapuram": (28.6412, 77.3711),
+    "Ghaziabad Vaishali": (28.6450, 77.3390),
+    "Ghaziabad Vasundhara": (28.6600, 77.3630),
+    "Greater Kailash": (28.5482, 77.2390),
+    "Greater Noida": (28.4744, 77.5040),
+    "Green Park": (28.5590, 77.2070),
+    "Gurgaon Sector 14": (28.4720, 77.0430),
+    "Gurgaon Sector 23": (28.5100, 77.0580),
+    "Gurgaon Sector 45": (28.4440, 77.0650),
+    "Gurgaon Sector 56": (28.4220, 77.1000),
+    "Gurgaon Sector 67": (28.3890, 77.0660),
+    "Hauz Khas": (28.5494, 77.2001),
+    "ITO": (28.6280, 77.2410),
+    "Inderlok": (28.6730, 77.1700),
+    "Janakpuri": (28.6219, 77.0878),
+    "Kalkaji": (28.5410, 77.2590),
+    "Karkardooma": (28.6480, 77.3040),
+    "Karol Bagh": (28.6519, 77.1909),
+    "Kashmere Gate": (28.6670, 77.2280),
+    "Kaushambi": (28.6400, 77.3240),
+    "Kirti Nagar": (28.6550, 77.1430),
+    "Lajpat Nagar": (28.5677, 77.2433),
+    "Laxmi Nagar": (28.6300, 77.2770),
+    "MG Road": (28.4795, 77.0800),
+    "Malviya Nagar": (28.5330, 77.2100),
+    "Mandir Marg": (28.6360, 77.2000),
+    "Mangolpuri": (28.6920, 77.0830),
+    "Mehrauli": (28.5245, 77.1855),
+    "Model Town": (28.7158, 77.1910),
+    "Motibagh": (28.5800, 77.1730),
+    "Nangloi": (28.6830, 77.0640),
+    "Nehru Place": (28.5491, 77.2533),
+    "Noida Sector 110": (28.5400, 77.3950),
+    "Noida Sector 137": (28.5100, 77.4080),
+    "Noida Sector 15": (28.5850, 77.3110),
+    "Noida Sector 18": (28.5700, 77.3260),
+    "Noida Sector 34": (28.5740, 77.3540),
+    "Noida Sector 51": (28.5850, 77.3700),
+    "Noida Sector 62": (28.6270, 77.3650),
+    "Noida Sector 76": (28.5670, 77.3870),
+    "Paharganj": (28.6440, 77.2130),
+    "Paschim Vihar": (28.6690, 77.1000),
+    "Pitampura": (28.7030, 77.1320),
+    "Pratap Nagar": (28.6680, 77.1950),
+    "Preet Vihar": (28.6410, 77.2950),
+    "R K Puram": (28.5660, 77.1760),
+    "Rajouri Garden": (28.6490, 77.1220),
+    "Rohini": (28.7380, 77.0820),
+    "Sadar Bazar": (28.6580, 77.2110),
+    "Safdarjung": (28.5680, 77.2060),
+    "Sarita Vihar": (28.5290, 77.2890),
+    "Sarojini Nagar": (28.5770, 77.1960),
+    "Seemapuri": (28.6850, 77.3200),
+    "Shahdara": (28.6730, 77.2890),
+    "Shalimar Bagh": (28.7160, 77.1630),
+    "Shastri Nagar": (28.6720, 77.1820),
+    "Sohna Road": (28.4100, 77.0430),
+    "Sultanpur Majra": (28.7000, 77.0700),
+    "Surajmal Vihar": (28.6570, 77.2980),
+    "Uttam Nagar": (28.6210, 77.0550),
+    "Vasant Kunj": (28.5200, 77.1590),
+    "Vasant Vihar": (28.5600, 77.1600),
+    "Vikaspuri": (28.6360, 77.0700),
+    "Vivek Vihar": (28.6720, 77.3150),
+}
+
+# Stores are spread deterministically up to this far from their locality centre
+LOCALITY_SPREAD_KM = 1.5
+
+
+def store_coordinates(store_id: str, location: str) -> Tuple[float, float]:
+    """
+    Estimate a store's coordinates from its locality
+
+    Offsets the locality centre by a fixed, store-specific bearing and
+    distance so stores in the same locality get distinct positions.
+
+    Returns:
+        (lat, lon), or (nan, nan) for an unknown locality
+    """
+    centre = LOCALITY_COORDINATES.get(location)
+    if centre is None:
+        return float("nan"), float("nan")
+
+    seed = zlib.crc32(store_id.encode("utf-8"))
+    bearing = (seed % 3600) / 3600 * 2 * np.pi
+    distance_km = ((seed >> 12) % 1000) / 1000 * LOCALITY_SPREAD_KM
+    lat = centre[0] + np.degrees(distance_km / EARTH_RADIUS_KM) * np.cos(bearing)
+    lon = centre[1] + np.degrees(distance_km / EARTH_RADIUS_KM) * np.sin(bearing) / np.cos(np.radians(centre[0]))
+    return float(lat), float(lon)
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance in km from one point to many"""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def format_distance(km: float) -> Optional[float]:
+    """Distance in km rounded for responses, None when unknown"""
+    return round(float(km), 2) if np.isfinite(km) else None
+
+
+class GeoIndex:
+    """
+    Haversine BallTree over store coordinates
+
+    Stores without coordinates are left out of radius queries.
+    """
+
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray):
+        self.latitudes = latitudes.astype(np.float64)
+        self.longitudes = longitudes.astype(np.float64)
+        known = np.isfinite(self.latitudes) & np.isfinite(self.longitudes)
+        self.stores = np.flatnonzero(known).astype(np.int32)
+        self.tree: Optional[BallTree] = None
+        if len(self.stores):
+            points = np.radians(np.column_stack([self.latitudes[known], self.longitudes[known]]))
+            self.tree = BallTree(points, metric="haversine")
+
+    def within(self, lat: float, lon: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the stores within radius_km of a point
+
+        Returns:
+            (store indices, distances in km), nearest first
+        """
+        if self.tree is None:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+        query = np.radians([[lat, lon]])
+        rows, distances = self.tree.query_radius(query, r=radius_km / EARTH_RADIUS_KM,
+                                                 return_distance=True, sort_results=True)
+        return self.stores[rows[0]], distances[0] * EARTH_RADIUS_KM
+
+    def distances(self, lat: float, lon: float, stores: Optional[np.ndarray] = None) -> np.ndarray:
+        """Distance in km from a point to the given stores (all stores by default)"""
+        if stores is None:
+            return haversine_km(lat, lon, self.latitudes, self.longitudes)
+        return haversine_km(lat, lon, self.latitudes[stores], self.longitudes[stores])
+
+
+def parse_location(location: Optional[dict]) -> Optional[Tuple[float, float]]:
+    """
+    Read (lat, lon) from a client location object
+
+    Accepts lat/lng, lat/lon or latitude/longitude keys.
+
+    Returns:
+        (lat, lon), or None when the object has no usable coordinates
+    """
+    if not location:
+        return None
+    lat = location.get("lat", location.get("latitude"))
+    lon = location.get("lng", location.get("lon", location.get("longitude")))
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+
+def geo_point(lat: float, lon: float) -> dict:
+    """GeoJSON point for a 2dsphere index (coordinates are lon, lat)"""
+    return {"type": "Point", "coordinates": [lon, lat]}
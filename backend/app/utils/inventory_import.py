@@ -0,0 +1,291 @@
+"""
+Inventory Import Utility
+Streams seller catalog uploads (CSV or XLSX) into the inventory collection
+
+An upload is copied out of the request to a temporary file and imported by
+a background task, which reads it one batch of rows at a time in a worker
+thread, validates the rows and upserts the batch with one unordered bulk
+write keyed by (owner_email, sku), or (owner_email, name_key) for rows
+without a SKU. Only the columns a sheet has are written to existing
+items, so a restock sheet with just name and stock leaves prices,
+categories and units alone; defaults fill in the rest for new items only.
+The next batch is parsed while the previous one is written. Progress and per-row errors are kept on the
+import's document in import_jobs, so any API worker can report them.
+"""
+import asyncio
+import csv
+import logging
+import math
+import os
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from app.utils.expiry_logic import calculate_expiry_date, parse_expiry_date
+from app.utils.inventory_keys import name_key
+from app.utils.seller_inventory import seller_inventory
+
+logger = logging.getLogger(__name__)
+
+# File types an upload can be imported from
+IMPORT_FORMATS = (".csv", ".xlsx")
+
+# Rows per bulk write
+IMPORT_BATCH_SIZE = 1000
+
+# Row errors kept on an import job; later ones are only counted
+IMPORT_ERROR_LIMIT = 1000
+
+# Values new items get for the columns a sheet leaves out
+IMPORT_DEFAULTS = {"category": "", "price": 0.0, "stock": 0, "unit": "pcs"}
+
+# Header spellings accepted for each inventory field
+COLUMN_ALIASES = {
+    "sku": "sku", "item_id": "sku", "barcode": "sku", "product_id": "sku",
+    "name": "name", "item_name": "name", "product": "name", "product_name": "name",
+    "category": "category",
+    "price": "price", "unit_price": "price",
+    "stock": "stock", "quantity": "stock", "qty": "stock", "stock_quantity": "stock",
+    "unit": "unit",
+    "expiry_date": "expiry_date", "expiry": "expiry_date", "expires": "expiry_date",
+}
+
+_running = set()
+
+
+def column_fields(header) -> List[Optional[str]]:
+    """Inventory field of each upload column, None for columns that are ignored"""
+    return [COLUMN_ALIASES.get("_".join(str(column or "").strip().lower().split())) for column in header]
+
+
+def _csv_rows(path: str) -> Iterator[tuple]:
+    # utf-8-sig drops the byte order mark spreadsheet exports start with
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        yield from csv.reader(f)
+
+
+def _xlsx_rows(path: str) -> Iterator[tuple]:
+    from openpyxl import load_workbook
+
+    # Read-only mode streams the sheet instead of loading it
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def read_upload_rows(path: str, filename: str) -> Iterator[Tuple[int, dict]]:
+    """
+    Stream the rows of an uploaded sheet
+
+    Args:
+        path: File holding the upload
+        filename: Original name, whose extension picks the format
+
+    Returns:
+        (sheet row number, {field: value}) for every non-empty data row
+    """
+    rows = _xlsx_rows(path) if filename.lower().endswith(".xlsx") else _csv_rows(path)
+    header = next(rows, None)
+    if header is None:
+        return
+    fields = column_fields(header)
+    if "name" not in fields:
+        raise ValueError("The first row must be a header with at least a name column")
+
+    for row_number, values in enumerate(rows, start=2):
+        row = {field: value for field, value in zip(fields, values) if field and value not in (None, "")}
+        if row:
+            yield row_number, row
+
+
+def _number(row: dict, field: str, default: float) -> float:
+    value = row.get(field)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return default
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be a number, got {value!r}")
+    if not math.isfinite(number) or number < 0:
+        raise ValueError(f"{field} must be zero or more, got {value!r}")
+    return number
+
+
+def validate_row(row: dict) -> dict:
+    """
+    Inventory fields of one upload row
+
+    Only the fields whose cells are filled in are returned, so an import
+    never overwrites a value the sheet does not carry. Rows without a SKU
+    get no sku field; they are upserted by their normalized name, so they
+    update items added one by one through POST /api/inventory instead of
+    duplicating them.
+
+    Raises:
+        ValueError: With the reason the row cannot be imported
+    """
+    name = str(row.get("name", "")).strip()
+    if not name:
+        raise ValueError("name is required")
+
+    item = {"name": name, "name_key": name_key(name)}
+    if "stock" in row:
+        stock = _number(row, "stock", 0)
+        if not stock.is_integer():
+            raise ValueError(f"stock must be a whole number, got {row['stock']!r}")
+        item["stock"] = int(stock)
+    if "price" in row:
+        item["price"] = _number(row, "price", 0.0)
+    for field in ("category", "unit"):
+        value = str(row.get(field, "")).strip()
+        if value:
+            item[field] = value
+
+    sku = row.get("sku", "")
+    if isinstance(sku, float) and sku.is_integer():
+        # Spreadsheets store numeric codes as floats
+        sku = int(sku)
+    sku = str(sku).strip()
+    if sku:
+        item["sku"] = sku
+
+    expiry_date = row.get("expiry_date")
+    if isinstance(expiry_date, str):
+        expiry_date = expiry_date.strip()
+    try:
+        expiry_date = parse_expiry_date(expiry_date)
+    except ValueError:
+        raise ValueError(f"expiry_date must be an ISO 8601 date, got {row['expiry_date']!r}")
+    if expiry_date is not None:
+        item["expiry_date"] = expiry_date
+    return item
+
+
+def parse_batch(rows: Iterator[Tuple[int, dict]], size: int = IMPORT_BATCH_SIZE) -> Tuple[int, List[tuple], List[dict]]:
+    """
+    Read and validate the next batch of rows
+
+    Returns:
+        (rows read, [(row number, item)], [{"row", "error"}]); no rows read at the end
+    """
+    read, items, errors = 0, [], []
+    for row_number, row in rows:
+        read += 1
+        try:
+            items.append((row_number, validate_row(row)))
+        except ValueError as e:
+            errors.append({"row": row_number, "error": str(e)})
+        if read == size:
+            break
+    return read, items, errors
+
+
+def batch_operations(owner_email: str, items: List[tuple], now: datetime) -> Tuple[List[UpdateOne], List[int]]:
+    """
+    Upserts for one validated batch, with the sheet row of each
+
+    The fields a row has are set; IMPORT_DEFAULTS and an expiry date
+    computed from the category (once per category for the batch) are only
+    written when the row inserts a new item. A SKU (or, without one, a
+    name) repeated within the batch keeps its last row.
+    """
+    expiry_by_category: Dict[str, datetime] = {}
+    latest = {}
+    for row_number, item in items:
+        key = ("sku", item["sku"]) if "sku" in item else ("name_key", item["name_key"])
+        latest[key] = (row_number, item)
+
+    operations, row_numbers = [], []
+    for (field, value), (row_number, item) in latest.items():
+        item.pop(field, None)
+        on_insert = {name: default for name, default in IMPORT_DEFAULTS.items() if name not in item}
+        on_insert["created_at"] = now
+        category = item.get("category")
+        if "expiry_date" not in item and category:
+            if category not in expiry_by_category:
+                expiry_by_category[category] = calculate_expiry_date(category, now)
+            on_insert["expiry_date"] = expiry_by_category[category]
+        operations.append(UpdateOne(
+            {"owner_email": owner_email, field: value},
+            {"$set": {**item, "updated_at": now}, "$setOnInsert": on_insert},
+            upsert=True
+        ))
+        row_numbers.append(row_number)
+    return operations, row_numbers
+
+
+async def write_batch(db, operations: List[UpdateOne], row_numbers: List[int]) -> Tuple[int, int, List[dict]]:
+    """Run one batch of upserts; returns (inserted, updated, row errors)"""
+    if not operations:
+        return 0, 0, []
+    try:
+        result = await db.inventory.bulk_write(operations, ordered=False)
+        return result.upserted_count, result.matched_count, []
+    except BulkWriteError as e:
+        details = e.details
+        errors = [{"row": row_numbers[error["index"]], "error": error.get("errmsg", "write failed")}
+                  for error in details.get("writeErrors", [])]
+        return details.get("nUpserted", 0), details.get("nMatched", 0), errors
+
+
+async def record_progress(db, job_id, read: int, inserted: int, updated: int, errors: List[dict]):
+    """Add one batch's counts and errors to the job"""
+    update = {
+        "$inc": {"rows_read": read, "inserted": inserted, "updated": updated, "error_count": len(errors)},
+        "$set": {"updated_at": datetime.utcnow()},
+    }
+    if errors:
+        update["$push"] = {"errors": {"$each": errors, "$slice": IMPORT_ERROR_LIMIT}}
+    await db.import_jobs.update_one({"_id": job_id}, update)
+
+
+async def run_import(db, job_id, owner_email: str, path: str, filename: str):
+    """Import an uploaded sheet, recording progress on the job"""
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await db.import_jobs.update_one({"_id": job_id}, {"$set": {"status": "running", "started_at": datetime.utcnow()}})
+    total = 0
+    try:
+        rows = read_upload_rows(path, filename)
+        batch = await loop.run_in_executor(None, parse_batch, rows)
+        while batch[0]:
+            read, items, errors = batch
+            operations, row_numbers = batch_operations(owner_email, items, datetime.utcnow())
+            # Parse the next batch while this one is written
+            writing = asyncio.ensure_future(write_batch(db, operations, row_numbers))
+            try:
+                batch = await loop.run_in_executor(None, parse_batch, rows)
+            finally:
+                inserted, updated, write_errors = await writing
+            await record_progress(db, job_id, read, inserted, updated, errors + write_errors)
+            total += read
+
+        elapsed = loop.time() - started
+        await db.import_jobs.update_one({"_id": job_id}, {"$set": {
+            "status": "completed",
+            "finished_at": datetime.utcnow(),
+            "rows_per_second": round(total / max(elapsed, 1e-9)),
+        }})
+        logger.info(f"Inventory import {job_id} for {owner_email}: {total} rows in {elapsed:.2f}s")
+
+    except Exception as e:
+        # A ValueError is a problem with the file itself, no traceback needed
+        logger.error(f"Inventory import {job_id} failed: {str(e)}", exc_info=not isinstance(e, ValueError))
+        await db.import_jobs.update_one({"_id": job_id}, {"$set": {
+            "status": "failed",
+            "detail": str(e),
+            "finished_at": datetime.utcnow(),
+        }})
+    finally:
+        os.remove(path)
+        await seller_inventory.invalidate(db, owner_email)
+
+
+def start_import(db, job_id, owner_email: str, path: str, filename: str):
+    """Run an import in the background, keeping the task referenced until it ends"""
+    task = asyncio.create_task(run_import(db, job_id, owner_email, path, filename))
+    _running.add(task)
+    task.add_done_callback(_running.discard)
+    return task
@@ -0,0 +1,14 @@
+"""
+Inventory Keys Utility
+Normalized lookup keys stored on seller inventory items
+"""
+
+
+def name_key(name: str) -> str:
+    """
+    Lookup key for an item name: lowercase with whitespace collapsed
+
+    Stored as name_key next to the name and indexed with owner_email, so
+    "Amul  Milk" and "amul milk" find the same item with an exact match.
+    """
+    return " ".join(str(name or "").lower().split())
@@ -0,0 +1,88 @@
+"""
+Match Cache Utility
+Bounded LRU cache with TTL for grocery-list match results
+"""
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+# Entries kept per worker (0 disables the cache) and their lifetime in seconds
+MATCH_CACHE_SIZE = int(os.getenv("MATCH_CACHE_SIZE", "1024"))
+MATCH_CACHE_TTL = float(os.getenv("MATCH_CACHE_TTL", "300"))
+
+
+class MatchCache:
+    """
+    LRU cache of match responses for one catalog version at a time
+
+    Every lookup names the catalog version it is answering for; when that
+    differs from the version the entries were computed on, the cache is
+    emptied first, so a reload never serves results from the old catalog.
+    """
+
+    def __init__(self, max_entries: int = MATCH_CACHE_SIZE, ttl: float = MATCH_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version: Optional[str] = None
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _use_version(self, version: str):
+        if version != self.version:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+            self.version = version
+
+    def get(self, version: str, key: Hashable) -> Optional[Any]:
+        """Return the cached result for key, or None on a miss"""
+        self._use_version(version)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, version: str, key: Hashable, value: Any):
+        """Store a result, evicting the least recently used entries when full"""
+        if self.max_entries <= 0:
+            return
+        self._use_version(version)
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "version": self.version,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+match_cache = MatchCache()
@@ -0,0 +1,228 @@
+"""
+Match Pool Utility
+Process pool that matches grocery lists in parallel for batch requests
+
+The parent writes each catalog version it serves to a snapshot file once,
+and workers map that file rather than loading the catalog themselves, so
+with CATALOG_SOURCE=mongo they never query MongoDB and the catalog columns
+are shared page cache across every worker. Each worker builds only the
+indexes matching reads over the mapped columns (item search and store
+locations), once per version on its first basket.
+
+Published files are reference counted: every caller holding a handle and
+every basket queued or running on it counts as a user, and a superseded
+version's file is removed only once its last user is done.
+"""
+import multiprocessing
+import os
+import pickle
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+from app.utils.catalog import Catalog, open_snapshot, write_snapshot
+from app.utils.catalog_registry import CatalogBundle
+from app.utils.geo_index import GeoIndex
+from app.utils.shop_index import ShopIndex
+from app.utils.shop_matching import match_basket
+
+# Worker processes for batch matching (defaults to one per core)
+MATCH_POOL_WORKERS = int(os.getenv("MATCH_POOL_WORKERS", "0")) or os.cpu_count() or 1
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+# Parent side: files written for the pool, by kind and then catalog version or
+# seller generation (latest last), and how many handles and baskets use each
+_published = {"catalog": {}, "sellers": {}}
+_users: Dict[str, int] = {}
+_publish_lock = threading.Lock()
+
+
+class MatchBundle:
+    """The parts of a CatalogBundle that match_basket reads, built in pool workers"""
+
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        self.version = catalog.version
+        self.shop_index = ShopIndex(catalog)
+        self.geo_index = GeoIndex(catalog.store_lat, catalog.store_lon)
+
+
+# Worker side: the catalog bundle and seller snapshot last loaded
+_worker_catalog: Optional[MatchBundle] = None
+_worker_sellers: Optional[tuple] = None
+
+
+def _publish(kind: str, key, extension: str, write: Callable[[str], None]) -> str:
+    """Write a file for pool workers once per key and take a reference to it"""
+    with _publish_lock:
+        files = _published[kind]
+        path = files.get(key)
+        if path is None:
+            path = os.path.join(tempfile.gettempdir(), f"corelia-{kind}-{os.getpid()}-{key}.{extension}")
+            write(path)
+            files[key] = path
+        _users[path] = _users.get(path, 0) + 1
+        _prune()
+        return path
+
+
+def _prune():
+    """Remove superseded files no handle or basket still uses; the caller holds the lock"""
+    for files in _published.values():
+        # The latest key's file stays for the next batch even when idle
+        for key in list(files)[:-1]:
+            if not _users.get(files[key]):
+                path = files.pop(key)
+                _users.pop(path, None)
+                _remove(path)
+
+
+def release(*handles: Optional[Tuple[object, str]]):
+    """
+    Drop references taken by publish_catalog, publish_sellers or submit_match
+
+    Args:
+        handles: (key, path) handles to release, None entries are skipped
+    """
+    with _publish_lock:
+        for handle in handles:
+            # Files removed at shutdown have no count left to drop
+            if handle is not None and handle[1] in _users:
+                _users[handle[1]] -= 1
+        _prune()
+
+
+def publish_catalog(bundle: CatalogBundle) -> Tuple[str, str]:
+    """
+    Write a catalog version where pool workers can map it
+
+    The caller holds a reference until it calls release, so the file
+    outlives a newer version being published meanwhile.
+
+    Returns:
+        (version, path) to pass to submit_match
+    """
+    return bundle.version, _publish("catalog", bundle.version, "snapshot",
+                                    lambda path: write_snapshot(bundle.catalog, path))
+
+
+def _write_pickle(value, path: str):
+    with open(f"{path}.tmp", "wb") as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f"{path}.tmp", path)
+
+
+def publish_sellers(snapshot) -> Tuple[int, str]:
+    """
+    Write a seller snapshot where pool workers can load it
+
+    Runs once per generation however many baskets use it, so tasks only
+    carry the generation and path rather than the pickled snapshot. The
+    caller holds a reference until it calls release.
+
+    Returns:
+        (generation, path) to pass to submit_match
+    """
+    return snapshot.generation, _publish("sellers", snapshot.generation, "pickle",
+                                         lambda path: _write_pickle(snapshot, path))
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _load_catalog(catalog: Tuple[str, str]) -> MatchBundle:
+    """Matching indexes for a task, built over the parent's snapshot only when the version changed"""
+    global _worker_catalog
+    version, path = catalog
+    if _worker_catalog is None or _worker_catalog.version != version:
+        _worker_catalog = MatchBundle(open_snapshot(path))
+    return _worker_catalog
+
+
+def _load_sellers(sellers: Optional[Tuple[int, str]]):
+    """Seller snapshot for a task, read from disk only when the generation changed"""
+    global _worker_sellers
+    if sellers is None:
+        return None
+    generation, path = sellers
+    if _worker_sellers is None or _worker_sellers[0] != generation:
+        with open(path, "rb") as f:
+            _worker_sellers = (generation, pickle.load(f))
+    return _worker_sellers[1]
+
+
+def match_in_worker(catalog: Tuple[str, str], request: dict,
+                    sellers: Optional[Tuple[int, str]] = None) -> Tuple[str, dict, tuple]:
+    """
+    Match one basket inside a pool worker
+
+    Args:
+        catalog: (version, path) from publish_catalog for the version the caller is serving
+        request: Keyword arguments for match_basket, without the bundle
+        sellers: (generation, path) from publish_sellers, to match registered sellers too
+
+    Returns:
+        (catalog version used, match result, seller stamp)
+    """
+    bundle = _load_catalog(catalog)
+    return (bundle.version, *match_basket(bundle, sellers=_load_sellers(sellers), **request))
+
+
+def submit_match(catalog: Tuple[str, str], request: dict,
+                 sellers: Optional[Tuple[int, str]] = None) -> Future:
+    """
+    Queue one basket on the pool
+
+    The basket holds its own references to the published files until its
+    worker is done with them, or until it is cancelled before starting.
+
+    Args:
+        catalog: (version, path) from publish_catalog
+        request: Keyword arguments for match_basket, without the bundle
+        sellers: (generation, path) from publish_sellers, if sellers are matched
+
+    Returns:
+        Future resolving to match_in_worker's result
+    """
+    handles = (catalog, sellers)
+    with _publish_lock:
+        for handle in handles:
+            if handle is not None:
+                _users[handle[1]] = _users.get(handle[1], 0) + 1
+    try:
+        future = get_match_pool().submit(match_in_worker, catalog, request, sellers)
+    except Exception:
+        release(*handles)
+        raise
+    future.add_done_callback(lambda _: release(*handles))
+    return future
+
+
+def get_match_pool() -> ProcessPoolExecutor:
+    """Start the pool on first use"""
+    global _pool
+    if _pool is None:
+        # Spawned rather than forked: the API process runs an event loop and threads
+        _pool = ProcessPoolExecutor(
+            max_workers=MATCH_POOL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_match_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+    with _publish_lock:
+        for files in _published.values():
+            for path in files.values():
+                _remove(path)
+            files.clear()
+        _users.clear()
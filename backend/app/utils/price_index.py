@@ -0,0 +1,71 @@
+"""
+Price Index Utility
+Per-product offers sorted by price, with price statistics, for cross-store comparison
+"""
+from typing import Dict, List, Optional
+import numpy as np
+from app.utils.shop_index import ShopIndex
+
+
+class PriceIndex:
+    """
+    Offers of every catalog item across stores, cheapest first
+
+    Built from the ShopIndex postings when the catalog loads. Each item
+    keeps its stores and prices as arrays sorted by price, so the cheapest
+    N offers are a slice and offers under a budget are one binary search.
+    A store listing an item twice only offers its lower price.
+    """
+
+    def __init__(self, shop_index: ShopIndex):
+        self.shop_index = shop_index
+        self.offer_stores: List[np.ndarray] = []
+        self.offer_prices: List[np.ndarray] = []
+        self.stats: List[dict] = []
+        self.item_lookup: Dict[str, int] = {name.lower(): item_id for item_id, name in enumerate(shop_index.item_names)}
+
+        for item_id in range(len(shop_index.item_names)):
+            stores, _, prices, _ = shop_index.postings[item_id]
+            order = np.lexsort((stores, prices))
+            _, first = np.unique(stores[order], return_index=True)
+            order = order[np.sort(first)]
+            stores, prices = stores[order], prices[order]
+            self.offer_stores.append(stores)
+            self.offer_prices.append(prices)
+            self.stats.append(self._price_stats(prices))
+
+    @staticmethod
+    def _price_stats(prices: np.ndarray) -> dict:
+        if len(prices) == 0:
+            return {"stores": 0, "min": None, "median": None, "p90": None, "max": None}
+        return {
+            "stores": int(len(prices)),
+            "min": round(float(prices[0]), 2),
+            "median": round(float(np.median(prices)), 2),
+            "p90": round(float(np.percentile(prices, 90)), 2),
+            "max": round(float(prices[-1]), 2),
+        }
+
+    def find_items(self, name: str) -> List[int]:
+        """Item ids for a product name: the exact name if known, else the fuzzy matches"""
+        item_id = self.item_lookup.get(name.lower().strip())
+        if item_id is not None:
+            return [item_id]
+        return self.shop_index.resolve(name.lower().strip())
+
+    def cheapest(self, item_id: int, limit: int, max_price: Optional[float] = None):
+        """
+        Cheapest offers for an item
+
+        Args:
+            item_id: Catalog item id
+            limit: Maximum number of offers
+            max_price: Only offers at or below this price
+
+        Returns:
+            (store indices, prices), cheapest first
+        """
+        prices = self.offer_prices[item_id]
+        end = len(prices) if max_price is None else int(np.searchsorted(prices, max_price, side="right"))
+        end = min(end, limit)
+        return self.offer_stores[item_id][:end], prices[:end]
@@ -0,0 +1,143 @@
+"""
+Reservations Utility
+Checkout holds on seller stock, released again when they expire
+
+A hold takes stock with one conditional update of the inventory item that
+also pushes {id, quantity, expires_at} onto its holds array, so the item
+itself records what it lent out. Confirming a reservation pulls its holds
+and keeps the stock deducted; cancelling or expiring pulls them and puts
+the stock back. Every step is a single-document update guarded by the hold
+id, so concurrent checkouts, confirms and sweepers on the same hot item
+never need a lock and never release a hold twice.
+
+A reservation only moves out of "held" once, to "confirmed" before
+expires_at or to "expired" / "released", so a hold is either kept or
+returned, never both.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Iterable, Optional
+from pymongo import UpdateOne
+from app.utils.seller_inventory import seller_inventory
+
+logger = logging.getLogger(__name__)
+
+# How long checkout may hold stock before it goes back on sale
+RESERVATION_HOLD_SECONDS = int(os.getenv("RESERVATION_HOLD_SECONDS", "600"))
+
+# Seconds between sweeps for expired holds (0 disables the sweeper)
+RESERVATION_SWEEP_INTERVAL = float(os.getenv("RESERVATION_SWEEP_INTERVAL", "15"))
+
+# Reservation documents are dropped by the TTL index this long after expiry
+RESERVATION_RETENTION_SECONDS = 24 * 60 * 60
+
+# Inventory items released per sweep round trip
+SWEEP_BATCH_SIZE = 500
+
+
+def release_operation(item_id, reservation_id, quantity: Optional[int] = None) -> UpdateOne:
+    """
+    Pull one reservation's hold off an item
+
+    Args:
+        item_id: Inventory item _id
+        reservation_id: Reservation _id the hold was placed under
+        quantity: Units to put back on sale, None to keep them deducted
+
+    Returns:
+        Update that only matches while the hold is still there
+    """
+    update = {"$pull": {"holds": {"id": reservation_id}}}
+    if quantity is not None:
+        update["$inc"] = {"stock": quantity}
+    return UpdateOne({"_id": item_id, "holds.id": reservation_id}, update)
+
+
+async def release_holds(db, reservation_id, holds: Iterable[dict], restock: bool = True) -> int:
+    """
+    Pull a reservation's holds in one bulk write
+
+    Args:
+        db: Database
+        reservation_id: Reservation _id
+        holds: The reservation's held items ({item_id, owner_email, quantity})
+        restock: Put the held units back on sale
+
+    Returns:
+        Number of holds pulled by this call
+    """
+    holds = list(holds)
+    if not holds:
+        return 0
+    operations = [
+        release_operation(hold["item_id"], reservation_id, hold["quantity"] if restock else None)
+        for hold in holds
+    ]
+    result = await db.inventory.bulk_write(operations, ordered=False)
+    if restock:
+        await seller_inventory.invalidate(db, *{hold["owner_email"] for hold in holds}, items_changed=False)
+    return result.modified_count
+
+
+async def sweep_expired_holds(db, now: Optional[datetime] = None) -> int:
+    """
+    Return the stock of expired holds
+
+    Reads items through the holds.expires_at index rather than the
+    reservations, so holds are returned even when their reservation was
+    never finished writing or has already been dropped by the TTL index.
+
+    Returns:
+        Number of inventory items looked at, SWEEP_BATCH_SIZE when more remain
+    """
+    now = now or datetime.utcnow()
+    # From here on these can no longer be confirmed
+    await db.reservations.update_many(
+        {"status": "held", "expires_at": {"$lte": now}},
+        {"$set": {"status": "expired"}}
+    )
+
+    items_cursor = db.inventory.find(
+        {"holds.expires_at": {"$lte": now}},
+        {"owner_email": 1, "holds": 1}
+    ).limit(SWEEP_BATCH_SIZE)
+    items = await items_cursor.to_list(length=None)
+    expired = [
+        (item, hold) for item in items
+        for hold in item.get("holds", []) if hold["expires_at"] <= now
+    ]
+    if not expired:
+        return 0
+
+    # Holds of reservations confirmed in time stay deducted
+    confirmed_cursor = db.reservations.find(
+        {"_id": {"$in": list({hold["id"] for _, hold in expired})}, "status": "confirmed"},
+        {"_id": 1}
+    )
+    confirmed = {reservation["_id"] for reservation in await confirmed_cursor.to_list(length=None)}
+
+    operations = [
+        release_operation(item["_id"], hold["id"], None if hold["id"] in confirmed else hold["quantity"])
+        for item, hold in expired
+    ]
+    result = await db.inventory.bulk_write(operations, ordered=False)
+    restocked = {item["owner_email"] for item, hold in expired if hold["id"] not in confirmed}
+    await seller_inventory.invalidate(db, *restocked, items_changed=False)
+
+    logger.info(f"Released {result.modified_count} expired holds on {len(items)} inventory items")
+    return len(items)
+
+
+async def sweep_reservations(db, interval: float = RESERVATION_SWEEP_INTERVAL):
+    """Periodically return the stock of expired holds"""
+    if db is None or interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            while await sweep_expired_holds(db) >= SWEEP_BATCH_SIZE:
+                pass
+        except Exception as e:
+            logger.error(f"Reservation sweep failed: {str(e)}")
@@ -0,0 +1,345 @@
+"""
+Seller Inventory Utility
+Snapshot of registered sellers' inventories so the grocery-list matcher can offer their shops
+"""
+import asyncio
+import logging
+import os
+import time
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+import scipy.sparse as sp
+from bson import ObjectId
+from app.utils.geo_index import haversine_km
+from app.utils.shop_index import BasketMatch, MATCH_RELATIVE_MARGIN, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Sellers have no review-based rating yet; same default as the nearby-shops listing
+SELLER_RATING = 4.5
+
+# Longest a worker serves seller stock before checking for writes made by other workers
+SELLER_SYNC_INTERVAL = float(os.getenv("SELLER_SYNC_INTERVAL", "2"))
+
+# Inventory documents per round trip when reloading sellers
+SELLER_LOAD_BATCH_SIZE = 1000
+
+
+def item_vectors(bundle, names: List[str]):
+    """TF-IDF vectors of item names as columns, in the catalog vectorizer's space"""
+    vectorizer = bundle.shop_index.vectorizer
+    if vectorizer is None or not names:
+        return None
+    return vectorizer.transform([" ".join(tokenize(name)) for name in names]).T.tocsr()
+
+
+def seller_part(seller: dict, bundle=None) -> dict:
+    """
+    One seller's shop, item arrays and item vectors, as a snapshot is assembled from
+
+    Args:
+        seller: User document with the seller's inventory items under "items"
+        bundle: Catalog bundle to vectorize the item names for, None to leave them to the first match
+
+    Returns:
+        Plain dict, rebuilt only when the seller's inventory_version moves
+    """
+    coordinates = (seller.get("location") or {}).get("coordinates")
+    items = [item for item in seller.get("items", []) if item.get("name")]
+    names = [item["name"] for item in items]
+    return {
+        "version": str(seller.get("inventory_version")),
+        "shop": {
+            "id": seller.get("shop_id"),
+            "name": seller.get("shop_name", "Unnamed Shop"),
+            "location": seller.get("business_address", ""),
+            "rating": SELLER_RATING
+        },
+        "lat": coordinates[1] if coordinates else np.nan,
+        "lon": coordinates[0] if coordinates else np.nan,
+        "item_names": names,
+        "item_price": np.array([float(item.get("price") or 0) for item in items], dtype=np.float64),
+        "item_stock": np.array([int(item.get("stock") or 0) for item in items], dtype=np.int64),
+        "vectors": item_vectors(bundle, names) if bundle is not None else None,
+        "vectors_version": bundle.version if bundle is not None else None,
+    }
+
+
+class SellerSnapshot:
+    """
+    Immutable view of every seller's inventory at one generation
+
+    Items of all sellers sit in flat arrays tagged with the seller position,
+    so one sparse product compares a grocery list with every seller item.
+    Each seller offers the item most similar to an entry, provided it is
+    resolved the way catalog items are: at least MATCH_SIMILARITY_THRESHOLD
+    and within MATCH_RELATIVE_MARGIN of the entry's best match in the
+    catalog or any seller, so "milk" does not pick "Dairy Milk Chocolate".
+
+    A snapshot is assembled from per-seller parts whose item vectors were
+    computed when the seller last changed, so only the arrays are joined.
+    Snapshots are plain data: the batch match pool gets each generation
+    written to disk once, vectors included, and every worker keeps the one
+    it loaded until the generation changes.
+    """
+
+    def __init__(self, generation: int, parts: List[dict], listing: int = 0):
+        self.generation = generation
+        # Digest of what decides which sellers can match an entry: names and shops, not stock
+        self.listing = listing
+        self.shops: List[dict] = [part["shop"] for part in parts]
+        self.versions: List[str] = [part["version"] for part in parts]
+        self.lats = np.array([part["lat"] for part in parts], dtype=np.float64)
+        self.lons = np.array([part["lon"] for part in parts], dtype=np.float64)
+        self.item_names: List[str] = [name for part in parts for name in part["item_names"]]
+        self.item_sellers = np.repeat(
+            np.arange(len(parts), dtype=np.int32), [len(part["item_names"]) for part in parts]
+        ).astype(np.int32)
+        self.item_price = np.concatenate([part["item_price"] for part in parts] or [np.empty(0)])
+        self.item_stock = np.concatenate([part["item_stock"] for part in parts] or [np.empty(0, dtype=np.int64)])
+        self.ratings = np.full(len(self.shops), SELLER_RATING)
+
+        # Join the sellers' vectors when they were all made for one catalog version
+        self._vectors = None
+        self._vectors_version: Optional[str] = None
+        stocked = [part for part in parts if part["item_names"]]
+        versions = {part["vectors_version"] for part in stocked}
+        if stocked and len(versions) == 1 and all(part["vectors"] is not None for part in stocked):
+            self._vectors = sp.hstack([part["vectors"] for part in stocked], format="csr")
+            self._vectors_version = versions.pop()
+
+    def __len__(self) -> int:
+        return len(self.shops)
+
+    def _item_vectors(self, bundle):
+        if self._vectors_version != bundle.version:
+            self._vectors = item_vectors(bundle, self.item_names)
+            self._vectors_version = bundle.version
+        return self._vectors
+
+    def stamp(self, sellers: np.ndarray) -> Tuple[Tuple[int, str], ...]:
+        """(position, inventory version) of the given sellers, to tell later whether they changed"""
+        return tuple((int(seller), self.versions[seller]) for seller in sellers)
+
+    def is_current(self, stamp: Tuple[Tuple[int, str], ...]) -> bool:
+        """Whether the stamped sellers still hold the same inventory in this snapshot"""
+        return all(seller < len(self.versions) and self.versions[seller] == version for seller, version in stamp)
+
+    def distances(self, lat: float, lon: float, sellers: np.ndarray) -> np.ndarray:
+        """Distances in km to the given seller positions, NaN for sellers without a location"""
+        return haversine_km(lat, lon, self.lats[sellers], self.lons[sellers])
+
+    def match(self, bundle, requested_items: List[str], quantities: np.ndarray,
+              user_location: Optional[Tuple[float, float]] = None,
+              radius_km: Optional[float] = None) -> BasketMatch:
+        """
+        Look up which sellers carry each requested item
+
+        Args:
+            bundle: Catalog bundle whose vectorizer resolves the entries
+            requested_items: Normalized grocery-list entries
+            quantities: Units wanted of each entry
+            user_location: (lat, lon) of the customer, if known
+            radius_km: Only consider sellers this close to user_location
+
+        Returns:
+            BasketMatch over the sellers with at least one hit; item ids index item_names
+        """
+        index = bundle.shop_index
+        columns = len(requested_items)
+        empty = BasketMatch(np.empty(0, dtype=np.int32), np.empty((0, columns), dtype=np.int32),
+                            np.empty((0, columns)), np.empty((0, columns), dtype=np.int64), quantities)
+        if not self.item_names or index.vectorizer is None:
+            return empty
+
+        eligible = np.ones(len(self.shops), dtype=bool)
+        if radius_km is not None:
+            with np.errstate(invalid="ignore"):
+                eligible = self.distances(*user_location, np.arange(len(self.shops))) <= radius_km
+
+        queries = [" ".join(tokenize(name)) for name in requested_items]
+        similarity = (index.vectorizer.transform(queries) @ self._item_vectors(bundle)).toarray()
+        similarity[:, ~eligible[self.item_sellers]] = 0.0
+        # Same best-match margin as catalog resolution, over catalog and seller items
+        cutoff = np.maximum(index.match_cutoffs(requested_items), similarity.max(axis=1) * MATCH_RELATIVE_MARGIN)
+
+        # Per entry, each seller's most similar item; ties go to the cheaper one
+        hits = []
+        for position in range(columns):
+            items = np.flatnonzero(similarity[position] >= cutoff[position])
+            order = np.lexsort((self.item_price[items], -similarity[position, items], self.item_sellers[items]))
+            sellers, first = np.unique(self.item_sellers[items[order]], return_index=True)
+            hits.append((sellers, items[order[first]]))
+
+        if not any(len(sellers) for sellers, _ in hits):
+            return empty
+        stores, inverse = np.unique(np.concatenate([sellers for sellers, _ in hits]), return_inverse=True)
+        item_matrix = np.full((len(stores), columns), -1, dtype=np.int32)
+        offset = 0
+        for position, (sellers, items) in enumerate(hits):
+            item_matrix[inverse[offset:offset + len(sellers)], position] = items
+            offset += len(sellers)
+
+        found = item_matrix >= 0
+        price_matrix = np.where(found, self.item_price[item_matrix], 0.0)
+        stock_matrix = np.where(found, self.item_stock[item_matrix], 0)
+        return BasketMatch(stores.astype(np.int32), item_matrix, price_matrix, stock_matrix, quantities)
+
+
+class SellerInventoryCache:
+    """
+    Seller snapshots kept in step across API workers
+
+    Every write to a seller's shop or inventory stamps a fresh
+    inventory_version on the seller's user document, and writes that can
+    change item names or shop details also stamp items_version. A worker
+    compares the versions of all sellers, one covered index scan, at most
+    every SELLER_SYNC_INTERVAL seconds and right after its own writes, then
+    reloads and re-vectorizes only the sellers whose version moved, in a
+    thread off the event loop, and joins the unchanged sellers' parts as
+    they are.
+
+    The snapshot generation digests every inventory_version, so workers
+    holding the same data publish the same files. Match results are cached
+    under the listing digest of items_version instead, stamped with the
+    inventory versions of the sellers they matched, so a checkout at one
+    seller only drops the cached baskets that seller took part in.
+    """
+
+    def __init__(self):
+        self._parts: Dict[str, dict] = {}
+        self._versions: Dict[str, Tuple[str, str]] = {}
+        self._dirty: Set[str] = set()
+        self._synced_at: Optional[float] = None
+        self._catalog_version: Optional[str] = None
+        self._lock = asyncio.Lock()
+        self.generation = 0
+        self.snapshot: Optional[SellerSnapshot] = None
+
+    async def invalidate(self, db, *owner_emails: str, items_changed: bool = True):
+        """
+        Publish a change to these sellers' shop or inventory to every worker
+
+        Args:
+            db: Database
+            owner_emails: Sellers whose data changed
+            items_changed: False when only stock or prices moved, which keeps
+                the match cache entries of baskets these sellers had no part in
+        """
+        self._dirty.update(owner_emails)
+        if db is not None and owner_emails:
+            version = str(ObjectId())
+            update = {"inventory_version": version}
+            if items_changed:
+                update["items_version"] = version
+            await db.users.update_many(
+                {"email": {"$in": sorted(set(owner_emails))}, "role": "seller"},
+                {"$set": update}
+            )
+
+    async def get(self, db, bundle) -> Optional[SellerSnapshot]:
+        """
+        Current seller snapshot, synced first when due or after a local write
+
+        Args:
+            db: Database handle, None in demo mode
+            bundle: Catalog bundle the request matches against; item vectors follow its version
+
+        Returns:
+            SellerSnapshot, or None without a database or before a first successful load
+        """
+        if db is None:
+            return None
+        if not self._due(bundle):
+            return self.snapshot
+
+        async with self._lock:
+            if self._due(bundle):
+                dirty = set(self._dirty)
+                try:
+                    await self._sync(db, dirty, bundle)
+                    self._dirty -= dirty
+                except Exception as e:
+                    logger.error(f"Seller inventory refresh failed: {str(e)}")
+                self._synced_at = time.monotonic()
+        return self.snapshot
+
+    def _due(self, bundle) -> bool:
+        return (self._synced_at is None or bool(self._dirty)
+                or time.monotonic() - self._synced_at >= SELLER_SYNC_INTERVAL
+                or self._catalog_version != bundle.version)
+
+    async def _sync(self, db, dirty: Set[str], bundle):
+        versions_cursor = db.users.find(
+            {"role": "seller"}, {"_id": 0, "email": 1, "inventory_version": 1, "items_version": 1}
+        )
+        versions = {seller["email"]: (str(seller.get("inventory_version")), str(seller.get("items_version")))
+                    for seller in await versions_cursor.to_list(length=None)}
+        changed = {email for email, version in versions.items()
+                   if email in dirty or self._versions.get(email) != version}
+        removed = set(self._parts) - set(versions)
+        if self.snapshot is not None and not changed and not removed and self._catalog_version == bundle.version:
+            return
+
+        sellers = await self._load(db, changed) if changed else {}
+        for email in changed - set(sellers):
+            # No longer a seller
+            versions.pop(email, None)
+            removed.add(email)
+
+        # Vectorizing and joining the arrays is CPU work, keep it off the event loop
+        loop = asyncio.get_running_loop()
+        parts = await loop.run_in_executor(None, self._rebuild, sellers, removed, bundle)
+        self._parts = parts
+        self._versions = {email: versions[email] for email in parts}
+        self._catalog_version = bundle.version
+
+        self.generation = self._digest(0)
+        # Same order in every worker, so equal generations match identically
+        self.snapshot = SellerSnapshot(
+            self.generation, [parts[email] for email in sorted(parts)], listing=self._digest(1)
+        )
+        logger.info(f"Seller inventory snapshot {self.generation}: {len(self.snapshot)} sellers, "
+                    f"{len(self.snapshot.item_names)} items, {len(sellers)} reloaded")
+
+    def _digest(self, field: int) -> int:
+        digest = "\n".join(f"{email} {version[field]}" for email, version in sorted(self._versions.items()))
+        return zlib.crc32(digest.encode("utf-8"))
+
+    def _rebuild(self, sellers: Dict[str, dict], removed: Set[str], bundle) -> Dict[str, dict]:
+        """Parts of every seller: reloaded ones rebuilt, the rest kept unless the catalog version moved"""
+        parts = {}
+        for email, part in self._parts.items():
+            if email in removed or email in sellers:
+                continue
+            if part["vectors_version"] != bundle.version:
+                part = dict(part, vectors=item_vectors(bundle, part["item_names"]), vectors_version=bundle.version)
+            parts[email] = part
+        for email, seller in sellers.items():
+            parts[email] = seller_part(seller, bundle)
+        return parts
+
+    async def _load(self, db, emails: Set[str]) -> Dict[str, dict]:
+        """Reload these sellers' shops and the three item fields matching needs"""
+        emails = sorted(emails)
+        sellers_cursor = db.users.find(
+            {"email": {"$in": emails}, "role": "seller"},
+            {"_id": 0, "email": 1, "shop_id": 1, "shop_name": 1, "business_address": 1, "location": 1,
+             "inventory_version": 1}
+        )
+        sellers = {seller["email"]: {**seller, "items": []} for seller in await sellers_cursor.to_list(length=None)}
+        # Items stream straight from the inventory collection, so no single
+        # document ever has to hold a large seller's whole catalog
+        items_cursor = db.inventory.find(
+            {"owner_email": {"$in": emails}},
+            {"_id": 0, "owner_email": 1, "name": 1, "price": 1, "stock": 1}
+        ).batch_size(SELLER_LOAD_BATCH_SIZE)
+        async for item in items_cursor:
+            seller = sellers.get(item.pop("owner_email"))
+            if seller is not None:
+                seller["items"].append(item)
+        return sellers
+
+
+seller_inventory = SellerInventoryCache()
@@ -0,0 +1,116 @@
+"""
+Shop Details Utility
+Pre-serialized shop detail payloads, with inventory paging and sorting by byte assembly
+"""
+import json
+import zlib
+from typing import List, Optional
+import numpy as np
+from app.utils.catalog_partitions import CatalogPartitions
+
+# Inventory orders a shop detail page can ask for
+INVENTORY_SORTS = ("price", "name")
+
+SHOP_HOURS = "Mon-Sun: 8:00 AM - 10:00 PM"
+
+
+def dump_json(value) -> bytes:
+    """Serialize like FastAPI's JSONResponse does"""
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def review_count(shop_id: str) -> int:
+    """Placeholder review count, stable across workers and restarts unlike hash()"""
+    return 50 + zlib.crc32(shop_id.encode("utf-8")) % 200
+
+
+class ShopDetailIndex:
+    """
+    Shop detail responses kept as JSON bytes
+
+    Each shop's header and each of its inventory rows are serialized once,
+    on the first request for that shop, together with the full default
+    response. A default request then writes bytes as they are; a paged or
+    sorted request joins the row fragments it selects through a sort order
+    computed at the same time. Rows are read straight from the catalog
+    columns, without copying them; the payloads live in the shop's
+    location partition, so they are dropped when that partition is evicted.
+    """
+
+    def __init__(self, partitions: CatalogPartitions):
+        self.catalog = partitions.catalog
+        self.partitions = partitions
+
+    def _build(self, idx: int) -> tuple:
+        catalog = self.catalog
+        store = catalog.store(idx)
+        shop = dump_json({
+            "name": store["name"],
+            "category": store["category"],
+            "rating": store["rating"],
+            "reviews": review_count(store["id"]),
+            "distance": store["distance"],
+            "location": store["location"],
+            "address": store["address"],
+            "phone": store["contact"],
+            "owner": store["owner"],
+            "hours": SHOP_HOURS,
+            "isOpen": store["isOpen"],
+        })
+        span = catalog.store_rows(idx)
+        names = [catalog.string(item) for item in catalog.row_item[span]]
+        prices = [round(float(price), 2) for price in catalog.row_price[span]]
+        rows = [dump_json({
+            "id": position,
+            "name": name,
+            "price": price,
+            "stock": int(stock),
+            "category": "Grocery"
+        }) for position, (name, price, stock) in enumerate(zip(names, prices, catalog.row_stock[span]))]
+        # Stable sorts, so equal keys keep catalog order
+        orders = {
+            "price": np.argsort(prices, kind="stable"),
+            "name": np.argsort([name.lower() for name in names], kind="stable"),
+        }
+        return shop, rows, orders, self._assemble(shop, rows, range(len(rows)))
+
+    @staticmethod
+    def _assemble(shop: bytes, rows: List[bytes], positions) -> bytes:
+        return b"".join((
+            b'{"shop":', shop,
+            b',"inventory":[', b",".join(rows[position] for position in positions),
+            b'],"inventoryTotal":', str(len(rows)).encode("ascii"), b"}",
+        ))
+
+    def payload(self, idx: int, sort: Optional[str] = None, descending: bool = False,
+                offset: int = 0, limit: Optional[int] = None) -> bytes:
+        """
+        Detail response body for a shop
+
+        Args:
+            idx: Store index in the catalog
+            sort: Order inventory by "price" or "name" (catalog order when None)
+            descending: Reverse the sort order
+            offset: Inventory rows to skip
+            limit: Maximum inventory rows (all when None)
+
+        Returns:
+            JSON bytes with shop, inventory and inventoryTotal
+        """
+        partition = self.partitions.for_store(idx)
+        entry = partition.derived.get(idx)
+        if entry is None:
+            entry = partition.derived[idx] = self._build(idx)
+            shop, rows, orders, full = entry
+            self.partitions.grow(partition, len(shop) + sum(map(len, rows)) + len(full)
+                                 + sum(order.nbytes for order in orders.values()))
+
+        shop, rows, orders, full = entry
+        if sort is None and not descending and offset == 0 and limit is None:
+            return full
+
+        order = orders[sort] if sort is not None else np.arange(len(rows))
+        if descending:
+            order = order[::-1]
+        end = None if limit is None else offset + limit
+        return self._assemble(shop, rows, order[offset:end].tolist())
@@ -0,0 +1,324 @@
+"""
+Shop Index Utility
+Item postings and a character n-gram matcher over the store catalog for grocery-list matching
+"""
+import re
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from app.utils.catalog import Catalog
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Lowest cosine similarity at which a grocery-list entry matches an item
+MATCH_SIMILARITY_THRESHOLD = 0.3
+
+# Other items also match when at least this fraction as similar as the best one
+MATCH_RELATIVE_MARGIN = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into normalized lowercase alphanumeric tokens
+
+    Args:
+        text: Raw product name or grocery-list entry
+
+    Returns:
+        List of tokens in order of appearance
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class ShopIndex:
+    """
+    Maps catalog items to (store, item, price) postings
+
+    Built once when the catalog loads, so matching a basket only touches
+    stores that carry at least one of the requested products. Grocery-list
+    entries are resolved to items through a TF-IDF index over character
+    trigrams of the item names, which tolerates misspellings. Postings and
+    the per-store rating column are NumPy arrays so a basket is resolved
+    for all candidate stores at once.
+    """
+
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        counts = np.diff(catalog.store_offsets)
+        row_store = np.repeat(np.arange(len(catalog), dtype=np.int32), counts)
+        row_rank = (np.arange(catalog.row_count) - np.repeat(catalog.store_offsets[:-1], counts)).astype(np.int32)
+        row_price = self.row_price = catalog.row_price.astype(np.float64)
+        row_stock = self.row_stock = catalog.row_stock.astype(np.int64)
+
+        # Dense item ids over the distinct item names
+        item_strings, self.row_item_ids = np.unique(catalog.row_item, return_inverse=True)
+        self.item_names: List[str] = [catalog.string(s) for s in item_strings]
+
+        # Character trigrams within word boundaries, L2-normalized so a dot product is a cosine
+        self.vectorizer: Optional[TfidfVectorizer] = None
+        if self.item_names:
+            self.vectorizer = TfidfVectorizer(analyzer="char_wb", ngram_range=(3, 3), sublinear_tf=True)
+            self.item_vectors = self.vectorizer.fit_transform(
+                [" ".join(tokenize(name)) for name in self.item_names]
+            ).T.tocsr()
+
+        # item id -> (store index, position in store inventory, price, stock)
+        order = np.argsort(self.row_item_ids, kind="stable")
+        bounds = np.searchsorted(self.row_item_ids[order], np.arange(len(self.item_names) + 1))
+        self.postings: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = {}
+        for item_id in range(len(self.item_names)):
+            rows = order[bounds[item_id]:bounds[item_id + 1]]
+            self.postings[item_id] = (row_store[rows], row_rank[rows], row_price[rows], row_stock[rows])
+
+        # Number of distinct stores carrying each item, used to rank suggestions
+        self.item_store_counts = np.array(
+            [len(np.unique(self.postings[item_id][0])) for item_id in range(len(self.item_names))], dtype=np.int64
+        )
+
+        # Normalized item names from every word onwards, sorted for prefix lookups
+        completions = sorted(
+            (" ".join(tokens[start:]), item_id)
+            for item_id, tokens in enumerate(tokenize(name) for name in self.item_names)
+            for start in range(len(tokens))
+        )
+        self.completion_keys = [key for key, _ in completions]
+        self.completion_items = [item_id for _, item_id in completions]
+        self._suggestions: Dict[str, List[int]] = {}
+
+        self.ratings = np.round(catalog.store_rating.astype(np.float64), 1)
+        self._resolved: Dict[str, List[int]] = {}
+        self._cutoffs: Dict[str, float] = {}
+        self._store_hits: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = {}
+
+    def resolve_many(self, entries: List[str]) -> List[List[int]]:
+        """
+        Resolve grocery-list entries to the catalog items they match
+
+        Entries not seen before are vectorized together and compared with
+        every item name in a single sparse matrix product. An entry matches
+        its most similar item when the cosine similarity reaches
+        MATCH_SIMILARITY_THRESHOLD, plus any item nearly as similar, so
+        "maggie" finds "Maggi Noodles" while "milk" prefers "Amul Milk"
+        over "Dairy Milk Chocolate".
+
+        Args:
+            entries: Grocery-list entries as typed by the user
+
+        Returns:
+            Sorted list of matching item ids for each entry
+        """
+        pending = [entry for entry in dict.fromkeys(entries) if entry not in self._resolved]
+        resolved, _ = self._resolve(pending)
+        return [resolved[entry] if entry in resolved else self._resolved[entry] for entry in entries]
+
+    def match_cutoffs(self, entries: List[str]) -> np.ndarray:
+        """
+        Similarity each entry's matches must reach, as resolve_many applies it
+
+        The catalog's best match for an entry sets the bar for items matched
+        elsewhere too, such as seller inventories, so they are held to the
+        same relative margin rather than the bare threshold.
+
+        Args:
+            entries: Grocery-list entries as typed by the user
+
+        Returns:
+            Cutoff per entry, at least MATCH_SIMILARITY_THRESHOLD
+        """
+        pending = [entry for entry in dict.fromkeys(entries) if entry not in self._cutoffs]
+        _, cutoffs = self._resolve(pending)
+        return np.array([cutoffs[entry] if entry in cutoffs else self._cutoffs[entry] for entry in entries],
+                        dtype=np.float64)
+
+    def _resolve(self, pending: List[str]) -> Tuple[Dict[str, List[int]], Dict[str, float]]:
+        resolved = {entry: [] for entry in pending}
+        cutoffs = {entry: MATCH_SIMILARITY_THRESHOLD for entry in pending}
+        queries = [entry for entry in pending if tokenize(entry)]
+        if queries and self.vectorizer is not None:
+            vectors = self.vectorizer.transform([" ".join(tokenize(entry)) for entry in queries])
+            similarity = (vectors @ self.item_vectors).toarray()
+            best = similarity.max(axis=1)
+            cutoff = np.maximum(best * MATCH_RELATIVE_MARGIN, MATCH_SIMILARITY_THRESHOLD)
+            for row, entry in enumerate(queries):
+                resolved[entry] = np.flatnonzero(similarity[row] >= cutoff[row]).tolist()
+                cutoffs[entry] = float(cutoff[row])
+
+        if len(self._resolved) < 10000:
+            self._resolved.update(resolved)
+            self._cutoffs.update(cutoffs)
+        return resolved, cutoffs
+
+    def resolve(self, requested: str) -> List[int]:
+        """Resolve one grocery-list entry, see resolve_many"""
+        return self.resolve_many([requested])[0]
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[int]:
+        """
+        Autocomplete a product name
+
+        Matches items whose name, from any word onwards, starts with the
+        typed text, e.g. "mil" and "amul mi" both find "Amul Milk (500ml)".
+
+        Args:
+            prefix: Text typed so far
+            limit: Maximum number of suggestions
+
+        Returns:
+            Item ids, most widely stocked first
+        """
+        key = " ".join(tokenize(prefix))
+        if not key:
+            return []
+
+        ranked = self._suggestions.get(key)
+        if ranked is None:
+            start = bisect_left(self.completion_keys, key)
+            # Every key starting with the prefix sorts before prefix + U+FFFF
+            end = bisect_left(self.completion_keys, key + "\uffff", start)
+            items = set(self.completion_items[start:end])
+            ranked = sorted(items, key=lambda item_id: (-self.item_store_counts[item_id], self.item_names[item_id]))
+            if len(self._suggestions) < 10000:
+                self._suggestions[key] = ranked
+        return ranked[:limit]
+
+    def store_hits(self, requested: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        List the stores carrying a grocery-list entry
+
+        When several catalog items match the entry, the one listed first in
+        the store's inventory wins.
+
+        Args:
+            requested: Normalized grocery-list entry
+
+        Returns:
+            Arrays of (store index, item id, price, stock) sorted by store index
+        """
+        cached = self._store_hits.get(requested)
+        if cached is not None:
+            return cached
+
+        item_ids = self.resolve(requested)
+        if not item_ids:
+            store_hits = (np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32),
+                          np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64))
+        elif len(item_ids) == 1:
+            stores, _, prices, stock = self.postings[item_ids[0]]
+            store_hits = (stores, np.full(len(stores), item_ids[0], dtype=np.int32), prices, stock)
+        else:
+            stores = np.concatenate([self.postings[i][0] for i in item_ids])
+            ranks = np.concatenate([self.postings[i][1] for i in item_ids])
+            prices = np.concatenate([self.postings[i][2] for i in item_ids])
+            stock = np.concatenate([self.postings[i][3] for i in item_ids])
+            items = np.concatenate([np.full(len(self.postings[i][0]), i, dtype=np.int32)
+                                    for i in item_ids])
+            # Sort by store then inventory position and keep each store's first hit
+            order = np.lexsort((ranks, stores))
+            _, first = np.unique(stores[order], return_index=True)
+            keep = order[first]
+            store_hits = (stores[keep], items[keep], prices[keep], stock[keep])
+
+        if len(self._store_hits) < 10000:
+            self._store_hits[requested] = store_hits
+        return store_hits
+
+    def local_hits(self, requested_items: List[str], stores: np.ndarray) -> List[Tuple[np.ndarray, ...]]:
+        """
+        Like store_hits, but scanning only the inventories of the given stores
+
+        Cost grows with the number of stores rather than with the postings,
+        which is what a radius search wants when only a few stores are near.
+
+        Args:
+            requested_items: Normalized grocery-list entries
+            stores: Store indices to look in
+
+        Returns:
+            One (store index, item id, price, stock) tuple of arrays per entry
+        """
+        stores = np.sort(stores)
+        starts = self.catalog.store_offsets[stores]
+        counts = self.catalog.store_offsets[stores + 1] - starts
+        # Inventory rows of the stores, grouped by store in inventory order
+        rows = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        row_store = np.repeat(stores, counts).astype(np.int32)
+        row_items = self.row_item_ids[rows]
+
+        columns = []
+        for requested in requested_items:
+            hit_rows = np.flatnonzero(np.isin(row_items, self.resolve(requested)))
+            hit_stores, first = np.unique(row_store[hit_rows], return_index=True)
+            keep = hit_rows[first]
+            columns.append((hit_stores, row_items[keep].astype(np.int32),
+                            self.row_price[rows[keep]], self.row_stock[rows[keep]]))
+        return columns
+
+    def match(self, requested_items: List[str], stores: Optional[np.ndarray] = None,
+              quantities: Optional[np.ndarray] = None) -> "BasketMatch":
+        """
+        Look up which stores carry each requested item
+
+        Args:
+            requested_items: Normalized grocery-list entries
+            stores: Only consider these store indices (all stores by default)
+            quantities: Units wanted of each entry (one each by default)
+
+        Returns:
+            BasketMatch over every considered store with at least one hit
+        """
+        if quantities is None:
+            quantities = np.ones(len(requested_items), dtype=np.int64)
+
+        # One similarity product for every entry not resolved before
+        self.resolve_many(requested_items)
+        if stores is None:
+            columns = [self.store_hits(requested) for requested in requested_items]
+        else:
+            columns = self.local_hits(requested_items, stores)
+        if not columns:
+            return BasketMatch(np.empty(0, dtype=np.int32), np.empty((0, 0), dtype=np.int32),
+                               np.empty((0, 0)), np.empty((0, 0), dtype=np.int64), quantities)
+
+        stores, inverse = np.unique(np.concatenate([c[0] for c in columns]), return_inverse=True)
+        item_matrix = np.full((len(stores), len(columns)), -1, dtype=np.int32)
+        price_matrix = np.zeros((len(stores), len(columns)), dtype=np.float64)
+        stock_matrix = np.zeros((len(stores), len(columns)), dtype=np.int64)
+
+        offset = 0
+        for position, (hit_stores, hit_items, hit_prices, hit_stock) in enumerate(columns):
+            rows = inverse[offset:offset + len(hit_stores)]
+            item_matrix[rows, position] = hit_items
+            price_matrix[rows, position] = hit_prices
+            stock_matrix[rows, position] = hit_stock
+            offset += len(hit_stores)
+
+        return BasketMatch(stores, item_matrix, price_matrix, stock_matrix, quantities)
+
+
+class BasketMatch:
+    """
+    Dense view of a basket lookup over its candidate stores
+
+    Row i describes store index stores[i]; column j the j-th requested item.
+    item_matrix holds the matched item id or -1, price_matrix the unit price
+    or 0 and stock_matrix the units in stock. An item is fillable at a store
+    when the stock covers the wanted quantity; short items are carried but
+    not in the quantity wanted. total_price charges the units the store can
+    actually supply.
+    """
+
+    def __init__(self, stores: np.ndarray, item_matrix: np.ndarray, price_matrix: np.ndarray,
+                 stock_matrix: np.ndarray, quantities: np.ndarray):
+        self.stores = stores
+        self.item_matrix = item_matrix
+        self.price_matrix = price_matrix
+        self.stock_matrix = stock_matrix
+        self.quantities = quantities
+        self.found = item_matrix >= 0
+        self.fillable = self.found & (stock_matrix >= quantities)
+        self.short = self.found & ~self.fillable
+        self.matched_count = self.found.sum(axis=1)
+        self.fillable_count = self.fillable.sum(axis=1)
+        self.line_price = price_matrix * quantities
+        self.total_price = (price_matrix * np.minimum(stock_matrix, quantities)).sum(axis=1)
@@ -0,0 +1,200 @@
+"""
+Shop Matching Utility
+Scores a grocery list against one catalog version and shapes the match response
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from app.utils.shop_index import BasketMatch
+from app.utils.shop_scoring import score_stores, top_k
+from app.utils.basket_optimizer import optimize_basket
+from app.utils.geo_index import format_distance
+
+
+def normalize_basket(items: list) -> Tuple[Tuple[str, int], ...]:
+    """
+    Canonical form of a grocery list: sorted (name, quantity) pairs
+
+    Names are lowercased and trimmed, plain strings count as one unit and
+    repeated entries are merged by adding their quantities. Equal baskets
+    typed in a different order or case share one form, so they also share
+    match cache entries.
+    """
+    quantities: Dict[str, int] = {}
+    for item in items:
+        if isinstance(item, str):
+            name, quantity = item, 1
+        else:
+            name, quantity = item.name, item.quantity or 1
+        name = name.lower().strip()
+        quantities[name] = quantities.get(name, 0) + quantity
+    return tuple(sorted(quantities.items()))
+
+
+def match_basket(
+    bundle,
+    requested_items: Tuple[Tuple[str, int], ...],
+    user_location: Optional[Tuple[float, float]] = None,
+    radius_km: Optional[float] = None,
+    weights: Optional[dict] = None,
+    limit: int = 10,
+    max_stores: Optional[int] = None,
+    store_penalty: float = 0.0,
+    sellers=None,
+) -> Tuple[dict, tuple]:
+    """
+    Match a grocery list against the catalog and rank the stores
+
+    Args:
+        bundle: Catalog bundle to match against
+        requested_items: Normalized (name, quantity) grocery-list entries
+        user_location: (lat, lon) of the customer, if known
+        radius_km: Only consider stores this close to user_location
+        weights: Scoring weights, defaults when None
+        limit: Number of top stores to return
+        max_stores: Also split the basket across up to this many stores
+        store_penalty: Cost added per extra store in a split
+        sellers: SellerSnapshot of registered sellers to match alongside the catalog
+
+    Returns:
+        (match response with matches, totalShops and optionally basketSplit,
+        SellerSnapshot.stamp of the sellers that matched an entry, empty without sellers)
+    """
+    index = bundle.shop_index
+    if not requested_items:
+        return {"matches": [], "totalShops": 0}, ()
+
+    # Only stores carrying at least one requested item show up in the index hits,
+    # and with a radius only the nearby stores' inventories are scanned
+    names = [name for name, _ in requested_items]
+    quantities = np.array([quantity for _, quantity in requested_items], dtype=np.int64)
+    nearby = None
+    if radius_km is not None:
+        nearby, _ = bundle.geo_index.within(*user_location, radius_km)
+    baskets = [index.match(names, nearby, quantities)]
+    # Registered sellers compete from their inventory snapshot, ranked alongside
+    if sellers is not None:
+        baskets.append(sellers.match(bundle, names, quantities, user_location, radius_km))
+    basket = merge_baskets(baskets, quantities)
+    shops = candidate_shops(bundle, baskets, sellers)
+
+    # Real distances when the user's location is known; stores that cannot be
+    # placed get no distance credit
+    if user_location is not None:
+        distance = np.concatenate([bundle.geo_index.distances(*user_location, baskets[0].stores)] + [
+            sellers.distances(*user_location, seller_basket.stores) for seller_basket in baskets[1:]
+        ])
+    else:
+        distance = np.zeros(len(basket.stores))
+
+    # Score every candidate store at once on the rounded values we return; only
+    # items the store can supply in the quantity wanted count as available
+    availability = np.round(basket.fillable_count / len(requested_items) * 100, 1)
+    total_price = np.round(basket.total_price, 2)
+    rating = np.concatenate([index.ratings[baskets[0].stores]] + [
+        sellers.ratings[seller_basket.stores] for seller_basket in baskets[1:]
+    ])
+    scores = score_stores(availability, total_price, rating, np.where(np.isfinite(distance), distance, np.inf), weights)
+
+    # Build response rows only for the top k stores
+    matches = []
+    for row in top_k(scores, limit):
+        store, item_names = shops(row)
+        found, short = basket.found[row], basket.short[row]
+        matches.append({
+            "id": store["id"],
+            "name": store["name"],
+            "location": store["location"],
+            "totalPrice": float(total_price[row]),
+            "distance": format_distance(distance[row]),
+            "availability": float(availability[row]),
+            "rating": store["rating"],
+            "source": store["source"],
+            "matchedItems": [item_names[item_id] for item_id in basket.item_matrix[row][found]],
+            "missingItems": [name for name, hit in zip(names, found) if not hit],
+            "shortItems": [{
+                "requested": names[pos],
+                "quantity": int(quantities[pos]),
+                "inStock": int(basket.stock_matrix[row, pos])
+            } for pos in np.flatnonzero(short)],
+            "partiallyAvailable": bool(short.any())
+        })
+
+    result = {"matches": matches, "totalShops": len(matches)}
+
+    # Optionally find the cheapest split of the whole list across a few stores
+    if max_stores:
+        # Split only over stores that can supply each item in full
+        plan = optimize_basket(basket.line_price, basket.fillable, max_stores, store_penalty)
+        result["basketSplit"] = format_basket_plan(shops, basket, plan, names, distance)
+
+    # Stock or prices of these sellers moving invalidates the result, other sellers' do not
+    stamp = sellers.stamp(baskets[1].stores) if sellers is not None else ()
+    return result, stamp
+
+
+def merge_baskets(baskets: List[BasketMatch], quantities: np.ndarray) -> BasketMatch:
+    """Stack catalog and seller lookups into one BasketMatch, catalog rows first"""
+    if len(baskets) == 1:
+        return baskets[0]
+    return BasketMatch(
+        np.concatenate([basket.stores for basket in baskets]),
+        np.vstack([basket.item_matrix for basket in baskets]),
+        np.vstack([basket.price_matrix for basket in baskets]),
+        np.vstack([basket.stock_matrix for basket in baskets]),
+        quantities
+    )
+
+
+def candidate_shops(bundle, baskets: List[BasketMatch], sellers) -> Callable[[int], Tuple[dict, List[str]]]:
+    """
+    Describe a row of the merged basket
+
+    Returns:
+        Function mapping a row to (shop fields with their source, item names its item ids index)
+    """
+    catalog_rows = len(baskets[0].stores)
+
+    def describe(row: int) -> Tuple[dict, List[str]]:
+        if row < catalog_rows:
+            store = bundle.catalog.store(baskets[0].stores[row])
+            return dict(store, source="catalog"), bundle.shop_index.item_names
+        store = sellers.shops[baskets[1].stores[row - catalog_rows]]
+        return dict(store, source="seller"), sellers.item_names
+
+    return describe
+
+
+def format_basket_plan(shops, basket, plan, requested_items: List[str], distance: np.ndarray) -> dict:
+    """Shape a multi-store basket plan for the match response"""
+    if plan is None:
+        return {"stores": [], "totalPrice": 0.0, "storePenalty": 0.0, "missingItems": requested_items, "exact": True}
+
+    stores = []
+    for row in plan.stores:
+        store, item_names = shops(row)
+        positions = [pos for pos, assigned in enumerate(plan.assignment) if assigned == row]
+        items = [{
+            "requested": requested_items[pos],
+            "name": item_names[basket.item_matrix[row, pos]],
+            "quantity": int(basket.quantities[pos]),
+            "unitPrice": round(float(basket.price_matrix[row, pos]), 2),
+            "price": round(float(basket.line_price[row, pos]), 2)
+        } for pos in positions]
+        stores.append({
+            "id": store["id"],
+            "name": store["name"],
+            "location": store["location"],
+            "distance": format_distance(distance[row]),
+            "rating": store["rating"],
+            "source": store["source"],
+            "items": items,
+            "subtotal": round(sum(item["price"] for item in items), 2)
+        })
+
+    return {
+        "stores": stores,
+        "totalPrice": round(plan.item_total, 2),
+        "storePenalty": round(plan.penalty, 2),
+        "missingItems": [req_item for req_item, assigned in zip(requested_items, plan.assignment) if assigned < 0],
+        "exact": plan.exact
+    }
@@ -0,0 +1,64 @@
+"""
+Shop Scoring Utility
+Vectorized weighted scoring and top-k selection for shop matching
+"""
+from typing import Optional
+import numpy as np
+
+# Default weights: availability (40%), price (30%), rating (20%), distance (10%)
+DEFAULT_WEIGHTS = {
+    "availability": 40.0,
+    "price": 30.0,
+    "rating": 20.0,
+    "distance": 10.0,
+}
+
+
+def score_stores(
+    availability: np.ndarray,
+    total_price: np.ndarray,
+    rating: np.ndarray,
+    distance: np.ndarray,
+    weights: Optional[dict] = None,
+) -> np.ndarray:
+    """
+    Compute the weighted match score for all candidate stores at once
+
+    Args:
+        availability: Share of requested items found, in percent
+        total_price: Basket price at each store
+        rating: Store rating out of 5
+        distance: Distance to the store in km
+        weights: Weight per component (defaults to DEFAULT_WEIGHTS)
+
+    Returns:
+        Score per store, higher is better
+    """
+    w = {**DEFAULT_WEIGHTS, **(weights or {})}
+
+    availability_score = availability / 100 * w["availability"]
+    price_score = 100 / (total_price + 1) * w["price"]
+    rating_score = rating / 5.0 * w["rating"]
+    distance_score = 100 / (distance + 1) * w["distance"]
+
+    return availability_score + price_score + rating_score + distance_score
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Pick the indices of the k highest scores without sorting everything
+
+    Args:
+        scores: Score per candidate
+        k: Number of candidates to keep
+
+    Returns:
+        Indices of the best k candidates, best first
+    """
+    if k <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.intp)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
@@ -0,0 +1,86 @@
+"""
+Store Filter Utility
+Precomputed category and location store sets with facet counts for the shop directory
+"""
+from typing import Dict, Optional, Tuple
+import numpy as np
+from app.utils.catalog import Catalog
+
+
+class StoreFilterIndex:
+    """
+    Maps each store category and location to the sorted store indices it holds
+
+    Filtering a directory page intersects at most two precomputed sets, and
+    facet counts are computed once per filter combination, so a page costs
+    the size of the selection instead of a scan over the whole catalog.
+    """
+
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        self.categories, self.category_codes = self._group(catalog.store_category)
+        self.locations, self.location_codes = self._group(catalog.store_location)
+
+        self.by_category = self._sets(self.categories, self.category_codes)
+        self.by_location = self._sets(self.locations, self.location_codes)
+        self.all_stores = np.arange(len(catalog), dtype=np.int32)
+        self._facets: Dict[Tuple[Optional[str], Optional[str]], dict] = {}
+
+    def _group(self, column: np.ndarray):
+        """Dense codes over the distinct strings of a store column, names sorted"""
+        string_ids, codes = np.unique(column, return_inverse=True)
+        names = [self.catalog.string(string_id) for string_id in string_ids]
+        order = np.argsort(names, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        return [names[i] for i in order], rank[codes]
+
+    @staticmethod
+    def _sets(names, codes: np.ndarray) -> Dict[str, np.ndarray]:
+        order = np.argsort(codes, kind="stable").astype(np.int32)
+        bounds = np.searchsorted(codes[order], np.arange(len(names) + 1))
+        return {name.lower(): order[bounds[i]:bounds[i + 1]] for i, name in enumerate(names)}
+
+    def select(self, category: Optional[str] = None, location: Optional[str] = None) -> np.ndarray:
+        """
+        Sorted store indices matching both filters (case-insensitive)
+
+        Args:
+            category: Store type, or None for any
+            location: Locality, or None for any
+
+        Returns:
+            Store indices in catalog order
+        """
+        selection = self.all_stores
+        if category:
+            selection = self.by_category.get(category.lower(), selection[:0])
+        if location:
+            stores = self.by_location.get(location.lower(), selection[:0])
+            selection = stores if not category else np.intersect1d(selection, stores, assume_unique=True)
+        return selection
+
+    def facets(self, category: Optional[str] = None, location: Optional[str] = None) -> dict:
+        """
+        Store counts per category and per location
+
+        Each facet is counted with the other facet's filter applied, so the
+        counts tell how many stores picking that value would show.
+        """
+        key = (category.lower() if category else None, location.lower() if location else None)
+        cached = self._facets.get(key)
+        if cached is not None:
+            return cached
+
+        in_location = self.select(location=location)
+        in_category = self.select(category=category)
+        category_counts = np.bincount(self.category_codes[in_location], minlength=len(self.categories))
+        location_counts = np.bincount(self.location_codes[in_category], minlength=len(self.locations))
+        facets = {
+            "categories": {name: int(count) for name, count in zip(self.categories, category_counts) if count},
+            "locations": {name: int(count) for name, count in zip(self.locations, location_counts) if count},
+        }
+
+        if len(self._facets) < 10000:
+            self._facets[key] = facets
+        return facets
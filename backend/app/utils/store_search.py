@@ -0,0 +1,110 @@
+"""
+Store Search Utility
+Trigram index over store name, category and location for ranked shop search
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Tuple
+from app.utils.catalog import Catalog
+
+# Relative weight of a hit in each store field
+FIELD_WEIGHTS = {"name": 3.0, "category": 2.0, "location": 1.0}
+
+# Quality of a hit by where the query sits in the field
+EXACT_MATCH = 1.0
+PREFIX_MATCH = 0.8
+WORD_MATCH = 0.6
+SUBSTRING_MATCH = 0.4
+
+
+def match_quality(value: str, query: str) -> float:
+    """Score how well a lowercase field value matches a lowercase query"""
+    if value == query:
+        return EXACT_MATCH
+    if value.startswith(query):
+        return PREFIX_MATCH
+    if f" {query}" in value:
+        return WORD_MATCH
+    if query in value:
+        return SUBSTRING_MATCH
+    return 0.0
+
+
+class StoreSearchIndex:
+    """
+    Trigram postings over lowercase store fields
+
+    A query of three or more characters only looks at the stores holding
+    all of its trigrams, starting from the rarest one, so lookup cost
+    follows the number of hits rather than the catalog size. Shorter
+    queries match the start of any word through a sorted word list.
+    """
+
+    def __init__(self, catalog: Catalog):
+        self.fields: Dict[str, List[str]] = {
+            field: [catalog.string(string_id).lower() for string_id in getattr(catalog, f"store_{field}")]
+            for field in FIELD_WEIGHTS
+        }
+
+        trigrams: Dict[str, set] = defaultdict(set)
+        words: Dict[str, set] = defaultdict(set)
+        for values in self.fields.values():
+            for idx, value in enumerate(values):
+                for start in range(len(value) - 2):
+                    trigrams[value[start:start + 3]].add(idx)
+                for word in value.split():
+                    words[word].add(idx)
+
+        self.trigrams: Dict[str, frozenset] = {gram: frozenset(stores) for gram, stores in trigrams.items()}
+        self.words = sorted(words)
+        self.word_stores = [frozenset(words[word]) for word in self.words]
+
+    def _candidates(self, query: str) -> set:
+        """Stores that may contain the query in one of their fields"""
+        if len(query) < 3:
+            candidates = set()
+            start = bisect_left(self.words, query)
+            for position in range(start, len(self.words)):
+                if not self.words[position].startswith(query):
+                    break
+                candidates |= self.word_stores[position]
+            return candidates
+
+        postings = []
+        for start in range(len(query) - 2):
+            stores = self.trigrams.get(query[start:start + 3])
+            if stores is None:
+                return set()
+            postings.append(stores)
+
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for stores in postings[1:]:
+            candidates &= stores
+            if not candidates:
+                break
+        return candidates
+
+    def search(self, query: str) -> List[Tuple[int, float]]:
+        """
+        Find stores whose name, category or location contains the query
+
+        Args:
+            query: Text typed in the search box
+
+        Returns:
+            (store index, score) pairs, best match first
+        """
+        query = " ".join(query.lower().split())
+        if not query:
+            return []
+
+        hits = []
+        for idx in self._candidates(query):
+            score = max(weight * match_quality(self.fields[field][idx], query)
+                        for field, weight in FIELD_WEIGHTS.items())
+            if score > 0:
+                hits.append((idx, score))
+
+        hits.sort(key=lambda hit: (-hit[1], hit[0]))
+        return hits
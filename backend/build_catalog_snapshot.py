@@ -0,0 +1,36 @@
+"""
+Script to compile delhi_ncr_stores_data.csv into the binary catalog snapshot
+API workers map the snapshot read-only instead of parsing the CSV at startup
+
+Usage (from the backend directory):
+    python build_catalog_snapshot.py [--csv PATH] [--out PATH]
+"""
+import argparse
+import time
+from app.utils.catalog import (
+    CATALOG_CSV_PATH, CATALOG_SNAPSHOT_PATH, compile_catalog, write_snapshot, open_snapshot
+)
+
+
+def build_snapshot(csv_path: str, snapshot_path: str):
+    """Compile the CSV and write the snapshot atomically"""
+    print(f"Reading CSV file: {csv_path}")
+    started = time.perf_counter()
+    catalog = compile_catalog(csv_path)
+    print(f"Parsed {catalog.row_count} rows for {len(catalog)} stores in {time.perf_counter() - started:.2f}s")
+
+    size = write_snapshot(catalog, snapshot_path)
+    print(f"Wrote {size / 1024:.1f} KiB snapshot to {snapshot_path}")
+
+    # Verify the snapshot maps back to the same catalog
+    mapped = open_snapshot(snapshot_path)
+    assert len(mapped) == len(catalog) and mapped.row_count == catalog.row_count
+    print("\n✅ Catalog snapshot built successfully!")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the store catalog CSV into a snapshot")
+    parser.add_argument("--csv", default=CATALOG_CSV_PATH, help="Source CSV path")
+    parser.add_argument("--out", default=CATALOG_SNAPSHOT_PATH, help="Snapshot output path")
+    args = parser.parse_args()
+    build_snapshot(args.csv, args.out)
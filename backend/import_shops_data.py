@@ -1,124 +1,224 @@
 """
 Script to import Delhi NCR stores data from CSV into MongoDB
 Handles both shops and their inventory items
+
+The CSV is streamed in batches that are upserted with unordered bulk writes,
+keyed by store_id and (store_id, item_id), several batches at a time. The
+collections keep serving the previous import until each document is replaced,
+and rows that disappeared from the CSV are only removed once the whole file
+has been written. Progress is checkpointed, so an interrupted import resumes
+where it stopped.
+
+Usage (from the backend directory):
+    python import_shops_data.py [--csv PATH] [--batch-size N] [--concurrency N] [--restart]
 """
+import argparse
 import asyncio
 import csv
+import json
 import os
+import time
+import uuid
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
 from datetime import datetime
 from dotenv import load_dotenv
+from app.utils.catalog import CATALOG_CSV_PATH, source_signature, store_rating
+from app.utils.catalog_mongo import CATALOG_META_ID
 
 load_dotenv()
 
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "corelia")
 
-async def import_csv_data():
-    """Import shops and inventory from delhi_ncr_stores_data.csv"""
-    
-    # Connect to MongoDB
-    client = AsyncIOMotorClient(MONGODB_URL)
-    db = client[DATABASE_NAME]
-    
-    print(f"Connected to MongoDB: {DATABASE_NAME}")
-    
-    # Read CSV file
-    csv_path = os.path.join(os.path.dirname(__file__), '..', 'delhi_ncr_stores_data.csv')
-    
-    shops_dict = {}  # Store unique shops by Store_ID
-    inventory_items = []  # All inventory items
-    
-    print(f"Reading CSV file: {csv_path}")
-    
-    with open(csv_path, 'r', encoding='utf-8') as csvfile:
+CHECKPOINT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "import_checkpoint.json")
+
+
+def load_checkpoint(checkpoint_path: str, source: dict) -> dict:
+    """Resume state for this CSV, or a fresh import when the file changed"""
+    try:
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("source") == source:
+            return checkpoint
+        print("⚠️ CSV changed since the last checkpoint, starting over")
+    except (OSError, ValueError):
+        pass
+    return {"source": source, "import_id": uuid.uuid4().hex, "rows": 0}
+
+
+def save_checkpoint(checkpoint_path: str, checkpoint: dict):
+    """Write the checkpoint atomically so a crash never leaves half a file"""
+    os.makedirs(os.path.dirname(checkpoint_path), exist_ok=True)
+    tmp_path = f"{checkpoint_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def read_batches(csv_path: str, batch_size: int, skip_rows: int):
+    """Stream (first row number, rows) batches from the CSV, skipping rows already imported"""
+    with open(csv_path, "r", encoding="utf-8", newline="") as csvfile:
         reader = csv.DictReader(csvfile)
-        row_count = 0
-        
-        for row in reader:
-            row_count += 1
-            store_id = row['Store_ID']
-            
-            # Create or update shop entry
-            if store_id not in shops_dict:
-                shops_dict[store_id] = {
-                    'store_id': store_id,
+        batch, first = [], skip_rows
+        for row_number, row in enumerate(reader):
+            if row_number < skip_rows:
+                continue
+            batch.append(row)
+            if len(batch) == batch_size:
+                yield first, batch
+                batch, first = [], row_number + 1
+        if batch:
+            yield first, batch
+
+
+def batch_operations(first: int, rows: list, import_id: str, seen_stores: set):
+    """Upserts for the shops first seen in this batch and for every inventory row"""
+    now = datetime.utcnow()
+    shop_ops, item_ops = [], []
+    for position, row in enumerate(rows, start=first):
+        store_id = row['Store_ID']
+        if store_id not in seen_stores:
+            seen_stores.add(store_id)
+            shop_ops.append(UpdateOne({'store_id': store_id}, {
+                '$set': {
                     'name': row['Store_Name'],
                     'owner_name': row['Owner_Name'],
                     'contact_number': row['Contact_Number'],
                     'store_type': row['Store_Type'],
                     'location': row['Location'],
                     'address': row['Address'],
-                    'rating': round(4.0 + (hash(store_id) % 10) / 10, 1),  # Generate rating 4.0-4.9
+                    'rating': round(store_rating(store_id), 1),  # Deterministic rating 4.0-4.9
                     'is_open': True,
-                    'created_at': datetime.utcnow(),
-                    'updated_at': datetime.utcnow(),
-                }
-            
-            # Create inventory item
-            inventory_item = {
-                'store_id': store_id,
-                'item_id': row['Item_ID'],
+                    'import_id': import_id,
+                    'updated_at': now,
+                },
+                '$setOnInsert': {'created_at': now},
+            }, upsert=True))
+
+        item_ops.append(UpdateOne({'store_id': store_id, 'item_id': row['Item_ID']}, {
+            '$set': {
                 'item_name': row['Item_Name'],
                 'category': row['Category'],
                 'price': float(row['Price']),
                 'stock_quantity': int(row['Stock_Quantity']),
-                'created_at': datetime.utcnow(),
-                'updated_at': datetime.utcnow(),
-            }
-            inventory_items.append(inventory_item)
-            
-            if row_count % 1000 == 0:
-                print(f"Processed {row_count} rows...")
-    
-    print(f"Total rows processed: {row_count}")
-    print(f"Unique shops: {len(shops_dict)}")
-    print(f"Total inventory items: {len(inventory_items)}")
-    
-    # Clear existing data
-    print("\nClearing existing shops and inventory...")
-    await db.shops.delete_many({})
-    await db.inventory_items.delete_many({})
-    
-    # Insert shops
-    print(f"\nInserting {len(shops_dict)} shops...")
-    shops_list = list(shops_dict.values())
-    if shops_list:
-        result = await db.shops.insert_many(shops_list)
-        print(f"Inserted {len(result.inserted_ids)} shops")
-    
-    # Insert inventory items in batches
-    print(f"\nInserting {len(inventory_items)} inventory items...")
-    batch_size = 1000
-    for i in range(0, len(inventory_items), batch_size):
-        batch = inventory_items[i:i+batch_size]
-        await db.inventory_items.insert_many(batch)
-        print(f"Inserted batch {i//batch_size + 1}: {len(batch)} items")
-    
-    # Create indexes for better query performance
-    print("\nCreating indexes...")
+                'position': position,  # CSV row, so the API rebuilds the catalog in file order
+                'import_id': import_id,
+                'updated_at': now,
+            },
+            '$setOnInsert': {'created_at': now},
+        }, upsert=True))
+    return shop_ops, item_ops
+
+
+async def write_batch(db, shop_ops: list, item_ops: list):
+    if shop_ops:
+        await db.shops.bulk_write(shop_ops, ordered=False)
+    await db.inventory_items.bulk_write(item_ops, ordered=False)
+
+
+async def import_csv_data(csv_path: str = CATALOG_CSV_PATH, batch_size: int = 1000, concurrency: int = 4,
+                          checkpoint_path: str = CHECKPOINT_PATH, restart: bool = False):
+    """Import shops and inventory from delhi_ncr_stores_data.csv"""
+
+    # Connect to MongoDB
+    client = AsyncIOMotorClient(MONGODB_URL)
+    db = client[DATABASE_NAME]
+
+    print(f"Connected to MongoDB: {DATABASE_NAME}")
+
+    # Indexes first: the upsert keys need them, and existing ones are left as they are
     await db.shops.create_index("store_id", unique=True)
     await db.shops.create_index("location")
     await db.shops.create_index("store_type")
+    await db.inventory_items.create_index([("store_id", 1), ("item_id", 1)], unique=True)
     await db.inventory_items.create_index("store_id")
     await db.inventory_items.create_index("item_name")
     await db.inventory_items.create_index("category")
-    
-    print("\n✅ Data import completed successfully!")
-    
+    await db.inventory_items.create_index("position")
+
+    source = source_signature(csv_path)
+    if restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    checkpoint = load_checkpoint(checkpoint_path, source)
+    import_id = checkpoint["import_id"]
+    if checkpoint["rows"]:
+        print(f"Resuming after {checkpoint['rows']} rows")
+
+    print(f"Reading CSV file: {csv_path}")
+
+    started = time.perf_counter()
+    seen_stores = set()
+    pending = {}
+    # Batches finish out of order; the checkpoint only advances over a contiguous prefix
+    finished = {}
+    imported = 0
+
+    async def flush(wait_for):
+        nonlocal imported
+        done, _ = await asyncio.wait(pending, return_when=wait_for)
+        for task in done:
+            first, count = pending.pop(task)
+            task.result()
+            finished[first] = count
+            imported += count
+        while checkpoint["rows"] in finished:
+            checkpoint["rows"] += finished.pop(checkpoint["rows"])
+        save_checkpoint(checkpoint_path, checkpoint)
+        elapsed = time.perf_counter() - started
+        print(f"Imported {checkpoint['rows']} rows ({imported / elapsed:.0f} rows/s)")
+
+    try:
+        for first, rows in read_batches(csv_path, batch_size, checkpoint["rows"]):
+            shop_ops, item_ops = batch_operations(first, rows, import_id, seen_stores)
+            task = asyncio.create_task(write_batch(db, shop_ops, item_ops))
+            pending[task] = (first, len(rows))
+            if len(pending) >= concurrency:
+                await flush(asyncio.FIRST_COMPLETED)
+        while pending:
+            await flush(asyncio.ALL_COMPLETED)
+    finally:
+        for task in pending:
+            task.cancel()
+
+    # Every document written by this import, resumed runs included, carries
+    # its id; the rest is no longer in the CSV
+    removed_shops = await db.shops.delete_many({"import_id": {"$ne": import_id}})
+    removed_items = await db.inventory_items.delete_many({"import_id": {"$ne": import_id}})
+    # Publish the import: API workers serving the MongoDB catalog poll this version
+    await db.catalog_meta.update_one({"_id": CATALOG_META_ID}, {"$set": {
+        "version": import_id,
+        "completed_at": datetime.utcnow(),
+        "source": checkpoint["source"],
+    }}, upsert=True)
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    elapsed = time.perf_counter() - started
+    print(f"\n✅ Data import completed successfully!")
+    print(f"  - Rows written: {imported} in {elapsed:.2f}s ({imported / max(elapsed, 1e-9):.0f} rows/s)")
+    print(f"  - Removed stale: {removed_shops.deleted_count} shops, {removed_items.deleted_count} inventory items")
+
     # Show some stats
     shop_count = await db.shops.count_documents({})
     item_count = await db.inventory_items.count_documents({})
     print(f"\nDatabase statistics:")
     print(f"  - Shops: {shop_count}")
     print(f"  - Inventory items: {item_count}")
-    
+
     # Show sample data
     print("\nSample shops:")
     async for shop in db.shops.find().limit(3):
         print(f"  - {shop['name']} ({shop['store_type']}) - {shop['location']}")
-    
+
     client.close()
 
 if __name__ == "__main__":
-    asyncio.run(import_csv_data())
+    parser = argparse.ArgumentParser(description="Import the store catalog CSV into MongoDB")
+    parser.add_argument("--csv", default=CATALOG_CSV_PATH, help="Source CSV path")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per bulk write")
+    parser.add_argument("--concurrency", type=int, default=4, help="Bulk writes in flight")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH, help="Checkpoint file for resuming")
+    parser.add_argument("--restart", action="store_true", help="Ignore any checkpoint and import from the start")
+    args = parser.parse_args()
+    asyncio.run(import_csv_data(args.csv, args.batch_size, args.concurrency, args.checkpoint, args.restart))
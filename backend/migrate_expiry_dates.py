@@ -0,0 +1,70 @@
+"""
+One-time migration converting inventory expiry_date strings to BSON dates
+The API now only writes dates, which /api/inventory/expiring range-scans
+
+Usage (from the backend directory):
+    python migrate_expiry_dates.py [--batch-size N] [--dry-run]
+"""
+import argparse
+import asyncio
+import os
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+from app.utils.expiry_logic import parse_expiry_date
+
+load_dotenv()
+
+MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "corelia")
+
+
+async def migrate_expiry_dates(batch_size: int = 1000, dry_run: bool = False):
+    """Rewrite every string expiry_date as a date; empty strings are unset"""
+    client = AsyncIOMotorClient(MONGODB_URL)
+    db = client[DATABASE_NAME]
+    print(f"Connected to MongoDB: {DATABASE_NAME}")
+
+    await db.inventory.create_index([("owner_email", 1), ("expiry_date", 1)])
+
+    converted, cleared, invalid = 0, 0, []
+    operations = []
+
+    async def flush():
+        if operations and not dry_run:
+            await db.inventory.bulk_write(operations, ordered=False)
+        operations.clear()
+
+    cursor = db.inventory.find({"expiry_date": {"$type": "string"}}, {"expiry_date": 1})
+    async for item in cursor:
+        try:
+            expiry_date = parse_expiry_date(item["expiry_date"])
+        except ValueError:
+            invalid.append((item["_id"], item["expiry_date"]))
+            continue
+
+        if expiry_date is None:
+            operations.append(UpdateOne({"_id": item["_id"]}, {"$unset": {"expiry_date": ""}}))
+            cleared += 1
+        else:
+            operations.append(UpdateOne({"_id": item["_id"]}, {"$set": {"expiry_date": expiry_date}}))
+            converted += 1
+        if len(operations) >= batch_size:
+            await flush()
+    await flush()
+
+    print(f"\n✅ {'Would convert' if dry_run else 'Converted'} {converted} expiry dates, cleared {cleared} empty ones")
+    if invalid:
+        print(f"⚠️ {len(invalid)} items have unparseable expiry dates and were left as they are:")
+        for item_id, value in invalid[:20]:
+            print(f"  - {item_id}: {value!r}")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert inventory expiry_date strings to dates")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Updates per bulk write")
+    parser.add_argument("--dry-run", action="store_true", help="Count the changes without writing them")
+    args = parser.parse_args()
+    asyncio.run(migrate_expiry_dates(args.batch_size, args.dry_run))
@@ -0,0 +1,59 @@
+"""
+One-time migration adding name_key to seller inventory items
+Stock deduction finds items by owner_email and name_key, which the API now writes
+
+Usage (from the backend directory):
+    python migrate_inventory_name_keys.py [--batch-size N] [--dry-run]
+"""
+import argparse
+import asyncio
+import os
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+from app.utils.inventory_keys import name_key
+
+load_dotenv()
+
+MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "corelia")
+
+
+async def migrate_name_keys(batch_size: int = 1000, dry_run: bool = False):
+    """Set name_key on every item that lacks it or whose name changed outside the API"""
+    client = AsyncIOMotorClient(MONGODB_URL)
+    db = client[DATABASE_NAME]
+    print(f"Connected to MongoDB: {DATABASE_NAME}")
+
+    await db.inventory.create_index([("owner_email", 1), ("name_key", 1)])
+
+    updated = 0
+    operations = []
+
+    async def flush():
+        if operations and not dry_run:
+            await db.inventory.bulk_write(operations, ordered=False)
+        operations.clear()
+
+    cursor = db.inventory.find({}, {"name": 1, "name_key": 1})
+    async for item in cursor:
+        key = name_key(item.get("name", ""))
+        if item.get("name_key") == key:
+            continue
+        operations.append(UpdateOne({"_id": item["_id"]}, {"$set": {"name_key": key}}))
+        updated += 1
+        if len(operations) >= batch_size:
+            await flush()
+    await flush()
+
+    print(f"\n✅ {'Would set' if dry_run else 'Set'} name_key on {updated} inventory items")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add normalized name keys to seller inventory")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Updates per bulk write")
+    parser.add_argument("--dry-run", action="store_true", help="Count the changes without writing them")
+    args = parser.parse_args()
+    asyncio.run(migrate_name_keys(args.batch_size, args.dry_run))
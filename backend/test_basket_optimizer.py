@@ -0,0 +1,78 @@
+"""
+Test the multi-store basket optimizer on candidate pools larger than its search limit
+Run this from the backend directory: python test_basket_optimizer.py
+"""
+
+import itertools
+import numpy as np
+from app.utils.basket_optimizer import PAIR_POOL_LIMIT, optimize_basket
+
+
+def brute_force(prices, max_stores, store_penalty):
+    """Cheapest plan total over every combination of up to max_stores stores"""
+    best = np.inf
+    for size in range(1, max_stores + 1):
+        for rows in itertools.combinations(range(len(prices)), size):
+            total = prices[list(rows)].min(axis=0).sum() + store_penalty * (size - 1)
+            best = min(best, total)
+    return best
+
+
+def test_dominated_stores_do_not_crowd_out_the_best_pair():
+    # X and Y split the basket for 4; neither is cheapest on any item on its own
+    stores = [
+        [1, 1, 100, 100],
+        [100, 100, 1, 1],
+        [10, 10, 10, 10],
+    ]
+    for item in range(4):
+        for price in (0.9, 0.95):
+            row = [50.0] * 4
+            row[item] = price
+            stores.append(row)
+    # Many cheap-looking stores, all dominated by [10, 10, 10, 10]
+    decoys = [[11, 11, 11, 11 + 0.001 * i] for i in range(3 * PAIR_POOL_LIMIT)]
+    # Put the decoys first so a cap on row order would drop X and Y
+    prices = np.array(decoys + stores, dtype=float)
+    found = np.ones(prices.shape, dtype=bool)
+
+    plan = optimize_basket(prices, found, max_stores=2, store_penalty=0.0)
+
+    assert plan.exact
+    assert plan.total == 4.0
+    assert sorted(plan.stores) == [len(decoys), len(decoys) + 1]
+
+
+def test_exact_plan_matches_brute_force():
+    rng = np.random.default_rng(7)
+    prices = rng.uniform(1, 20, size=(40, 5))
+    found = rng.random(prices.shape) < 0.8
+    line = np.where(found, prices, np.inf)
+
+    for max_stores in (1, 2, 3):
+        plan = optimize_basket(prices, found, max_stores=max_stores, store_penalty=1.5)
+        assert plan.exact
+        expected = brute_force(np.where(found, prices, 1e9), max_stores, 1.5)
+        assert np.isclose(plan.total, expected), (max_stores, plan.total, expected)
+        assert np.isfinite(line[plan.assignment, np.arange(5)]).all()
+
+
+def test_capped_pool_is_reported_inexact():
+    # Every basket costs the same in total, so no store is dominated
+    rng = np.random.default_rng(3)
+    prices = 100 * rng.dirichlet(np.ones(4), size=2 * PAIR_POOL_LIMIT)
+    found = np.ones(prices.shape, dtype=bool)
+
+    plan = optimize_basket(prices, found, max_stores=2, store_penalty=0.0)
+
+    assert not plan.exact
+    assert plan.total <= prices.sum(axis=1).min()
+
+
+if __name__ == "__main__":
+    test_dominated_stores_do_not_crowd_out_the_best_pair()
+    print("✓ Dominated stores are pruned before the pool is capped")
+    test_exact_plan_matches_brute_force()
+    print("✓ Uncapped plans match a brute-force search")
+    test_capped_pool_is_reported_inexact()
+    print("✓ Capped searches are reported as not exact")
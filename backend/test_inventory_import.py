@@ -0,0 +1,88 @@
+"""
+Test that re-uploading a partial inventory sheet only changes the columns it has
+Needs a running MongoDB (MONGODB_URL); a scratch database is created and dropped
+Run this from the backend directory: python test_inventory_import.py
+"""
+
+import asyncio
+import csv
+import os
+import tempfile
+from bson import ObjectId
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.utils.inventory_import import IMPORT_DEFAULTS, run_import
+
+load_dotenv()
+
+MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+TEST_DATABASE = "corelia_import_test"
+OWNER = "seller@test.com"
+
+
+async def import_sheet(db, rows):
+    """Run one CSV import to the end and return its job"""
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", newline="", delete=False) as sheet:
+        csv.writer(sheet).writerows(rows)
+    job_id = ObjectId()
+    await db.import_jobs.insert_one({
+        "_id": job_id, "owner_email": OWNER, "status": "queued",
+        "rows_read": 0, "inserted": 0, "updated": 0, "error_count": 0, "errors": []
+    })
+    await run_import(db, job_id, OWNER, sheet.name, "sheet.csv")
+    return await db.import_jobs.find_one({"_id": job_id})
+
+
+async def items_by_key(db):
+    cursor = db.inventory.find({"owner_email": OWNER})
+    return {item["name_key"]: item for item in await cursor.to_list(length=None)}
+
+
+async def check_partial_reupload(db):
+    job = await import_sheet(db, [
+        ["sku", "name", "category", "price", "stock", "unit"],
+        ["A1", "Amul Milk", "Dairy", "30", "10", "L"],
+        ["", "Brown Bread", "Bakery", "45", "5", "loaf"],
+    ])
+    assert job["status"] == "completed" and job["inserted"] == 2, job
+    before = await items_by_key(db)
+
+    # A restock sheet: names and stock only, one of them a new item
+    job = await import_sheet(db, [
+        ["name", "stock"],
+        ["Amul Milk", "25"],
+        ["brown  bread", "12"],
+        ["Eggs", "30"],
+    ])
+    assert job["status"] == "completed", job
+    assert (job["inserted"], job["updated"]) == (1, 2), job
+    after = await items_by_key(db)
+
+    assert set(after) == {"amul milk", "brown bread", "eggs"}
+    assert after["amul milk"]["stock"] == 25
+    assert after["brown bread"]["stock"] == 12
+    for key in ("amul milk", "brown bread"):
+        for field in ("sku", "category", "price", "unit", "expiry_date", "created_at"):
+            assert after[key].get(field) == before[key].get(field), (key, field)
+
+    eggs = after["eggs"]
+    assert eggs["stock"] == 30
+    assert all(eggs[field] == IMPORT_DEFAULTS[field] for field in ("category", "price", "unit"))
+
+
+def test_partial_reupload_keeps_unlisted_columns():
+    async def run():
+        client = AsyncIOMotorClient(MONGODB_URL)
+        await client.drop_database(TEST_DATABASE)
+        try:
+            await check_partial_reupload(client[TEST_DATABASE])
+        finally:
+            await client.drop_database(TEST_DATABASE)
+            client.close()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_partial_reupload_keeps_unlisted_columns()
+    print("✓ Partial re-upload keeps the columns it does not carry")
@@ -0,0 +1,43 @@
+"""
+Test that seller items are matched with the same best-match margin as catalog items
+Uses the Delhi NCR catalog (snapshot or CSV) as the matching vocabulary
+Run this from the backend directory: python test_seller_matching.py
+"""
+
+import numpy as np
+from app.utils.catalog import load_catalog
+from app.utils.catalog_registry import CatalogBundle
+from app.utils.seller_inventory import SellerSnapshot, seller_part
+
+SELLERS = [
+    {"shop_id": "SHP-SWEETS", "shop_name": "Sweets Corner", "items": [
+        {"name": "Dairy Milk Chocolate", "price": 20, "stock": 50},
+    ]},
+    {"shop_id": "SHP-DAIRY", "shop_name": "Dairy Fresh", "items": [
+        {"name": "Dairy Milk Chocolate", "price": 20, "stock": 50},
+        {"name": "Amul Milk", "price": 30, "stock": 40},
+    ]},
+]
+
+
+def seller_matches(bundle, entry):
+    """Shop id and item name each seller offers for one grocery-list entry"""
+    snapshot = SellerSnapshot(1, [seller_part(seller, bundle) for seller in SELLERS])
+    basket = snapshot.match(bundle, [entry], np.ones(1, dtype=np.int64))
+    return {
+        snapshot.shops[store]["id"]: snapshot.item_names[items[0]]
+        for store, items in zip(basket.stores, basket.item_matrix)
+    }
+
+
+def test_milk_does_not_match_chocolate():
+    bundle = CatalogBundle(load_catalog())
+    assert seller_matches(bundle, "milk") == {"SHP-DAIRY": "Amul Milk"}
+    assert seller_matches(bundle, "dairy milk chocolate") == {
+        "SHP-SWEETS": "Dairy Milk Chocolate", "SHP-DAIRY": "Dairy Milk Chocolate"
+    }
+
+
+if __name__ == "__main__":
+    test_milk_does_not_match_chocolate()
+    print("✓ Seller items use the catalog's best-match margin")
@@ -31,15 +31,9 @@ export default function Navbar() {
 
   const loadNotifications = async () => {
     try {
-      const response = await inventoryAPI.getAll()
-      const items = response.data.items || []
-      
-      // Filter for expiring and expired items
-      const expiringItems = items.filter(item => 
-        item.expiry_status === 'expired' || 
-        item.expiry_status === 'critical' || 
-        item.expiry_status === 'warning'
-      )
+      // Expired, critical and warning items, filtered on the server
+      const response = await inventoryAPI.getExpiring()
+      const expiringItems = response.data.expiring_items || []
       
       setNotifications(expiringItems.slice(0, 5)) // Show max 5
       setNotificationCount(expiringItems.length)
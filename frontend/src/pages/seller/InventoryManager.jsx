@@ -1,4 +1,4 @@
-import { useEffect, useState } from 'react'
+import { useEffect, useRef, useState } from 'react'
 import { motion, AnimatePresence } from 'framer-motion'
 import { useThemeStore } from '../../store'
 import { inventoryAPI } from '../../services/api'
@@ -10,6 +10,9 @@ import {
   MagnifyingGlassIcon,
 } from '@heroicons/react/24/outline'
 
+// Items fetched per page; further pages load on demand
+const PAGE_SIZE = 100
+
 export default function InventoryManager() {
   const { theme } = useThemeStore()
   const isDark = theme === 'dark'
@@ -17,6 +20,9 @@ export default function InventoryManager() {
   const [filteredInventory, setFilteredInventory] = useState([])
   const [searchQuery, setSearchQuery] = useState('')
   const [loading, setLoading] = useState(true)
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
+  const loadedCount = useRef(0)
   const [showModal, setShowModal] = useState(false)
   const [editingItem, setEditingItem] = useState(null)
   const [expiryInfo, setExpiryInfo] = useState(null)
@@ -46,17 +52,41 @@ export default function InventoryManager() {
 
   const loadInventory = async () => {
     try {
-      const response = await inventoryAPI.getAll()
-      setInventory(response.data.items || mockInventory)
-      setFilteredInventory(response.data.items || mockInventory)
+      // Refresh the pages already on screen, from the top
+      const limit = Math.min(Math.max(loadedCount.current, PAGE_SIZE), 1000)
+      const response = await inventoryAPI.getPage({ limit })
+      const items = response.data.items || mockInventory
+      loadedCount.current = items.length
+      setInventory(items)
+      setFilteredInventory(items)
+      setNextCursor(response.data.next_cursor || null)
     } catch (error) {
       setInventory(mockInventory)
       setFilteredInventory(mockInventory)
+      setNextCursor(null)
     } finally {
       setLoading(false)
     }
   }
 
+  const loadMoreInventory = async () => {
+    if (!nextCursor) return
+    try {
+      setLoadingMore(true)
+      const response = await inventoryAPI.getPage({ cursor: nextCursor, limit: PAGE_SIZE })
+      setInventory(prev => {
+        const items = [...prev, ...(response.data.items || [])]
+        loadedCount.current = items.length
+        return items
+      })
+      setNextCursor(response.data.next_cursor || null)
+    } catch (error) {
+      console.error('Error loading more inventory:', error)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const filterInventory = () => {
     if (!searchQuery) {
       setFilteredInventory(inventory)
@@ -306,6 +336,20 @@ export default function InventoryManager() {
         </div>
       </motion.div>
 
+      {nextCursor && !loading && (
+        <div className="flex justify-center">
+          <button
+            onClick={loadMoreInventory}
+            disabled={loadingMore}
+            className={`px-6 py-3 rounded-lg font-medium transition-all ${
+              isDark ? 'bg-gray-800 text-gray-300 hover:bg-gray-700' : 'bg-gray-100 text-gray-700 hover:bg-gray-200'
+            } disabled:opacity-50`}
+          >
+            {loadingMore ? 'Loading...' : 'Load more items'}
+          </button>
+        </div>
+      )}
+
       {/* Add/Edit Modal */}
       <AnimatePresence>
         {showModal && (
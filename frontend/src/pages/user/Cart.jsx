@@ -30,9 +30,10 @@ export default function Cart() {
     }
 
     setProcessing(true)
+    let reservationId = null
     
     try {
-      // Deduct stock from seller inventories (only for real sellers with shop_id)
+      // Hold stock in seller inventories (only for real sellers with shop_id)
       const stockDeductionItems = items
         .filter(item => item.shopId) // Only items from real sellers
         .map(item => ({
@@ -42,7 +43,27 @@ export default function Cart() {
         }))
       
       if (stockDeductionItems.length > 0) {
-        await inventoryAPI.deductStock(stockDeductionItems)
+        const reservation = await inventoryAPI.reserveStock(stockDeductionItems)
+        reservationId = reservation.data.status === 'held' ? reservation.data.reservation_id : null
+        const soldOut = reservation.data.lines.filter(line => line.status === 'insufficient_stock')
+        if (soldOut.length > 0) {
+          if (reservationId) {
+            await inventoryAPI.releaseReservation(reservationId)
+            reservationId = null
+          }
+          notifications.show({
+            title: 'Not Enough Stock',
+            message: `${soldOut.map(line => line.name).join(', ')} just sold out`,
+            color: 'orange',
+          })
+          return
+        }
+      }
+
+      // Keep the held stock deducted before recording the purchase
+      if (reservationId) {
+        await inventoryAPI.confirmReservation(reservationId)
+        reservationId = null
       }
       
       // Process each item in cart (add to customer's purchase history)
@@ -102,6 +123,10 @@ export default function Cart() {
       
     } catch (error) {
       console.error('Checkout error:', error)
+      if (reservationId) {
+        // Put the held stock back rather than waiting for the hold to expire
+        inventoryAPI.releaseReservation(reservationId).catch(() => {})
+      }
       notifications.show({
         title: 'Checkout Failed',
         message: error.response?.data?.detail || 'Failed to complete purchase',
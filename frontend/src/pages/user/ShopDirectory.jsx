@@ -1,4 +1,4 @@
-import { useEffect, useState } from 'react'
+import { useEffect, useRef, useState } from 'react'
 import { motion } from 'framer-motion'
 import { Link } from 'react-router-dom'
 import { useThemeStore } from '../../store'
@@ -13,36 +13,69 @@ export default function ShopDirectory() {
   const [searchQuery, setSearchQuery] = useState('')
   const [loading, setLoading] = useState(true)
   const [filter, setFilter] = useState('all')
+  const [categories, setCategories] = useState(['all'])
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
+  const searchRequest = useRef(0)
 
   useEffect(() => {
     loadShops()
-  }, [])
+  }, [filter])
 
   useEffect(() => {
     filterShops()
   }, [searchQuery, filter, shops])
 
+  // The API pages shops by cursor and filters categories server-side
+  const fetchPage = (cursor) => shopAPI.getAll({
+    category: filter !== 'all' ? filter : undefined,
+    cursor: cursor || undefined
+  })
+
   const loadShops = async () => {
     try {
-      const response = await shopAPI.getAll()
+      setLoading(true)
+      const response = await fetchPage(null)
       const shopsData = response.data.shops || []
       setShops(shopsData)
       setFilteredShops(shopsData)
+      setNextCursor(response.data.next_cursor || null)
+      if (response.data.facets) {
+        setCategories(['all', ...Object.keys(response.data.facets.categories)])
+      }
     } catch (error) {
       console.error('Error loading shops:', error)
       setShops([])
       setFilteredShops([])
+      setNextCursor(null)
     } finally {
       setLoading(false)
     }
   }
 
+  const loadMoreShops = async () => {
+    if (!nextCursor) return
+    try {
+      setLoadingMore(true)
+      const response = await fetchPage(nextCursor)
+      setShops(prev => [...prev, ...(response.data.shops || [])])
+      setNextCursor(response.data.next_cursor || null)
+    } catch (error) {
+      console.error('Error loading more shops:', error)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const filterShops = async () => {
+    const request = ++searchRequest.current
+    const query = searchQuery.trim()
+
     // Check if search query looks like a shop ID (starts with SHP)
-    if (searchQuery.trim().toUpperCase().startsWith('SHP')) {
+    if (query.toUpperCase().startsWith('SHP')) {
       try {
         setLoading(true)
-        const response = await shopAPI.searchById(searchQuery.trim())
+        const response = await shopAPI.searchById(query)
         const shop = response.data.shop
         
         // Convert to directory format
@@ -57,44 +90,39 @@ export default function ShopDirectory() {
           itemCount: shop.inventory?.length || 0
         }
         
-        setFilteredShops([formattedShop])
-        setLoading(false)
-        return
+        if (request === searchRequest.current) setFilteredShops([formattedShop])
       } catch (error) {
         console.error('Shop ID search error:', error)
-        setFilteredShops([])
-        setLoading(false)
-        return
+        if (request === searchRequest.current) setFilteredShops([])
+      } finally {
+        if (request === searchRequest.current) setLoading(false)
       }
+      return
     }
     
-    // Normal search
-    let filtered = shops
-
-    if (searchQuery) {
-      filtered = filtered.filter(shop =>
-        shop.name.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        shop.category.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        (shop.location && shop.location.toLowerCase().includes(searchQuery.toLowerCase()))
-      )
+    if (!query) {
+      setFilteredShops(shops)
+      return
     }
 
-    if (filter !== 'all') {
-      filtered = filtered.filter(shop => shop.category.toLowerCase() === filter.toLowerCase())
-    }
+    // Show matches among the loaded shops while the whole directory is searched
+    const text = query.toLowerCase()
+    const matches = (shop) => filter === 'all' || shop.category === filter
+    setFilteredShops(shops.filter(shop =>
+      shop.name.toLowerCase().includes(text) ||
+      shop.category.toLowerCase().includes(text) ||
+      (shop.location && shop.location.toLowerCase().includes(text))
+    ))
 
-    setFilteredShops(filtered)
-  }
-
-  const [categories, setCategories] = useState(['all'])
-
-  useEffect(() => {
-    // Extract unique categories from shops
-    if (shops.length > 0) {
-      const uniqueCategories = ['all', ...new Set(shops.map(shop => shop.category))]
-      setCategories(uniqueCategories)
+    try {
+      const response = await shopAPI.search(query, { limit: 100 })
+      if (request === searchRequest.current) {
+        setFilteredShops((response.data.shops || []).filter(matches))
+      }
+    } catch (error) {
+      console.error('Shop search error:', error)
     }
-  }, [shops])
+  }
 
   return (
     <div className="space-y-8">
@@ -227,6 +255,20 @@ export default function ShopDirectory() {
         </div>
       )}
 
+      {nextCursor && !loading && !searchQuery.trim() && (
+        <div className="flex justify-center">
+          <button
+            onClick={loadMoreShops}
+            disabled={loadingMore}
+            className={`px-6 py-3 rounded-lg font-medium transition-all ${
+              isDark ? 'bg-gray-800 text-gray-300 hover:bg-gray-700' : 'bg-gray-100 text-gray-700 hover:bg-gray-200'
+            } disabled:opacity-50`}
+          >
+            {loadingMore ? 'Loading...' : 'Load more shops'}
+          </button>
+        </div>
+      )}
+
       {filteredShops.length === 0 && !loading && (
         <div className="text-center py-20">
           <p className={`text-xl ${isDark ? 'text-gray-400' : 'text-gray-600'}`}>
@@ -63,9 +63,11 @@ export const userAPI = {
 export const shopAPI = {
   getAll: (params) => api.get('/shops', { params }),
   getById: (id) => api.get(`/shops/${id}`),
-  search: (query) => api.get('/shops/search', { params: { q: query } }),
+  search: (query, params = {}) => api.get('/shops/search', { params: { q: query, ...params } }),
   searchById: (shopId) => api.get(`/shops/search/by-id/${shopId}`),
   matchGroceryList: (items, location) => api.post('/shops/match', { items, location }),
+  autocompleteItems: (prefix, limit = 10) => api.get('/shops/items/autocomplete', { params: { prefix, limit } }),
+  compareItemPrices: (item, limit = 5) => api.get('/shops/items/prices', { params: { item, limit } }),
 }
 
 // Inventory APIs
@@ -73,10 +75,23 @@ export const inventoryAPI = {
   upload: (formData) => api.post('/inventory/upload', formData, {
     headers: { 'Content-Type': 'multipart/form-data' },
   }),
+  getUploadJob: (jobId) => api.get(`/inventory/upload/${jobId}`),
   ocrScan: (formData) => api.post('/inventory/ocr-scan', formData, {
     headers: { 'Content-Type': 'multipart/form-data' },
   }),
-  getAll: () => api.get('/inventory'),
+  getPage: (params) => api.get('/inventory', { params }),
+  // Follows every next_cursor: only for views that need the whole inventory at
+  // once, such as expiry stats; lists page with getPage instead
+  getAll: async () => {
+    const items = []
+    let cursor = null
+    do {
+      const response = await api.get('/inventory', { params: cursor ? { cursor } : {} })
+      items.push(...(response.data.items || []))
+      cursor = response.data.next_cursor
+    } while (cursor)
+    return { data: { items } }
+  },
   getExpiring: () => api.get('/inventory/expiring'),
   create: (item) => api.post('/inventory', item),
   update: (id, item) => api.put(`/inventory/${id}`, item),
@@ -84,6 +99,9 @@ export const inventoryAPI = {
   getExpiryInfo: (category) => api.get(`/inventory/expiry-info/${category}`),
   getAllExpiryCategories: () => api.get('/inventory/expiry-categories'),
   deductStock: (items) => api.post('/inventory/deduct-stock', items),
+  reserveStock: (items) => api.post('/inventory/reservations', items),
+  confirmReservation: (id) => api.post(`/inventory/reservations/${id}/confirm`),
+  releaseReservation: (id) => api.delete(`/inventory/reservations/${id}`),
 }
 
 // Analytics APIs